@@ -0,0 +1,129 @@
+"""Benchmark shared evaluation of expression families against separate kernels.
+
+Usage:
+    python benchmarks/bench_dag.py [--points 1000000] [--repeat 10]
+"""
+
+import argparse
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from mathviber.dag import ExpressionDAG, SubexpressionCache
+from mathviber.expressions import compile_expression
+
+FAMILIES = {
+    "damped oscillators": [
+        f"{f}({k}*x)*exp(-x**2/10)" for f in ("sin", "cos") for k in range(1, 6)
+    ],
+    "shared envelope": [
+        "sin(x)*exp(-x)",
+        "cos(x)*exp(-x)",
+        "exp(-x)",
+        "sin(x)**2*exp(-x)",
+    ],
+    "unrelated": ["sin(x)", "x**2 + 1", "tanh(x)", "sqrt(abs(x))"],
+}
+
+
+def separate(expressions: list[str], x: np.ndarray) -> list[np.ndarray]:
+    """Evaluate each expression with its own compiled kernel.
+
+    Args:
+        expressions: The mathematical expressions.
+        x: X values.
+
+    Returns:
+        Y values of each expression.
+    """
+    return [compile_expression(expression)(x) for expression in expressions]
+
+
+def shared(expressions: list[str], x: np.ndarray) -> list[np.ndarray | None]:
+    """Evaluate the expressions as one DAG.
+
+    Args:
+        expressions: The mathematical expressions.
+        x: X values.
+
+    Returns:
+        Y values of each expression.
+    """
+    return ExpressionDAG(expressions).evaluate(x)[0]
+
+
+def peak_memory(function, expressions: list[str], x: np.ndarray) -> int:
+    """Measure the peak memory allocated while evaluating a family.
+
+    Args:
+        function: ``separate`` or ``shared``.
+        expressions: The mathematical expressions.
+        x: X values.
+
+    Returns:
+        Peak traced allocation in bytes, including the results.
+    """
+    tracemalloc.start()
+    function(expressions, x)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    """Run the benchmark and print a table of timings and peak memory."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    x = np.linspace(-10, 10, args.points)
+    print(f"{args.points} points, best of {args.repeat}")
+    print(
+        f"{'family':<22}{'nodes':>7}{'separate (ms)':>15}{'shared (ms)':>13}"
+        f"{'cached (ms)':>13}{'separate (MB)':>15}{'shared (MB)':>13}"
+    )
+
+    for name, expressions in FAMILIES.items():
+        for expected, actual in zip(
+            separate(expressions, x), shared(expressions, x), strict=True
+        ):
+            np.testing.assert_allclose(actual, expected)
+
+        separate_time = min(
+            timeit.repeat(
+                lambda e=expressions: separate(e, x), number=1, repeat=args.repeat
+            )
+        )
+        shared_time = min(
+            timeit.repeat(
+                lambda e=expressions: shared(e, x), number=1, repeat=args.repeat
+            )
+        )
+
+        # A repeated request on the same grid reuses cached results
+        cache = SubexpressionCache(max_bytes=2**30)
+        grid = ("linspace", -10, 10, args.points)
+        ExpressionDAG(expressions).evaluate(x, cache=cache, grid_key=grid)
+        cached_time = min(
+            timeit.repeat(
+                lambda e=expressions, c=cache, g=grid: ExpressionDAG(e).evaluate(
+                    x, cache=c, grid_key=g
+                ),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+
+        nodes = ExpressionDAG(expressions).stats()["nodes"]
+        print(
+            f"{name:<22}{nodes:>7}{separate_time * 1e3:>15.2f}"
+            f"{shared_time * 1e3:>13.2f}{cached_time * 1e3:>13.2f}"
+            f"{peak_memory(separate, expressions, x) / 2**20:>15.1f}"
+            f"{peak_memory(shared, expressions, x) / 2**20:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
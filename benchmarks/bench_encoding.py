@@ -0,0 +1,63 @@
+"""Compare payload size and encode time of trace array encodings.
+
+Usage:
+    python benchmarks/bench_encoding.py [--repeat 5]
+"""
+
+import argparse
+import json
+import timeit
+
+import numpy as np
+
+from mathviber.encoding import encode_trace_array
+
+SIZES = [1_000, 100_000, 1_000_000]
+ENCODINGS = ["text", "float64", "float32"]
+
+
+def encode_payload(x: np.ndarray, y: np.ndarray, encoding: str) -> bytes:
+    """Encode a trace and serialize it to JSON bytes.
+
+    Args:
+        x: X values.
+        y: Y values.
+        encoding: Array encoding name.
+
+    Returns:
+        The serialized trace.
+    """
+    trace = {
+        "x": encode_trace_array(x, encoding),
+        "y": encode_trace_array(y, encoding),
+    }
+    return json.dumps(trace).encode()
+
+
+def main() -> None:
+    """Run the benchmark and print a table of sizes and timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'points':>10}{'encoding':>10}{'size (KiB)':>14}{'encode (ms)':>14}")
+    for size in SIZES:
+        x = np.linspace(-10, 10, size)
+        y = np.sin(x) * np.exp(-(x**2) / 20)
+        for encoding in ENCODINGS:
+            payload = encode_payload(x, y, encoding)
+            elapsed = min(
+                timeit.repeat(
+                    lambda x=x, y=y, e=encoding: encode_payload(x, y, e),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            print(
+                f"{size:>10}{encoding:>10}{len(payload) / 1024:>14.1f}"
+                f"{elapsed * 1e3:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark compiled expression kernels against the previous eval path.
+
+Usage:
+    python benchmarks/bench_expressions.py [--points 1000000] [--repeat 20]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+
+from mathviber.expressions import ALLOWED_NAMES, compile_expression
+
+EXPRESSIONS = [
+    "sin(x)",
+    "x**2 + 2*x + 1",
+    "exp(-x**2) * cos(3*x)",
+    "sqrt(abs(x)) + log(abs(x) + 1) - tanh(x)",
+]
+
+
+def eval_path(expression: str, x: np.ndarray) -> np.ndarray:
+    """Evaluate an expression the way the app did before AST compilation.
+
+    Args:
+        expression: The mathematical expression.
+        x: X values.
+
+    Returns:
+        Y values.
+    """
+    namespace = dict(ALLOWED_NAMES)
+    namespace["x"] = x
+    result: np.ndarray = eval(
+        expression.replace("**", "^").replace("^", "**"),
+        {"__builtins__": {}},
+        namespace,
+    )
+    return result
+
+
+def main() -> None:
+    """Run the benchmark and print a table of timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    x = np.linspace(-10, 10, args.points)
+    print(f"{args.points} points, best of {args.repeat}")
+    print(f"{'expression':<45}{'eval (ms)':>12}{'kernel (ms)':>14}{'ratio':>8}")
+
+    for expression in EXPRESSIONS:
+        kernel = compile_expression(expression)
+        np.testing.assert_allclose(kernel(x), eval_path(expression, x))
+
+        eval_time = min(
+            timeit.repeat(
+                lambda e=expression: eval_path(e, x), number=1, repeat=args.repeat
+            )
+        )
+        kernel_time = min(
+            timeit.repeat(lambda k=kernel: k(x), number=1, repeat=args.repeat)
+        )
+        print(
+            f"{expression:<45}{eval_time * 1e3:>12.2f}{kernel_time * 1e3:>14.2f}"
+            f"{kernel_time / eval_time:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
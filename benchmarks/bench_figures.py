@@ -0,0 +1,68 @@
+"""Measure the time to build the figures of a plot response.
+
+Covers the live update JSON, the HTML fragment, the static image figure
+and a batch of overlaid curves, with data already downsampled to display
+size, so only figure construction and serialization are timed.
+
+Usage:
+    python benchmarks/bench_figures.py [--points 4000] [--repeat 50]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+
+from mathviber.figures import (
+    batch_figure_spec,
+    build_static_figure,
+    create_figure_json,
+    create_interactive_plot,
+    encode_figure,
+)
+
+PLOT_OPTIONS = {
+    "x_name": "t",
+    "y_name": "f(t)",
+    "graph_title": "",
+    "x_log": False,
+    "y_log": False,
+    "y_min": -1.0,
+    "y_max": None,
+}
+
+
+def main() -> None:
+    """Run the benchmark and print the best time per figure kind."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    x = np.linspace(-10, 10, args.points)
+    y = np.sin(x) * np.exp(-(x**2) / 20)
+    curves = [(f"sin({k}*x)", x, np.sin(k * x)) for k in range(1, 6)]
+
+    cases = {
+        "json": lambda: create_figure_json(
+            "sin(x)", x, y, encoding="float64", **PLOT_OPTIONS
+        ),
+        "html": lambda: create_interactive_plot(
+            "sin(x)", x, y, encoding="float64", **PLOT_OPTIONS
+        ),
+        "static": lambda: build_static_figure("sin(x)", x, y, **PLOT_OPTIONS),
+        "batch (5 curves)": lambda: encode_figure(
+            batch_figure_spec(curves, **PLOT_OPTIONS), "float64"
+        ),
+    }
+
+    print(f"{'figure':>18}{'build (ms)':>14}")
+    for name, build in cases.items():
+        # The first call imports Plotly and its validators
+        build()
+        elapsed = min(timeit.repeat(build, number=1, repeat=args.repeat))
+        print(f"{name:>18}{elapsed * 1e3:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
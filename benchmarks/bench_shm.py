@@ -0,0 +1,104 @@
+"""Benchmark the shared memory array transport against pickling.
+
+A worker process produces x/y arrays and sends them to the parent either
+pickled through a pipe or as a shared memory handle.
+
+Usage:
+    python benchmarks/bench_shm.py [--sizes 100000 1000000 10000000] [--repeat 5]
+"""
+
+import argparse
+import multiprocessing
+import time
+from multiprocessing.connection import Connection
+
+import numpy as np
+
+from mathviber.shm import SharedArrayWriter, import_arrays
+
+
+def produce(conn: Connection) -> None:
+    """Answer (transport, size) requests with arrays of that size.
+
+    Args:
+        conn: Worker end of the pipe.
+    """
+    while True:
+        request = conn.recv()
+        if request is None:
+            return
+        transport, size = request
+        if transport == "pickle":
+            x = np.linspace(0, 1, size)
+            conn.send((x, np.sin(x)))
+        else:
+            # Compute straight into the segment
+            writer = SharedArrayWriter([(size,), (size,)])
+            x, y = writer.arrays
+            x[:] = np.linspace(0, 1, size)
+            np.sin(x, out=y)
+            del x, y
+            conn.send(writer.finish())
+
+
+def fetch(conn: Connection, transport: str, size: int) -> tuple[float, float]:
+    """Request arrays from the worker and time their arrival.
+
+    Args:
+        conn: Parent end of the pipe.
+        transport: ``"pickle"`` or ``"shm"``.
+        size: Number of points per array.
+
+    Returns:
+        Tuple of (total seconds, seconds spent receiving and decoding).
+    """
+    started = time.perf_counter()
+    conn.send((transport, size))
+    conn.poll(None)
+    received = time.perf_counter()
+    reply = conn.recv()
+    x, y = import_arrays(reply) if transport == "shm" else reply
+    assert x.size == size and y[-1] == np.sin(1.0)
+    finished = time.perf_counter()
+    return finished - started, finished - received
+
+
+def main() -> None:
+    """Run the benchmark and print a table of timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    conn, child_conn = context.Pipe()
+    worker = context.Process(target=produce, args=(child_conn,), daemon=True)
+    worker.start()
+
+    print(f"best of {args.repeat}; receive = transfer and decoding in the parent")
+    print(
+        f"{'points':>10}{'pickle (ms)':>14}{'receive':>10}"
+        f"{'shm (ms)':>11}{'receive':>10}{'ratio':>8}"
+    )
+    try:
+        for size in args.sizes:
+            results = {}
+            for transport in ("pickle", "shm"):
+                runs = [fetch(conn, transport, size) for _ in range(args.repeat)]
+                results[transport] = min(runs)
+            pickle_time, pickle_receive = results["pickle"]
+            shm_time, shm_receive = results["shm"]
+            print(
+                f"{size:>10}{pickle_time * 1e3:>14.2f}{pickle_receive * 1e3:>10.2f}"
+                f"{shm_time * 1e3:>11.2f}{shm_receive * 1e3:>10.2f}"
+                f"{shm_time / pickle_time:>8.2f}"
+            )
+    finally:
+        conn.send(None)
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
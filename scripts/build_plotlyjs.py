@@ -0,0 +1,179 @@
+"""Build the Plotly.js bundle served by MathViber.
+
+Without this step the app serves the full bundle shipped with the plotly
+package. This script writes ``src/mathviber/static/plotly.min.js`` instead,
+together with gzip and Brotli copies compressed at the best ratio, so they
+need not be compressed at runtime. Run it before building the wheel:
+
+    # Pin the full bundle of the installed plotly package
+    python scripts/build_plotlyjs.py
+
+    # Build a partial bundle with only the trace types MathViber draws
+    # (needs git, Node.js and npm, and network access to GitHub and npm)
+    python scripts/build_plotlyjs.py --traces scatter
+
+    # Use a bundle built or downloaded elsewhere
+    python scripts/build_plotlyjs.py --source plotly-scatter.min.js
+
+Pass ``--clean`` to remove the built files and serve the plotly package's
+bundle again.
+"""
+
+import argparse
+import gzip
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+STATIC_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), "..", "src", "mathviber", "static")
+)
+BUNDLE_NAME = "plotly.min.js"
+PLOTLYJS_REPO = "https://github.com/plotly/plotly.js.git"
+
+
+def installed_bundle() -> str:
+    """Return the path of the bundle shipped with the plotly package.
+
+    Returns:
+        Path of plotly's ``plotly.min.js``.
+    """
+    import plotly
+
+    return os.path.join(os.path.dirname(plotly.__file__), "package_data", BUNDLE_NAME)
+
+
+def bundle_version(path: str) -> str:
+    """Read the version from the license header of a bundle.
+
+    Args:
+        path: Path of the bundle.
+
+    Returns:
+        The version.
+
+    Raises:
+        ValueError: If the header has no version.
+    """
+    with open(path, "rb") as f:
+        header = f.read(512).decode("utf-8", errors="replace")
+    match = re.search(r"plotly\.js v(\d+\.\d+\.\d+)", header)
+    if match is None:
+        raise ValueError(f"{path} has no plotly.js version header")
+    return match.group(1)
+
+
+def build_partial_bundle(version: str, traces: str, work_dir: str) -> str:
+    """Build a partial bundle with the plotly.js custom bundle task.
+
+    Args:
+        version: Plotly.js version to build.
+        traces: Comma-separated trace types to include.
+        work_dir: Directory to check out plotly.js into.
+
+    Returns:
+        Path of the minified partial bundle.
+    """
+    source_dir = os.path.join(work_dir, "plotly.js")
+    subprocess.run(
+        ["git", "clone", "--depth", "1", "--branch", f"v{version}"]
+        + [PLOTLYJS_REPO, source_dir],
+        check=True,
+    )
+    subprocess.run(["npm", "ci"], cwd=source_dir, check=True)
+    subprocess.run(
+        ["npm", "run", "custom-bundle", "--"]
+        + ["--traces", traces, "--out", "mathviber"],
+        cwd=source_dir,
+        check=True,
+    )
+    return os.path.join(source_dir, "dist", "plotly-mathviber.min.js")
+
+
+def write_bundle(source: str, output_dir: str) -> list[str]:
+    """Copy a bundle into place and write its precompressed copies.
+
+    Args:
+        source: Path of the bundle.
+        output_dir: Directory to write to.
+
+    Returns:
+        Paths of the written files.
+    """
+    with open(source, "rb") as f:
+        data = f.read()
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, BUNDLE_NAME)
+    outputs = {path: data, f"{path}.gz": gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        print("brotli is not installed; skipping the .br copy", file=sys.stderr)
+    else:
+        outputs[f"{path}.br"] = brotli.compress(data, quality=11)
+
+    for output, content in outputs.items():
+        with open(output, "wb") as f:
+            f.write(content)
+    return list(outputs)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the build.
+
+    Args:
+        argv: Command-line arguments.
+
+    Returns:
+        Exit status.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--traces",
+        help="Comma-separated trace types of a partial bundle, e.g. scatter",
+    )
+    source.add_argument("--source", help="Use this bundle file as it is")
+    source.add_argument("--clean", action="store_true", help="Remove the built bundle")
+    parser.add_argument(
+        "--version",
+        help="Plotly.js version of a partial bundle (default: the version "
+        "bundled with the installed plotly package)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=STATIC_DIR,
+        help="Directory to write to (default: src/mathviber/static)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.clean:
+        for suffix in ("", ".gz", ".br"):
+            path = os.path.join(args.output_dir, BUNDLE_NAME + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"Removed {path}")
+        return 0
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.source:
+            bundle = args.source
+        elif args.traces:
+            version = args.version or bundle_version(installed_bundle())
+            bundle = build_partial_bundle(version, args.traces, work_dir)
+        else:
+            bundle = installed_bundle()
+        version = bundle_version(bundle)
+        outputs = write_bundle(bundle, args.output_dir)
+
+    for output in outputs:
+        print(f"{output}: {os.path.getsize(output) / 2**20:.2f} MiB")
+    print(f"Plotly.js {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
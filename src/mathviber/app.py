@@ -1,217 +1,441 @@
 """Flask application factory and routes for MathViber."""
 
-import os
-import tempfile
-import uuid
+import atexit
+import json
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Mapping
+from typing import Any
 
 import numpy as np
-import plotly.graph_objects as go
-import plotly.io as pio
-from flask import Flask, jsonify, render_template, request, send_file
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
+from flask.typing import ResponseReturnValue
+
+from mathviber._version import __version__
+from mathviber.artifacts import ArtifactStore, DirectoryStore
+from mathviber.assets import (
+    asset_content,
+    asset_fingerprint,
+    asset_mimetype,
+    plotlyjs_version,
+)
+from mathviber.cache import CacheBackend, MemoryCache, request_cache_key
+from mathviber.cancel import (
+    SUPERSEDED_MESSAGE,
+    Cancelled,
+    GenerationRegistry,
+    check_cancelled,
+)
+from mathviber.chunked import iter_display_chunks
+from mathviber.compression import compress_response, negotiate_encoding
+from mathviber.dag import SubexpressionCache
+from mathviber.decimate import decimate
+from mathviber.encoding import (
+    ARRAY_ENCODINGS,
+    binary_arrays_supported,
+    encode_trace_array,
+)
+from mathviber.evaluation import (
+    EvaluationKilled,
+    EvaluationPool,
+    EvaluationTimeout,
+    sample_batch,
+    sample_expression,
+)
+from mathviber.expressions import (
+    ExpressionCache,
+    ExpressionError,
+    normalize_expression,
+)
+from mathviber.figures import (
+    PLOT_CONFIG,
+    STATIC_HEIGHT,
+    STATIC_WIDTH,
+    batch_figure_spec,
+    build_static_figure,
+    create_figure_json,
+    create_interactive_plot,
+    encode_figure,
+)
+from mathviber.render import RenderPool, RenderQueueFull, RenderTimeout
+from mathviber.sampling import SAMPLING_MODES
+
+DEFAULT_CONFIG: dict[str, Any] = {
+    # Rasterize download PNGs only when /plot or /download is requested
+    "DEFERRED_RENDER": True,
+    # Number of pending plot specs kept for deferred rendering
+    "PLOT_SPEC_CACHE_SIZE": 256,
+    # Static image render pool
+    "RENDER_WORKERS": 2,
+    "RENDER_QUEUE_SIZE": 16,
+    "RENDER_TIMEOUT": 30.0,
+    "RENDER_RETRY_AFTER": 1,
+    "RENDER_WARMUP": False,
+    # Number of compiled expressions kept in the LRU cache
+    "EXPRESSION_CACHE_SIZE": 512,
+    # "adaptive" refines where the curve bends, "uniform" uses a fixed grid
+    "SAMPLING": "adaptive",
+    "ADAPTIVE_MAX_DEPTH": 12,
+    "ADAPTIVE_TOLERANCE": 5e-4,
+    # "inline" evaluates in the request thread, "process" in worker
+    # processes with a wall-clock timeout and a memory limit per job
+    "EVALUATION_BACKEND": "inline",
+    "EVALUATION_WORKERS": 2,
+    "EVALUATION_TIMEOUT": 5.0,
+    "EVALUATION_MEMORY_LIMIT": 512 * 2**20,
+    # Largest number of points a request may evaluate
+    "MAX_POINTS": 1_000_000,
+    # Uniform grids with more points are evaluated in chunks of this size
+    "CHUNK_SIZE": 1 << 18,
+    # /api/stream_plot sends a coarse preview of this many points first,
+    # then the full grid in reduced blocks of this many evaluated points
+    "STREAM_PREVIEW_POINTS": 200,
+    "STREAM_CHUNK_SIZE": 1 << 16,
+    # Largest number of expressions, and of evaluated points over all of
+    # them, in one /api/batch_plot request
+    "MAX_BATCH_SIZE": 100,
+    "MAX_BATCH_POINTS": 10_000_000,
+    # Bytes of shared subexpression arrays kept between batch requests
+    "SUBEXPRESSION_CACHE_BYTES": 64 * 2**20,
+    # Traces are downsampled to about this many pixel columns before plotting
+    "DECIMATION_WIDTH": 1000,
+    "DECIMATION_METHOD": "m4",
+    # Client sessions whose latest request generation is tracked, so
+    # superseded plot updates can be cancelled
+    "GENERATION_SESSIONS": 4096,
+    # In-process cache of /api/update_plot responses
+    "RESULT_CACHE_SIZE": 256,
+    "RESULT_CACHE_TTL": 300.0,
+    # Optional CacheBackend instance, such as a shared cache, used instead
+    "RESULT_CACHE_BACKEND": None,
+    # Directory of rendered plot files, such as one on a volume shared by
+    # several servers; None uses a private temporary directory
+    "ARTIFACT_DIR": None,
+    # Least recently used plot files are evicted beyond this total size or
+    # this many seconds after their last use, checked at every interval
+    "ARTIFACT_MAX_BYTES": 256 * 2**20,
+    "ARTIFACT_MAX_AGE": 3600.0,
+    "ARTIFACT_SWEEP_INTERVAL": 60.0,
+    # Optional ArtifactStore instance used instead
+    "ARTIFACT_STORE": None,
+    # Seconds browsers and shared caches may keep plot images; their URLs
+    # are content-addressed, so they never need revalidation
+    "PLOT_MAX_AGE": 365 * 24 * 3600,
+    # Seconds static assets may be kept; their URLs contain a content hash
+    "ASSET_MAX_AGE": 365 * 24 * 3600,
+    # Compress JSON, HTML, CSS and JavaScript responses of at least this many
+    # bytes with gzip, or Brotli if installed; None disables compression
+    "COMPRESSION_MIN_SIZE": 1024,
+}
+
+# Names of download PNGs, a hash of the plot spec
+PLOT_FILENAME = re.compile(r"plot_[0-9a-f]{32}\.png")
+
+
+def plot_spec_name(filename: str) -> str:
+    """Return the name under which the spec of a plot is stored.
+
+    Args:
+        filename: The filename of the plot image.
+
+    Returns:
+        The plot's name with a ``.json`` suffix.
+    """
+    return filename.removesuffix(".png") + ".json"
+
+
+def page_array_encoding() -> str:
+    """Return the array encoding used by the page for live updates.
+
+    Returns:
+        ``"float64"`` if the page's Plotly.js decodes typed arrays, else
+        ``"text"``.
+    """
+    return "float64" if binary_arrays_supported(plotlyjs_version()) else "text"
 
 
-def create_app() -> Flask:
+def create_app(config: Mapping[str, Any] | None = None) -> Flask:
     """Create and configure the Flask application.
 
+    Configuration is read from ``DEFAULT_CONFIG``, then from environment
+    variables prefixed with ``MATHVIBER_``, then from ``config``.
+
+    Args:
+        config: Optional configuration overrides.
+
     Returns:
         Flask: Configured Flask application instance.
     """
-    app = Flask(__name__)
+    # Static files are served by the fingerprinted asset route instead
+    app = Flask(__name__, static_folder=None)
+    app.config.from_mapping(DEFAULT_CONFIG)
+    app.config.from_prefixed_env("MATHVIBER")
+    if config is not None:
+        app.config.update(config)
+
+    # Rendered plot files, named by the hash of their plot spec
+    artifact_store: ArtifactStore = app.config["ARTIFACT_STORE"] or DirectoryStore(
+        app.config["ARTIFACT_DIR"],
+        max_bytes=app.config["ARTIFACT_MAX_BYTES"],
+        max_age=app.config["ARTIFACT_MAX_AGE"],
+        sweep_interval=app.config["ARTIFACT_SWEEP_INTERVAL"],
+    )
+    artifact_store.start()
+    app.extensions["mathviber_artifact_store"] = artifact_store
+    atexit.register(artifact_store.close)
+
+    # Specs of recent plots, keyed by their download filename, from which
+    # files not yet rendered or since evicted are rendered on request
+    plot_specs: OrderedDict[str, dict[str, Any]] = OrderedDict()
+    plot_specs_lock = threading.Lock()
+    render_locks: dict[str, threading.Lock] = {}
+
+    # Long-lived workers that run Kaleido renders off the request thread
+    render_pool = RenderPool(
+        workers=app.config["RENDER_WORKERS"],
+        queue_size=app.config["RENDER_QUEUE_SIZE"],
+        timeout=app.config["RENDER_TIMEOUT"],
+        warmup=app.config["RENDER_WARMUP"],
+    )
+    app.extensions["mathviber_render_pool"] = render_pool
+    atexit.register(render_pool.shutdown, wait=False)
+
+    # Validated, compiled expressions reused across requests
+    expression_cache = ExpressionCache(app.config["EXPRESSION_CACHE_SIZE"])
+    app.extensions["mathviber_expression_cache"] = expression_cache
+
+    # Serialized responses of /api/update_plot keyed by request parameters
+    result_cache: CacheBackend = app.config["RESULT_CACHE_BACKEND"] or MemoryCache(
+        maxsize=app.config["RESULT_CACHE_SIZE"], ttl=app.config["RESULT_CACHE_TTL"]
+    )
+    app.extensions["mathviber_result_cache"] = result_cache
+
+    # Evaluated subexpressions of batch requests, keyed by grid and node
+    subexpression_cache = SubexpressionCache(app.config["SUBEXPRESSION_CACHE_BYTES"])
+    app.extensions["mathviber_subexpression_cache"] = subexpression_cache
+
+    # Optional worker processes isolating evaluation from the server
+    evaluation_pool: EvaluationPool | None = None
+    if app.config["EVALUATION_BACKEND"] == "process":
+        evaluation_pool = EvaluationPool(
+            workers=app.config["EVALUATION_WORKERS"],
+            timeout=app.config["EVALUATION_TIMEOUT"],
+            memory_limit=app.config["EVALUATION_MEMORY_LIMIT"],
+        )
+        evaluation_pool.start()
+        atexit.register(evaluation_pool.shutdown)
+    elif app.config["EVALUATION_BACKEND"] != "inline":
+        raise ValueError(
+            f"Unknown evaluation backend: {app.config['EVALUATION_BACKEND']}"
+        )
+    app.extensions["mathviber_evaluation_pool"] = evaluation_pool
+
+    # Latest request generation of each client session, used to cancel
+    # evaluations and renders the client no longer waits for
+    generations = GenerationRegistry(app.config["GENERATION_SESSIONS"])
+    app.extensions["mathviber_generations"] = generations
+
+    # Leave out the whitespace around template tags of rendered pages
+    app.jinja_env.trim_blocks = True
+    app.jinja_env.lstrip_blocks = True
+
+    @app.template_global()
+    def asset_url(filename: str) -> str:
+        """Return the fingerprinted URL of a static asset.
 
-    # Store plot files in a temporary directory
-    plot_dir = tempfile.mkdtemp(prefix="mathviber_plots_")
+        Args:
+            filename: File name within the static directory.
+
+        Returns:
+            URL that changes whenever the asset's content does.
+        """
+        return url_for(
+            "static_asset", fingerprint=asset_fingerprint(filename), filename=filename
+        )
+
+    def cache_immutably(response: Response, max_age: int) -> Response:
+        """Allow caches to keep a response without revalidation.
+
+        Args:
+            response: Response of a URL whose content never changes.
+            max_age: Seconds the response may be kept.
+
+        Returns:
+            The response, with its ``Cache-Control`` header set.
+        """
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.cache_control.immutable = True
+        return response
+
+    @app.after_request
+    def compress(response: Response) -> Response:
+        """Compress responses the client accepts in compressed form.
+
+        Args:
+            response: The response.
+
+        Returns:
+            The possibly compressed response.
+        """
+        min_size = app.config["COMPRESSION_MIN_SIZE"]
+        if min_size is None:
+            return response
+        return compress_response(response, request.accept_encodings, min_size)
+
+    def begin_request(
+        data: Mapping[str, Any], channel: str
+    ) -> Callable[[], bool] | None:
+        """Register a request's generation within its client session.
+
+        Args:
+            data: Request parameters, optionally with ``session`` and
+                ``generation``.
+            channel: Kind of request; generations of different kinds do not
+                supersede each other.
+
+        Returns:
+            Predicate telling whether a newer request of the session has
+            begun, or None if the request carries no generation.
+
+        Raises:
+            ValueError: If the generation is not an integer.
+        """
+        session = data.get("session")
+        generation = data.get("generation")
+        if session is None or generation is None:
+            return None
+        return generations.begin(f"{channel}:{session}", int(generation))
 
     def validate_and_evaluate_expression(
-        expression: str, x_min: float = -10, x_max: float = 10, num_points: int = 1000
+        expression: str,
+        x_min: float = -10,
+        x_max: float = 10,
+        num_points: int = 1000,
+        sampling: str | None = None,
+        x_log: bool = False,
+        y_log: bool = False,
+        width: int | None = None,
+        cancelled: Callable[[], bool] | None = None,
     ) -> tuple[bool, str | None, np.ndarray | None, np.ndarray | None]:
         """Validate and evaluate a mathematical expression safely.
 
+        Uniform evaluations of more than ``CHUNK_SIZE`` points are done in
+        chunks and reduced to what can be drawn at ``width`` pixels, so
+        memory stays bounded for very large ``num_points``.
+
         Args:
             expression: The mathematical expression to evaluate.
             x_min: Minimum x value for evaluation.
             x_max: Maximum x value for evaluation.
-            num_points: Number of points to evaluate.
+            num_points: Number of points to evaluate. With adaptive sampling
+                this is the maximum number of evaluations.
+            sampling: ``"uniform"`` or ``"adaptive"``; defaults to the
+                ``SAMPLING`` setting.
+            x_log: Whether the x-axis is logarithmic.
+            y_log: Whether the y-axis is logarithmic.
+            width: Plot width in pixels; defaults to ``DECIMATION_WIDTH``.
+            cancelled: Predicate telling whether the request has been
+                superseded; chunked and process evaluations stop early.
 
         Returns:
             Tuple of (is_valid, error_message, x_values, y_values).
+
+        Raises:
+            Cancelled: If ``cancelled`` returns True during evaluation.
         """
-        # Define allowed functions and constants
-        allowed_names = {
-            "x": None,  # Will be replaced with actual x values
-            "pi": np.pi,
-            "e": np.e,
-            "sin": np.sin,
-            "cos": np.cos,
-            "tan": np.tan,
-            "exp": np.exp,
-            "log": np.log,
-            "log10": np.log10,
-            "sqrt": np.sqrt,
-            "abs": np.abs,
-            "pow": np.power,
-            "sinh": np.sinh,
-            "cosh": np.cosh,
-            "tanh": np.tanh,
-            "arcsin": np.arcsin,
-            "arccos": np.arccos,
-            "arctan": np.arctan,
-        }
+        sampling = sampling or app.config["SAMPLING"]
 
         try:
-            # Create x values from x_min to x_max
             if x_min >= x_max:
                 return False, "X minimum must be less than X maximum", None, None
-            x = np.linspace(x_min, x_max, num_points)
-
-            # Replace ** with np.power for safety and x with actual values
-            safe_expression = expression.replace("**", "^")
-
-            # Check for dangerous operations
-            dangerous_ops = ["import", "exec", "eval", "open", "file", "__"]
-            if any(op in expression.lower() for op in dangerous_ops):
-                return False, "Expression contains forbidden operations", None, None
-
-            # Prepare the namespace for evaluation
-            namespace = dict(allowed_names)
-            namespace["x"] = x
+            if sampling not in SAMPLING_MODES:
+                return False, f"Unknown sampling mode: {sampling}", None, None
 
-            # Replace ^ with ** for numpy power operations
-            safe_expression = safe_expression.replace("^", "**")
-
-            # Evaluate the expression
+            # Parsing, validation and compilation are cached per expression
             try:
-                y = eval(safe_expression, {"__builtins__": {}}, namespace)
-
-                # Ensure y is a numpy array
-                if not isinstance(y, np.ndarray):
-                    y = np.full_like(x, y)
+                kernel = expression_cache.compile(expression)
+            except ExpressionError as e:
+                return False, str(e), None, None
+
+            sampling_options = {
+                "num_points": num_points,
+                "sampling": sampling,
+                "max_depth": app.config["ADAPTIVE_MAX_DEPTH"],
+                "tolerance": app.config["ADAPTIVE_TOLERANCE"],
+                "x_log": bool(x_log),
+                "y_log": bool(y_log),
+                "chunk_size": app.config["CHUNK_SIZE"],
+                "width": width or app.config["DECIMATION_WIDTH"],
+            }
+
+            # Evaluate the expression, in a worker process if configured
+            try:
+                if evaluation_pool is not None:
+                    x, y = evaluation_pool.evaluate(
+                        expression,
+                        x_min,
+                        x_max,
+                        cancelled=cancelled,
+                        **sampling_options,
+                    )
+                else:
+                    x, y = sample_expression(
+                        kernel, x_min, x_max, cancelled=cancelled, **sampling_options
+                    )
 
                 return True, None, x, y
 
+            except Cancelled:
+                raise
+            except (ExpressionError, EvaluationTimeout, EvaluationKilled) as e:
+                return False, str(e), None, None
             except Exception as e:
                 return False, f"Error evaluating expression: {str(e)}", None, None
 
+        except Cancelled:
+            raise
         except Exception as e:
             return False, f"Error processing expression: {str(e)}", None, None
 
-    def create_interactive_plot(
-        expression: str,
+    def downsample_for_display(
         x: np.ndarray,
         y: np.ndarray,
-        x_name: str = "x",
-        y_name: str = "y",
-        graph_title: str = "",
+        width: int | None = None,
         x_log: bool = False,
         y_log: bool = False,
-        y_min: float | None = None,
-        y_max: float | None = None,
-    ) -> tuple[str, str]:
-        """Create an interactive Plotly plot.
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Reduce a trace to what can be seen at the plot's width.
 
         Args:
-            expression: The mathematical expression.
             x: X values.
             y: Y values.
-            x_name: Label for x-axis.
-            y_name: Label for y-axis.
-            graph_title: Title for the graph.
-            x_log: Whether to use logarithmic scale for x-axis.
-            y_log: Whether to use logarithmic scale for y-axis.
-            y_min: Minimum y value for plot range.
-            y_max: Maximum y value for plot range.
+            width: Plot width in pixels; defaults to ``DECIMATION_WIDTH``.
+            x_log: Whether the x-axis is logarithmic.
+            y_log: Whether the y-axis is logarithmic.
 
         Returns:
-            Tuple of (plot_html, plot_id).
+            Tuple of downsampled (x_values, y_values).
         """
-        # Create the plot
-        fig = go.Figure()
-
-        # Add the main trace
-        fig.add_trace(
-            go.Scatter(
-                x=x,
-                y=y,
-                mode="lines",
-                name=f"{y_name} = {expression}",
-                line=dict(color="#2196F3", width=2),
-                hovertemplate=f"<b>{x_name}:</b> %{{x}}<br><b>{y_name}:</b> %{{y}}<extra></extra>",
-            )
+        return decimate(
+            x,
+            y,
+            width or app.config["DECIMATION_WIDTH"],
+            method=app.config["DECIMATION_METHOD"],
+            x_log=bool(x_log),
+            y_log=bool(y_log),
         )
 
-        # Set title
-        title = graph_title if graph_title else f"{y_name} = {expression}"
-
-        # Configure layout
-        fig.update_layout(
-            title=dict(text=title, x=0.5, font=dict(size=16, family="Arial")),
-            xaxis_title=x_name,
-            yaxis_title=y_name,
-            font=dict(family="Arial", size=12),
-            plot_bgcolor="white",
-            paper_bgcolor="white",
-            showlegend=False,
-            margin=dict(l=60, r=60, t=60, b=60),
-            height=500,
-        )
-
-        # Set axis types and ranges
-        xaxis_type = "log" if x_log else "linear"
-        yaxis_type = "log" if y_log else "linear"
-
-        fig.update_xaxes(
-            type=xaxis_type,
-            gridcolor="lightgray",
-            gridwidth=1,
-            zeroline=True,
-            zerolinecolor="black",
-            zerolinewidth=1,
-        )
-
-        # Set y-axis range
-        y_range = None
-        if y_min is not None and y_max is not None:
-            y_range = [y_min, y_max]
-        elif y_min is not None or y_max is not None:
-            finite_y = y[np.isfinite(y)]
-            if len(finite_y) > 0:
-                auto_y_min, auto_y_max = np.percentile(finite_y, [5, 95])
-                y_range = [
-                    y_min if y_min is not None else auto_y_min,
-                    y_max if y_max is not None else auto_y_max,
-                ]
-
-        fig.update_yaxes(
-            type=yaxis_type,
-            gridcolor="lightgray",
-            gridwidth=1,
-            zeroline=True,
-            zerolinecolor="black",
-            zerolinewidth=1,
-            range=y_range,
-        )
-
-        # Generate plot HTML and unique ID
-        plot_id = f"plot_{uuid.uuid4().hex}"
-        plot_html = pio.to_html(
-            fig,
-            include_plotlyjs="cdn",
-            div_id=plot_id,
-            config={
-                "displayModeBar": True,
-                "displaylogo": False,
-                "modeBarButtonsToAdd": ["downloadSvg"],
-                "toImageButtonOptions": {
-                    "format": "png",
-                    "filename": "mathviber_plot",
-                    "height": 500,
-                    "width": 800,
-                    "scale": 2,
-                },
-            },
-        )
-
-        return plot_html, plot_id
-
     def create_static_plot_for_download(
         expression: str,
         x: np.ndarray,
@@ -223,6 +447,7 @@ def create_app() -> Flask:
         y_log: bool = False,
         y_min: float | None = None,
         y_max: float | None = None,
+        filename: str = "plot.png",
     ) -> str:
         """Create a static plot for download purposes.
 
@@ -237,66 +462,230 @@ def create_app() -> Flask:
             y_log: Whether to use logarithmic scale for y-axis.
             y_min: Minimum y value for plot range.
             y_max: Maximum y value for plot range.
+            filename: Filename to store the plot under.
 
         Returns:
             The filename of the saved plot.
         """
-        # Create the same plot as interactive but save as static image
-        fig = go.Figure()
-
-        fig.add_trace(
-            go.Scatter(
-                x=x,
-                y=y,
-                mode="lines",
-                name=f"{y_name} = {expression}",
-                line=dict(color="#2196F3", width=2),
-            )
+        fig = build_static_figure(
+            expression,
+            x,
+            y,
+            x_name=x_name,
+            y_name=y_name,
+            graph_title=graph_title,
+            x_log=x_log,
+            y_log=y_log,
+            y_min=y_min,
+            y_max=y_max,
         )
 
-        title = graph_title if graph_title else f"{y_name} = {expression}"
-
-        fig.update_layout(
-            title=dict(text=title, x=0.5, font=dict(size=16)),
-            xaxis_title=x_name,
-            yaxis_title=y_name,
-            font=dict(size=12),
-            plot_bgcolor="white",
-            paper_bgcolor="white",
-            showlegend=False,
-            width=800,
-            height=500,
+        artifact_store.put(
+            filename,
+            lambda path: fig.write_image(
+                path, format="png", width=STATIC_WIDTH, height=STATIC_HEIGHT, scale=2
+            ),
         )
+        return filename
 
-        # Set axis types and ranges (same as interactive plot)
-        xaxis_type = "log" if x_log else "linear"
-        yaxis_type = "log" if y_log else "linear"
-
-        fig.update_xaxes(type=xaxis_type, gridcolor="lightgray", zeroline=True)
-
-        y_range = None
-        if y_min is not None and y_max is not None:
-            y_range = [y_min, y_max]
-        elif y_min is not None or y_max is not None:
-            finite_y = y[np.isfinite(y)]
-            if len(finite_y) > 0:
-                auto_y_min, auto_y_max = np.percentile(finite_y, [5, 95])
-                y_range = [
-                    y_min if y_min is not None else auto_y_min,
-                    y_max if y_max is not None else auto_y_max,
-                ]
-
-        fig.update_yaxes(
-            type=yaxis_type, gridcolor="lightgray", zeroline=True, range=y_range
-        )
+    def schedule_static_plot(
+        expression: str,
+        x_min: float,
+        x_max: float,
+        sampling: str | None = None,
+        num_points: int = 1000,
+        cancelled: Callable[[], bool] | None = None,
+        **plot_options: Any,
+    ) -> str:
+        """Reserve a download filename for a plot, rendering it when needed.
+
+        The filename is a hash of the plot spec, so identical plots share one
+        file. In deferred mode only the plot spec is stored and the PNG is
+        rendered on the first request for it. Otherwise the PNG is rendered
+        right away, unless the request is superseded first or the file
+        already exists.
+
+        Args:
+            expression: The mathematical expression.
+            x_min: Minimum x value for evaluation.
+            x_max: Maximum x value for evaluation.
+            sampling: Sampling mode used to evaluate the expression.
+            num_points: Number of points to evaluate.
+            cancelled: Predicate telling whether the request has been
+                superseded, used when rendering right away.
+            **plot_options: Keyword arguments for
+                ``create_static_plot_for_download``.
+
+        Returns:
+            The filename under which the plot is (or will be) served.
+
+        Raises:
+            Cancelled: If the request is superseded before the render.
+        """
+        spec = {
+            "expression": expression,
+            "x_min": x_min,
+            "x_max": x_max,
+            "sampling": sampling,
+            "num_points": num_points,
+            "plot_options": plot_options,
+        }
+        key = request_cache_key({"version": __version__, **spec})
+        filename = f"plot_{key[:32]}.png"
+
+        if not app.config["DEFERRED_RENDER"] and artifact_store.get(filename) is None:
+            render_plot_spec(filename, spec, cancelled=cancelled)
+
+        # Keep the spec beside the image, so every server sharing the store
+        # can render the plot, even after it is evicted from memory
+        spec_name = plot_spec_name(filename)
+        if artifact_store.get(spec_name) is None:
+
+            def write_spec(path: str) -> None:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(spec, f)
 
-        # Save as PNG
-        filename = f"plot_{uuid.uuid4().hex}.png"
-        filepath = os.path.join(plot_dir, filename)
-        fig.write_image(filepath, width=800, height=500, scale=2)
+            artifact_store.put(spec_name, write_spec)
+
+        with plot_specs_lock:
+            plot_specs[filename] = spec
+            plot_specs.move_to_end(filename)
+            while len(plot_specs) > app.config["PLOT_SPEC_CACHE_SIZE"]:
+                evicted, _ = plot_specs.popitem(last=False)
+                render_locks.pop(evicted, None)
 
         return filename
 
+    def render_plot_spec(
+        filename: str,
+        spec: dict[str, Any],
+        cancelled: Callable[[], bool] | None = None,
+    ) -> None:
+        """Evaluate a stored plot spec and save it as a PNG.
+
+        Args:
+            filename: Filename to save the plot under.
+            spec: Plot spec created by ``schedule_static_plot``.
+            cancelled: Predicate telling whether the requesting client has
+                moved on; the render is dropped if it returns True before
+                Kaleido starts.
+
+        Raises:
+            ValueError: If the expression can no longer be evaluated.
+            RenderQueueFull: If the render pool has no free slot.
+            RenderTimeout: If the render does not finish in time.
+            Cancelled: If the render was dropped.
+        """
+
+        def render() -> None:
+            plot_options = spec["plot_options"]
+            is_valid, error, x_vals, y_vals = validate_and_evaluate_expression(
+                spec["expression"],
+                spec["x_min"],
+                spec["x_max"],
+                num_points=spec["num_points"],
+                sampling=spec["sampling"],
+                x_log=plot_options.get("x_log", False),
+                y_log=plot_options.get("y_log", False),
+                width=1600,
+                cancelled=cancelled,
+            )
+            if not is_valid or x_vals is None or y_vals is None:
+                raise ValueError(error)
+            check_cancelled(cancelled)
+
+            # The PNG is 800 pixels wide at scale 2
+            x_vals, y_vals = downsample_for_display(
+                x_vals,
+                y_vals,
+                width=1600,
+                x_log=plot_options.get("x_log", False),
+                y_log=plot_options.get("y_log", False),
+            )
+
+            create_static_plot_for_download(
+                spec["expression"],
+                x_vals,
+                y_vals,
+                filename=filename,
+                **spec["plot_options"],
+            )
+
+        render_pool.run(render, cancelled=cancelled)
+
+    def render_busy_response() -> tuple[str, int, dict[str, str]]:
+        """Build the response returned when the render queue is full.
+
+        Returns:
+            Tuple of (body, status, headers) for a 503 response.
+        """
+        return (
+            "Plot renderer is busy, please retry",
+            503,
+            {"Retry-After": str(app.config["RENDER_RETRY_AFTER"])},
+        )
+
+    def load_plot_spec(filename: str) -> dict[str, Any] | None:
+        """Read the spec of a plot from the artifact store.
+
+        Args:
+            filename: The filename of the plot image.
+
+        Returns:
+            The plot spec, or None if it is not stored.
+        """
+        spec_path = artifact_store.get(plot_spec_name(filename))
+        if spec_path is None:
+            return None
+        try:
+            with open(spec_path, encoding="utf-8") as f:
+                spec: dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            # Evicted between the lookup and the read
+            return None
+        return spec
+
+    def resolve_plot_file(filename: str) -> str | None:
+        """Return the path of a plot image, rendering it on demand.
+
+        Plots not yet rendered, or evicted from the artifact store since,
+        are rendered from their spec, kept in memory or, for plots scheduled
+        by another server or evicted from memory, in the store. The file is
+        kept in the store, so later requests are served from disk.
+
+        Args:
+            filename: The filename of the plot image.
+
+        Returns:
+            Path of the plot image, or None if the plot is unknown.
+        """
+        filepath = artifact_store.get(filename)
+        if filepath is not None:
+            return filepath
+
+        with plot_specs_lock:
+            spec = plot_specs.get(filename)
+        if spec is None:
+            spec = load_plot_spec(filename)
+            if spec is None:
+                return None
+        with plot_specs_lock:
+            lock = render_locks.setdefault(filename, threading.Lock())
+
+        # Serialize renders of the same plot so concurrent first hits only
+        # rasterize it once
+        try:
+            with lock:
+                filepath = artifact_store.get(filename)
+                if filepath is None:
+                    render_plot_spec(filename, spec)
+                    filepath = artifact_store.get(filename)
+        finally:
+            with plot_specs_lock:
+                render_locks.pop(filename, None)
+
+        return filepath
+
     @app.route("/", methods=["GET", "POST"])
     def home() -> str:
         """Home page route with mathematical expression handling.
@@ -334,16 +723,23 @@ def create_app() -> Flask:
 
                     # Validate and evaluate the expression
                     is_valid, error, x_vals, y_vals = validate_and_evaluate_expression(
-                        submitted_text, x_min, x_max
+                        submitted_text, x_min, x_max, x_log=x_log, y_log=y_log
                     )
 
                     if is_valid and x_vals is not None and y_vals is not None:
+                        x_vals, y_vals = downsample_for_display(
+                            x_vals, y_vals, x_log=x_log, y_log=y_log
+                        )
+
                         # Create interactive plot
                         try:
+                            # Plotly.js is loaded by the page itself
                             plot_html, plot_id = create_interactive_plot(
                                 submitted_text,
                                 x_vals,
                                 y_vals,
+                                include_plotlyjs=False,
+                                encoding=page_array_encoding(),
                                 x_name=x_name,
                                 y_name=y_name,
                                 graph_title=graph_title,
@@ -352,11 +748,11 @@ def create_app() -> Flask:
                                 y_min=y_min,
                                 y_max=y_max,
                             )
-                            # Also create static plot for download
-                            plot_filename = create_static_plot_for_download(
+                            # Also register static plot for download
+                            plot_filename = schedule_static_plot(
                                 submitted_text,
-                                x_vals,
-                                y_vals,
+                                x_min,
+                                x_max,
                                 x_name=x_name,
                                 y_name=y_name,
                                 graph_title=graph_title,
@@ -379,6 +775,7 @@ def create_app() -> Flask:
 
         return render_template(
             "index.html",
+            array_encoding=page_array_encoding(),
             submitted_text=submitted_text,
             error_message=error_message,
             plot_filename=plot_filename,
@@ -386,8 +783,97 @@ def create_app() -> Flask:
             plot_id=plot_id if "plot_id" in locals() else None,
         )
 
+    def send_plot_file(filename: str, **send_options: Any) -> ResponseReturnValue:
+        """Serve a plot image with HTTP caching.
+
+        The filename is a hash of the plot spec, so its content never
+        changes. It doubles as a strong ETag, and responses may be cached
+        for ``PLOT_MAX_AGE`` seconds without revalidation. A matching
+        ``If-None-Match`` is answered with 304 before the file is looked up,
+        even if it has since been evicted, and ``Range`` requests are served
+        with 206.
+
+        Args:
+            filename: The filename of the plot image.
+            **send_options: Keyword arguments for ``send_file``.
+
+        Returns:
+            The plot image response.
+        """
+        if PLOT_FILENAME.fullmatch(filename) is None:
+            return "Plot not found", 404
+        etag = filename.removesuffix(".png")
+
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return cache_immutably(response, app.config["PLOT_MAX_AGE"])
+
+        # A sweep may evict the file between its lookup and opening it, in
+        # which case it is rendered again, once
+        for _ in range(2):
+            try:
+                filepath = resolve_plot_file(filename)
+            except RenderQueueFull:
+                return render_busy_response()
+            except RenderTimeout as e:
+                return str(e), 504
+            except Exception as e:
+                return f"Error rendering plot: {str(e)}", 500
+
+            if filepath is None:
+                break
+
+            try:
+                response = send_file(
+                    filepath,
+                    mimetype="image/png",
+                    etag=etag,
+                    max_age=app.config["PLOT_MAX_AGE"],
+                    conditional=True,
+                    **send_options,
+                )
+            except FileNotFoundError:
+                continue
+            return cache_immutably(response, app.config["PLOT_MAX_AGE"])
+
+        return "Plot not found", 404
+
+    @app.route("/assets/<fingerprint>/<filename>")
+    def static_asset(fingerprint: str, filename: str) -> ResponseReturnValue:
+        """Serve a static asset of the page, compressed if accepted.
+
+        Assets are only served under their current fingerprint, so a cached
+        URL never refers to different content.
+
+        Args:
+            fingerprint: Content hash of the asset.
+            filename: File name within the static directory.
+
+        Returns:
+            The asset, or a 404 response if the fingerprint is stale.
+        """
+        try:
+            current = asset_fingerprint(filename)
+        except FileNotFoundError:
+            current = None
+        if fingerprint != current:
+            return "Asset not found", 404
+
+        encoding = negotiate_encoding(request.accept_encodings)
+        response = app.response_class(
+            asset_content(filename, fingerprint, encoding),
+            mimetype=asset_mimetype(filename),
+        )
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.set_etag(f"{fingerprint}-{encoding or 'identity'}")
+        cache_immutably(response, app.config["ASSET_MAX_AGE"])
+        return response.make_conditional(request)
+
     @app.route("/plot/<filename>")
-    def plot_image(filename: str):
+    def plot_image(filename: str) -> ResponseReturnValue:
         """Serve plot image files.
 
         Args:
@@ -396,14 +882,10 @@ def create_app() -> Flask:
         Returns:
             The plot image file.
         """
-        filepath = os.path.join(plot_dir, filename)
-        if os.path.exists(filepath):
-            return send_file(filepath, mimetype="image/png")
-        else:
-            return "Plot not found", 404
+        return send_plot_file(filename)
 
     @app.route("/download/<filename>")
-    def download_plot(filename: str):
+    def download_plot(filename: str) -> ResponseReturnValue:
         """Download plot image files.
 
         Args:
@@ -412,21 +894,18 @@ def create_app() -> Flask:
         Returns:
             The plot image file as download.
         """
-        filepath = os.path.join(plot_dir, filename)
-        if os.path.exists(filepath):
-            return send_file(
-                filepath,
-                mimetype="image/png",
-                as_attachment=True,
-                download_name="mathviber_plot.png",
-            )
-        else:
-            return "Plot not found", 404
+        return send_plot_file(
+            filename, as_attachment=True, download_name="mathviber_plot.png"
+        )
 
     @app.route("/api/update_plot", methods=["POST"])
-    def update_plot():
+    def update_plot() -> ResponseReturnValue:
         """API endpoint for real-time plot updates.
 
+        Requests may carry a client ``session`` and an increasing
+        ``generation``; once a newer request of the session arrives, work on
+        older ones is stopped and they are answered with ``superseded``.
+
         Returns:
             JSON response with plot HTML or error message.
         """
@@ -453,62 +932,600 @@ def create_app() -> Flask:
             x_log = data.get("x_log", False)
             y_log = data.get("y_log", False)
 
+            # "html" returns an embeddable plot, "json" a figure spec for
+            # Plotly.react
+            response_format = data.get("format", "html")
+            if response_format not in ("html", "json"):
+                return jsonify({"error": f"Unknown format: {response_format}"})
+
+            sampling = data.get("sampling") or app.config["SAMPLING"]
+
+            # Dense evaluations are downsampled to the plot width before
+            # plotting, so the payload size does not grow with num_points
+            num_points = int(data.get("num_points", 1000))
+            if not 3 <= num_points <= app.config["MAX_POINTS"]:
+                return jsonify(
+                    {
+                        "error": "Number of points must be between 3 and "
+                        f"{app.config['MAX_POINTS']}"
+                    }
+                )
+            width = int(data.get("width") or app.config["DECIMATION_WIDTH"])
+            if not 1 <= width <= 10000:
+                return jsonify({"error": "Width must be between 1 and 10000"})
+
+            # Arrays of "json" responses are sent as text or typed arrays
+            encoding = data.get("encoding", "text")
+            if encoding not in ARRAY_ENCODINGS:
+                return jsonify({"error": f"Unknown encoding: {encoding}"})
+
+            cancelled = begin_request(data, "plot")
+
+            plot_options = {
+                "x_name": x_name,
+                "y_name": y_name,
+                "graph_title": graph_title,
+                "x_log": x_log,
+                "y_log": y_log,
+                "y_min": y_min,
+                "y_max": y_max,
+            }
+
+            # Identical requests are answered from the cache without
+            # evaluating or plotting anything
+            cache_key = request_cache_key(
+                {
+                    "expression": normalize_expression(expression),
+                    "x_min": x_min,
+                    "x_max": x_max,
+                    "format": response_format,
+                    "encoding": encoding,
+                    "sampling": sampling,
+                    "num_points": num_points,
+                    "width": width,
+                    **plot_options,
+                }
+            )
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                # Only successful plots are cached. Their download spec may
+                # have been evicted since, so make sure it can still be served
+                schedule_static_plot(
+                    expression,
+                    x_min,
+                    x_max,
+                    sampling=sampling,
+                    num_points=num_points,
+                    **plot_options,
+                )
+                return app.response_class(
+                    cached, mimetype="application/json", headers={"X-Cache": "HIT"}
+                )
+
             # Validate and evaluate the expression
             is_valid, error, x_vals, y_vals = validate_and_evaluate_expression(
-                expression, x_min, x_max
+                expression,
+                x_min,
+                x_max,
+                num_points=num_points,
+                sampling=sampling,
+                x_log=x_log,
+                y_log=y_log,
+                width=width,
+                cancelled=cancelled,
             )
 
             if is_valid and x_vals is not None and y_vals is not None:
-                # Create interactive plot
-                plot_html, plot_id = create_interactive_plot(
+                # Building the figure is wasted if the client has moved on
+                check_cancelled(cancelled)
+                x_vals, y_vals = downsample_for_display(
+                    x_vals, y_vals, width=width, x_log=x_log, y_log=y_log
+                )
+
+                payload: dict[str, Any] = {"success": True}
+                if response_format == "json":
+                    payload["figure"] = create_figure_json(
+                        expression, x_vals, y_vals, encoding=encoding, **plot_options
+                    )
+                    payload["config"] = PLOT_CONFIG
+                else:
+                    # Create interactive plot
+                    plot_html, plot_id = create_interactive_plot(
+                        expression,
+                        x_vals,
+                        y_vals,
+                        encoding=page_array_encoding(),
+                        **plot_options,
+                    )
+                    payload["plot_html"] = plot_html
+                    payload["plot_id"] = plot_id
+                    # The fragment needs Plotly.js, which embedders load from here
+                    payload["plotlyjs_url"] = asset_url("plotly.min.js")
+
+                # Register static plot for download
+                payload["plot_filename"] = schedule_static_plot(
                     expression,
-                    x_vals,
-                    y_vals,
-                    x_name=x_name,
-                    y_name=y_name,
-                    graph_title=graph_title,
-                    x_log=x_log,
-                    y_log=y_log,
-                    y_min=y_min,
-                    y_max=y_max,
+                    x_min,
+                    x_max,
+                    sampling=sampling,
+                    num_points=num_points,
+                    cancelled=cancelled,
+                    **plot_options,
+                )
+
+                body = app.json.dumps(payload).encode()
+                result_cache.set(cache_key, body)
+                return app.response_class(
+                    body, mimetype="application/json", headers={"X-Cache": "MISS"}
+                )
+            else:
+                return jsonify({"error": error})
+
+        except Cancelled:
+            return jsonify({"error": SUPERSEDED_MESSAGE, "superseded": True})
+        except RenderQueueFull:
+            message, status, headers = render_busy_response()
+            return jsonify({"error": message}), status, headers
+        except ValueError as e:
+            return jsonify({"error": f"Invalid numeric input: {str(e)}"})
+        except Exception as e:
+            return jsonify({"error": f"Error processing request: {str(e)}"})
+
+    @app.route("/api/stream_plot", methods=["POST"])
+    def stream_plot() -> Response:
+        """API endpoint sending a plot progressively as NDJSON.
+
+        The response is a stream of JSON messages, one per line:
+
+        - ``preview``: a figure spec for ``Plotly.react`` with a coarse
+          preview trace and an empty main trace;
+        - ``chunk``: x and y arrays to append to the main trace with
+          ``Plotly.extendTraces``, in ascending x order;
+        - ``done``: the number of points sent and the download filename;
+        - ``error``: an error message, after which the stream ends; it is
+          flagged ``superseded`` when a newer request of the same
+          ``session`` (see ``/api/update_plot``) stopped the stream.
+
+        Uniform grids are evaluated block by block, so the first blocks
+        arrive while the rest is still being computed. Adaptive sampling
+        and the process backend send the refined trace as a single chunk.
+
+        Returns:
+            Streaming NDJSON response.
+        """
+
+        def message(**fields: Any) -> bytes:
+            return app.json.dumps(fields).encode() + b"\n"
+
+        def error_response(error: str, **fields: Any) -> Response:
+            return app.response_class(
+                message(type="error", error=error, **fields),
+                mimetype="application/x-ndjson",
+            )
+
+        try:
+            data = request.get_json()
+            expression = data.get("expression", "").strip()
+
+            if not expression:
+                return error_response("No expression provided")
+
+            # Get plotting parameters
+            x_min = float(data.get("x_min", -10))
+            x_max = float(data.get("x_max", 10))
+
+            y_min_str = data.get("y_min", "")
+            y_max_str = data.get("y_max", "")
+            y_min = float(y_min_str) if y_min_str else None
+            y_max = float(y_max_str) if y_max_str else None
+
+            sampling = data.get("sampling") or app.config["SAMPLING"]
+            num_points = int(data.get("num_points", 1000))
+            if not 3 <= num_points <= app.config["MAX_POINTS"]:
+                return error_response(
+                    f"Number of points must be between 3 and {app.config['MAX_POINTS']}"
                 )
+            width = int(data.get("width") or app.config["DECIMATION_WIDTH"])
+            if not 1 <= width <= 10000:
+                return error_response("Width must be between 1 and 10000")
+
+            encoding = data.get("encoding", "text")
+            if encoding not in ARRAY_ENCODINGS:
+                return error_response(f"Unknown encoding: {encoding}")
+
+            plot_options = {
+                "x_name": data.get("x_name", "x") or "x",
+                "y_name": data.get("y_name", "y") or "y",
+                "graph_title": data.get("graph_title", ""),
+                "x_log": bool(data.get("x_log", False)),
+                "y_log": bool(data.get("y_log", False)),
+                "y_min": y_min,
+                "y_max": y_max,
+            }
+            x_log, y_log = plot_options["x_log"], plot_options["y_log"]
+            cancelled = begin_request(data, "plot")
+
+            # A few hundred uniform samples are cheap and show the curve's
+            # shape right away
+            is_valid, error, x_vals, y_vals = validate_and_evaluate_expression(
+                expression,
+                x_min,
+                x_max,
+                num_points=min(app.config["STREAM_PREVIEW_POINTS"], num_points),
+                sampling="uniform",
+                x_log=x_log,
+                y_log=y_log,
+                width=width,
+                cancelled=cancelled,
+            )
+            if not is_valid or x_vals is None or y_vals is None:
+                return error_response(error or "Error evaluating expression")
+        except Cancelled:
+            return error_response(SUPERSEDED_MESSAGE, superseded=True)
+        except ValueError as e:
+            return error_response(f"Invalid numeric input: {str(e)}")
+        except Exception as e:
+            return error_response(f"Error processing request: {str(e)}")
 
-                # Create static plot for download
-                plot_filename = create_static_plot_for_download(
+        figure = create_figure_json(
+            expression, x_vals, y_vals, encoding=encoding, **plot_options
+        )
+        main = figure["data"][0]
+        preview = {
+            **main,
+            "name": "preview",
+            "line": {"color": "#90CAF9", "width": 2, "dash": "dot"},
+            "hoverinfo": "skip",
+        }
+        preview.pop("hovertemplate", None)
+        main["x"] = []
+        main["y"] = []
+        figure["data"] = [main, preview]
+
+        def generate() -> Iterator[bytes]:
+            yield message(type="preview", figure=figure, config=PLOT_CONFIG)
+
+            points = 0
+            try:
+                if sampling == "uniform" and evaluation_pool is None:
+                    chunks = iter_display_chunks(
+                        expression_cache.compile(expression),
+                        x_min,
+                        x_max,
+                        num_points,
+                        width,
+                        x_log=x_log,
+                        y_log=y_log,
+                        chunk_size=app.config["STREAM_CHUNK_SIZE"],
+                        cancelled=cancelled,
+                    )
+                else:
+                    is_valid, error, x_all, y_all = validate_and_evaluate_expression(
+                        expression,
+                        x_min,
+                        x_max,
+                        num_points=num_points,
+                        sampling=sampling,
+                        x_log=x_log,
+                        y_log=y_log,
+                        width=width,
+                        cancelled=cancelled,
+                    )
+                    if not is_valid or x_all is None or y_all is None:
+                        yield message(type="error", error=error)
+                        return
+                    chunks = iter(
+                        [
+                            downsample_for_display(
+                                x_all, y_all, width=width, x_log=x_log, y_log=y_log
+                            )
+                        ]
+                    )
+
+                # A client that disconnects stops this loop, and with it the
+                # evaluation of the remaining blocks
+                for x, y in chunks:
+                    points += x.size
+                    yield message(
+                        type="chunk",
+                        x=encode_trace_array(x, encoding),
+                        y=encode_trace_array(y, encoding),
+                    )
+            except Cancelled:
+                yield message(type="error", error=SUPERSEDED_MESSAGE, superseded=True)
+                return
+            except Exception as e:
+                yield message(
+                    type="error", error=f"Error evaluating expression: {str(e)}"
+                )
+                return
+
+            try:
+                plot_filename: str | None = schedule_static_plot(
                     expression,
-                    x_vals,
-                    y_vals,
-                    x_name=x_name,
-                    y_name=y_name,
-                    graph_title=graph_title,
-                    x_log=x_log,
-                    y_log=y_log,
-                    y_min=y_min,
-                    y_max=y_max,
+                    x_min,
+                    x_max,
+                    sampling=sampling,
+                    num_points=num_points,
+                    **plot_options,
                 )
+            except Exception:
+                # The plot is shown; only the download is unavailable
+                plot_filename = None
+            yield message(type="done", points=points, plot_filename=plot_filename)
+
+        return app.response_class(
+            generate(),
+            mimetype="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.route("/api/batch_plot", methods=["POST"])
+    def batch_plot() -> Response:
+        """API endpoint plotting many expressions in one figure.
 
+        All expressions are evaluated on one shared uniform x grid, in a
+        worker process when ``EVALUATION_BACKEND`` is ``"process"``, and
+        returned as one multi-trace figure spec for ``Plotly.react``.
+        Expressions that fail are listed in ``errors`` and left out of the
+        figure, without failing the batch.
+
+        Returns:
+            JSON response with the figure and per-expression errors, or an
+            error message.
+        """
+        try:
+            data = request.get_json()
+            expressions = data.get("expressions")
+
+            if not isinstance(expressions, list) or not all(
+                isinstance(expression, str) for expression in expressions
+            ):
+                return jsonify({"error": "Expressions must be a list of strings"})
+            expressions = [expression.strip() for expression in expressions]
+            if not any(expressions):
+                return jsonify({"error": "No expression provided"})
+            if len(expressions) > app.config["MAX_BATCH_SIZE"]:
                 return jsonify(
                     {
-                        "success": True,
-                        "plot_html": plot_html,
-                        "plot_id": plot_id,
-                        "plot_filename": plot_filename,
+                        "error": "At most "
+                        f"{app.config['MAX_BATCH_SIZE']} expressions per batch"
                     }
                 )
-            else:
+
+            # Get plotting parameters
+            x_min = float(data.get("x_min", -10))
+            x_max = float(data.get("x_max", 10))
+            if x_min >= x_max:
+                return jsonify({"error": "X minimum must be less than X maximum"})
+
+            y_min_str = data.get("y_min", "")
+            y_max_str = data.get("y_max", "")
+            y_min = float(y_min_str) if y_min_str else None
+            y_max = float(y_max_str) if y_max_str else None
+
+            num_points = int(data.get("num_points", 1000))
+            if not 3 <= num_points <= app.config["MAX_POINTS"]:
+                return jsonify(
+                    {
+                        "error": "Number of points must be between 3 and "
+                        f"{app.config['MAX_POINTS']}"
+                    }
+                )
+            if len(expressions) * num_points > app.config["MAX_BATCH_POINTS"]:
+                return jsonify(
+                    {
+                        "error": "At most "
+                        f"{app.config['MAX_BATCH_POINTS']} points per batch"
+                    }
+                )
+            width = int(data.get("width") or app.config["DECIMATION_WIDTH"])
+            if not 1 <= width <= 10000:
+                return jsonify({"error": "Width must be between 1 and 10000"})
+
+            encoding = data.get("encoding", "text")
+            if encoding not in ARRAY_ENCODINGS:
+                return jsonify({"error": f"Unknown encoding: {encoding}"})
+
+            plot_options = {
+                "x_name": data.get("x_name", "x") or "x",
+                "y_name": data.get("y_name", "y") or "y",
+                "graph_title": data.get("graph_title", ""),
+                "x_log": bool(data.get("x_log", False)),
+                "y_log": bool(data.get("y_log", False)),
+                "y_min": y_min,
+                "y_max": y_max,
+            }
+
+            cache_key = request_cache_key(
+                {
+                    "endpoint": "batch",
+                    "expressions": [normalize_expression(e) for e in expressions],
+                    "x_min": x_min,
+                    "x_max": x_max,
+                    "num_points": num_points,
+                    "width": width,
+                    "encoding": encoding,
+                    **plot_options,
+                }
+            )
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return app.response_class(
+                    cached, mimetype="application/json", headers={"X-Cache": "HIT"}
+                )
+
+            batch_options = {
+                "width": width,
+                "method": app.config["DECIMATION_METHOD"],
+                "x_log": plot_options["x_log"],
+                "y_log": plot_options["y_log"],
+            }
+            # Evaluate the batch, in a worker process if configured
+            try:
+                if evaluation_pool is not None:
+                    sampled, errors = evaluation_pool.evaluate_batch(
+                        expressions, x_min, x_max, num_points, **batch_options
+                    )
+                else:
+                    sampled, errors = sample_batch(
+                        expressions,
+                        x_min,
+                        x_max,
+                        num_points,
+                        cache=subexpression_cache,
+                        **batch_options,
+                    )
+            except (ExpressionError, EvaluationTimeout, EvaluationKilled) as e:
+                return jsonify({"error": str(e)})
+
+            curves = []
+            failures = []
+            for index, (expression, curve, error) in enumerate(
+                zip(expressions, sampled, errors, strict=True)
+            ):
+                if curve is None:
+                    failures.append(
+                        {"index": index, "expression": expression, "error": error}
+                    )
+                    continue
+                curves.append((expression, *curve))
+
+            if not curves:
+                return jsonify(
+                    {"error": "No expression could be evaluated", "errors": failures}
+                )
+
+            figure = encode_figure(batch_figure_spec(curves, **plot_options), encoding)
+
+            body = app.json.dumps(
+                {
+                    "success": True,
+                    "figure": figure,
+                    "config": PLOT_CONFIG,
+                    "errors": failures,
+                }
+            ).encode()
+            result_cache.set(cache_key, body)
+            return app.response_class(
+                body, mimetype="application/json", headers={"X-Cache": "MISS"}
+            )
+
+        except ValueError as e:
+            return jsonify({"error": f"Invalid numeric input: {str(e)}"})
+        except Exception as e:
+            return jsonify({"error": f"Error processing request: {str(e)}"})
+
+    @app.route("/api/viewport", methods=["POST"])
+    def viewport() -> Response:
+        """API endpoint re-sampling an expression for a zoomed x range.
+
+        Only fresh trace data for the visible window is returned, sampled at
+        screen resolution, so zooming reveals new detail instead of
+        interpolating the initial samples.
+
+        Returns:
+            JSON response with x and y arrays or error message.
+        """
+        try:
+            data = request.get_json()
+            expression = data.get("expression", "").strip()
+
+            if not expression:
+                return jsonify({"error": "No expression provided"})
+
+            x_min = float(data.get("x_min", -10))
+            x_max = float(data.get("x_max", 10))
+            width = int(data.get("width") or app.config["DECIMATION_WIDTH"])
+            if not 1 <= width <= 10000:
+                return jsonify({"error": "Width must be between 1 and 10000"})
+
+            sampling = data.get("sampling") or app.config["SAMPLING"]
+            encoding = data.get("encoding", "text")
+            if encoding not in ARRAY_ENCODINGS:
+                return jsonify({"error": f"Unknown encoding: {encoding}"})
+            x_log = bool(data.get("x_log", False))
+            y_log = bool(data.get("y_log", False))
+
+            # Zooms supersede earlier zooms, not plot updates
+            cancelled = begin_request(data, "viewport")
+
+            cache_key = request_cache_key(
+                {
+                    "endpoint": "viewport",
+                    "expression": normalize_expression(expression),
+                    "x_min": x_min,
+                    "x_max": x_max,
+                    "width": width,
+                    "sampling": sampling,
+                    "encoding": encoding,
+                    "x_log": x_log,
+                    "y_log": y_log,
+                }
+            )
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return app.response_class(
+                    cached, mimetype="application/json", headers={"X-Cache": "HIT"}
+                )
+
+            # A few samples per pixel column are enough for the visible window
+            is_valid, error, x_vals, y_vals = validate_and_evaluate_expression(
+                expression,
+                x_min,
+                x_max,
+                num_points=min(4 * width, app.config["MAX_POINTS"]),
+                sampling=sampling,
+                x_log=x_log,
+                y_log=y_log,
+                width=width,
+                cancelled=cancelled,
+            )
+            if not is_valid or x_vals is None or y_vals is None:
                 return jsonify({"error": error})
 
+            x_vals, y_vals = downsample_for_display(
+                x_vals, y_vals, width=width, x_log=x_log, y_log=y_log
+            )
+            body = app.json.dumps(
+                {
+                    "success": True,
+                    "x": encode_trace_array(x_vals, encoding),
+                    "y": encode_trace_array(y_vals, encoding),
+                }
+            ).encode()
+            result_cache.set(cache_key, body)
+            return app.response_class(
+                body, mimetype="application/json", headers={"X-Cache": "MISS"}
+            )
+
+        except Cancelled:
+            return jsonify({"error": SUPERSEDED_MESSAGE, "superseded": True})
         except ValueError as e:
             return jsonify({"error": f"Invalid numeric input: {str(e)}"})
         except Exception as e:
             return jsonify({"error": f"Error processing request: {str(e)}"})
 
-    # Cleanup function for temporary files (optional)
-    @app.teardown_appcontext
-    def cleanup_temp_files(error):
-        """Clean up temporary files when app context ends."""
-        # This is a basic cleanup - in production you might want more sophisticated cleanup
-        pass
+    @app.route("/api/stats")
+    def stats() -> Response:
+        """API endpoint exposing runtime counters.
+
+        Returns:
+            JSON response with render pool and cache statistics.
+        """
+        return jsonify(
+            {
+                "render_pool": render_pool.stats(),
+                "expression_cache": expression_cache.stats(),
+                "result_cache": result_cache.stats(),
+                "subexpression_cache": subexpression_cache.stats(),
+                "generations": generations.stats(),
+                "artifacts": artifact_store.stats(),
+                "evaluation_pool": (
+                    evaluation_pool.stats() if evaluation_pool is not None else None
+                ),
+            }
+        )
 
     return app
 
@@ -0,0 +1,326 @@
+"""Storage of rendered plot files.
+
+Files are named by the hash of the parameters they were rendered from, so
+identical plots share one file. The store evicts the least recently used
+files when it grows beyond its size limit or files go unused for too long.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import Any
+
+# Suffix of files being written; they are renamed into place when complete
+PARTIAL_SUFFIX = ".tmp"
+
+# Names of the files kept by the app: plot images and their specs
+ARTIFACT_NAME = re.compile(r"plot_[0-9a-f]+\.(?:png|json)")
+
+
+class ArtifactStore(ABC):
+    """Interface for plot file storage.
+
+    Implement this to keep plot files elsewhere and pass an instance as
+    ``ARTIFACT_STORE``.
+    """
+
+    @abstractmethod
+    def get(self, name: str) -> str | None:
+        """Return the local path of a stored file, marking it as used.
+
+        Args:
+            name: File name.
+
+        Returns:
+            The path, or None if the file is not stored.
+        """
+
+    @abstractmethod
+    def put(self, name: str, write: Callable[[str], None]) -> str:
+        """Store a file.
+
+        Args:
+            name: File name.
+            write: Called with a path to write the file's content to.
+
+        Returns:
+            The path of the stored file.
+        """
+
+    @abstractmethod
+    def start(self) -> None:
+        """Start background maintenance, if the store needs any."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Stop background maintenance and release resources."""
+
+    def stats(self) -> dict[str, Any]:
+        """Return store statistics.
+
+        Returns:
+            Dictionary of store specific counters.
+        """
+        return {}
+
+
+class DirectoryStore(ArtifactStore):
+    """Plot files in a directory on local disk or a shared volume.
+
+    The modification time of each file records its last use, so several
+    processes, or several hosts sharing a volume, can serve and evict files
+    in the same directory. Files are written under a temporary name and
+    renamed into place, so a partially written file is never served.
+
+    On startup the directory is swept: files left by earlier runs are kept
+    for reuse within the limits, and partial files abandoned by a crash are
+    removed. A background thread repeats the sweep periodically. Only files
+    whose names match the store's name pattern are stored, counted or
+    removed; anything else in the directory is left alone.
+    """
+
+    # Partial files older than this many seconds are considered abandoned
+    partial_max_age = 300.0
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        max_bytes: int | None = 256 * 2**20,
+        max_age: float | None = 3600.0,
+        sweep_interval: float = 60.0,
+        name_pattern: re.Pattern[str] = ARTIFACT_NAME,
+    ) -> None:
+        """Initialize the store and recover files left in its directory.
+
+        Args:
+            directory: Directory to keep files in; created if missing. With
+                None, a private temporary directory is created and removed
+                again by ``close``.
+            max_bytes: Total size of files above which the least recently
+                used ones are evicted, or None for no limit.
+            max_age: Seconds after their last use at which files are
+                evicted, or None to keep them.
+            sweep_interval: Seconds between background sweeps.
+            name_pattern: Pattern the names of stored files must match.
+        """
+        self.owned = directory is None
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="mathviber_plots_")
+        else:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.name_pattern = name_pattern
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._bytes = 0
+        self._files = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        self.sweep()
+
+    def path(self, name: str) -> str:
+        """Return the path a file is stored under.
+
+        Args:
+            name: File name.
+
+        Returns:
+            Path within the store's directory.
+
+        Raises:
+            ValueError: If the name is not a plain file name matching the
+                store's name pattern.
+        """
+        if (
+            os.path.basename(name) != name
+            or name.startswith(".")
+            or name.endswith(PARTIAL_SUFFIX)
+            or self.name_pattern.fullmatch(name) is None
+        ):
+            raise ValueError(f"Invalid artifact name: {name!r}")
+        return os.path.join(self.directory, name)
+
+    def get(self, name: str) -> str | None:
+        """Return the path of a stored file, marking it as used.
+
+        Args:
+            name: File name.
+
+        Returns:
+            The path, or None if the file is not stored or the name is
+            invalid.
+        """
+        try:
+            path = self.path(name)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, name: str, write: Callable[[str], None]) -> str:
+        """Store a file, evicting others if the store is over its size limit.
+
+        Args:
+            name: File name.
+            write: Called with a temporary path to write the file's content
+                to; the file is renamed into place once ``write`` returns.
+
+        Returns:
+            The path of the stored file.
+
+        Raises:
+            ValueError: If the name is not a valid artifact name.
+        """
+        path = self.path(name)
+        partial_path = f"{path}.{uuid.uuid4().hex}{PARTIAL_SUFFIX}"
+        try:
+            write(partial_path)
+            size = os.path.getsize(partial_path)
+            os.replace(partial_path, path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        with self._lock:
+            self._bytes += size
+            self._files += 1
+            over_limit = self.max_bytes is not None and self._bytes > self.max_bytes
+        if over_limit:
+            self.sweep()
+        return path
+
+    def sweep(self) -> int:
+        """Evict expired and least recently used files.
+
+        Removes abandoned partial files and files unused for longer than
+        ``max_age``, then the least recently used files until the rest fit
+        in ``max_bytes``. Files not named like the store's are ignored.
+
+        Returns:
+            Number of files removed.
+        """
+        now = time.time()
+        files = []
+        removed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                age = now - stat.st_mtime
+                if self._is_partial(entry.name):
+                    if age > self.partial_max_age:
+                        removed += self._remove(entry.path)
+                elif self.name_pattern.fullmatch(entry.name) is None:
+                    continue
+                elif self.max_age is not None and age > self.max_age:
+                    removed += self._remove(entry.path)
+                else:
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        if self.max_bytes is not None and total > self.max_bytes:
+            files.sort()
+            while files and total > self.max_bytes:
+                _, size, path = files.pop(0)
+                total -= size
+                removed += self._remove(path)
+
+        with self._lock:
+            self._bytes = total
+            self._files = len(files)
+            self.evicted += removed
+        return removed
+
+    def _is_partial(self, name: str) -> bool:
+        """Tell whether a file name is that of a file being written.
+
+        Args:
+            name: File name.
+
+        Returns:
+            True for the partial file of a name matching the pattern.
+        """
+        if not name.endswith(PARTIAL_SUFFIX):
+            return False
+        target = name.removesuffix(PARTIAL_SUFFIX).rpartition(".")[0]
+        return self.name_pattern.fullmatch(target) is not None
+
+    def _remove(self, path: str) -> int:
+        """Remove a file, which another process may have removed already.
+
+        Args:
+            path: Path of the file.
+
+        Returns:
+            1 if this call removed the file, 0 otherwise.
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        return 1
+
+    def _run(self) -> None:
+        """Sweep periodically until the store is closed."""
+        while not self._stopped.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except OSError:
+                # The directory may be briefly unavailable on a shared
+                # volume; try again at the next interval
+                pass
+
+    def start(self) -> None:
+        """Start the background sweeper thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="mathviber-artifact-sweeper", daemon=True
+            )
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop the sweeper and remove the directory if the store created it."""
+        self._stopped.set()
+        if self.owned:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def stats(self) -> dict[str, Any]:
+        """Return store size, limits and counters.
+
+        Returns:
+            Dictionary with the directory, limits, size as of the last sweep
+            plus files added since, hits, misses and evictions.
+        """
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+                "bytes": self._bytes,
+                "files": self._files,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted": self.evicted,
+            }
@@ -0,0 +1,180 @@
+"""Fingerprinted static assets of the web page.
+
+Asset URLs contain a hash of the file's content, so they change whenever the
+file does and can be cached by browsers and CDNs without revalidation.
+
+Plotly.js is served from ``static/plotly.min.js`` if it exists, such as a
+partial bundle made by ``scripts/build_plotlyjs.py``, and otherwise from the
+full bundle shipped with the plotly package. Either way the page works
+without access to a CDN.
+"""
+
+import functools
+import hashlib
+import importlib.util
+import mimetypes
+import os
+import re
+
+from mathviber.compression import compress, decompress
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+
+# Assets taken from installed packages unless the static directory has them,
+# as (package, path within the package)
+VENDORED_ASSETS = {"plotly.min.js": ("plotly", "package_data/plotly.min.js")}
+
+# Content codings of assets compressed when first requested. Brotli's best
+# ratio takes several seconds on Plotly.js, so that is left to precompressed
+# files next to the asset, as written by scripts/build_plotlyjs.py.
+ASSET_LEVELS = {"br": 9, "gzip": 9}
+
+# Extensions of precompressed copies of an asset by content coding
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def asset_path(filename: str) -> str | None:
+    """Return the path of a static asset.
+
+    Args:
+        filename: File name within the static directory.
+
+    Returns:
+        The path, or None if there is no such asset.
+    """
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        return None
+    path = os.path.join(STATIC_DIR, filename)
+    if os.path.isfile(path):
+        return path
+
+    if filename in VENDORED_ASSETS:
+        package, relative_path = VENDORED_ASSETS[filename]
+        # Locate the package without importing it
+        spec = importlib.util.find_spec(package)
+        if spec is not None and spec.submodule_search_locations:
+            path = os.path.join(spec.submodule_search_locations[0], relative_path)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def asset_fingerprint(filename: str) -> str:
+    """Return the content hash of a static asset.
+
+    Args:
+        filename: File name within the static directory.
+
+    Returns:
+        The first 16 hex digits of the SHA-256 of the file.
+
+    Raises:
+        FileNotFoundError: If there is no such asset.
+    """
+    path = asset_path(filename)
+    if path is None:
+        raise FileNotFoundError(filename)
+    # Keyed by modification time, so edited assets get a new fingerprint
+    return _fingerprint(path, os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=64)
+def _fingerprint(path: str, mtime_ns: int) -> str:
+    """Hash a file's content.
+
+    Args:
+        path: Path of the file.
+        mtime_ns: Modification time of the file, part of the cache key.
+
+    Returns:
+        The first 16 hex digits of the SHA-256 of the file.
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def asset_mimetype(filename: str) -> str:
+    """Return the media type of a static asset.
+
+    Args:
+        filename: File name of the asset.
+
+    Returns:
+        The media type, defaulting to ``application/octet-stream``.
+    """
+    mimetype, _ = mimetypes.guess_type(filename)
+    return mimetype or "application/octet-stream"
+
+
+@functools.lru_cache(maxsize=64)
+def asset_content(filename: str, fingerprint: str, encoding: str | None) -> bytes:
+    """Return the content of a static asset, compressed once and kept.
+
+    A precompressed copy next to the asset is used if it decompresses to the
+    asset's current content.
+
+    Args:
+        filename: File name within the static directory.
+        fingerprint: The asset's current fingerprint, part of the cache key.
+        encoding: Content coding, or None for the file as is.
+
+    Returns:
+        The possibly compressed content.
+
+    Raises:
+        FileNotFoundError: If there is no such asset.
+    """
+    path = asset_path(filename)
+    if path is None:
+        raise FileNotFoundError(filename)
+    with open(path, "rb") as f:
+        data = f.read()
+    if encoding is None:
+        return data
+
+    precompressed_path = path + PRECOMPRESSED_SUFFIXES[encoding]
+    if os.path.isfile(precompressed_path):
+        with open(precompressed_path, "rb") as f:
+            precompressed = f.read()
+        try:
+            if decompress(precompressed, encoding) == data:
+                return precompressed
+        except Exception:
+            # A corrupt copy is replaced by compressing the asset
+            pass
+    return compress(data, encoding, level=ASSET_LEVELS[encoding])
+
+
+@functools.lru_cache(maxsize=4)
+def _bundle_version(path: str, mtime_ns: int) -> str | None:
+    """Read the version from the license header of a Plotly.js bundle.
+
+    Args:
+        path: Path of the bundle.
+        mtime_ns: Modification time of the bundle, part of the cache key.
+
+    Returns:
+        The version, or None if the header has none.
+    """
+    with open(path, "rb") as f:
+        header = f.read(512).decode("utf-8", errors="replace")
+    match = re.search(r"plotly\.js v(\d+\.\d+\.\d+)", header)
+    return match.group(1) if match else None
+
+
+def plotlyjs_version() -> str:
+    """Return the version of the Plotly.js bundle served to the page.
+
+    Returns:
+        Plotly.js version string, taken from the bundle's header or, if it
+        has none, from the plotly package.
+    """
+    path = asset_path("plotly.min.js")
+    version = None
+    if path is not None:
+        version = _bundle_version(path, os.stat(path).st_mtime_ns)
+    if version is None:
+        from plotly.offline import get_plotlyjs_version
+
+        version = get_plotlyjs_version()
+    return version
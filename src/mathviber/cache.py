@@ -0,0 +1,136 @@
+"""Response caching for plot API requests."""
+
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any
+
+
+def request_cache_key(params: Mapping[str, Any]) -> str:
+    """Compute a canonical cache key for a set of request parameters.
+
+    Keys do not depend on parameter order or JSON formatting, so requests that
+    describe the same plot share one entry.
+
+    Args:
+        params: JSON-serializable request parameters.
+
+    Returns:
+        Hex SHA-256 digest of the canonical JSON encoding of ``params``.
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Interface for response cache storage.
+
+    Implement this to share cached responses between processes, for example
+    with Redis or memcached, and pass an instance as ``RESULT_CACHE_BACKEND``.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """Return the cached value for ``key``, or None on a miss.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            The cached value, or None.
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None:
+        """Store ``value`` under ``key``.
+
+        Args:
+            key: Cache key.
+            value: Serialized response body.
+        """
+
+    def stats(self) -> dict[str, Any]:
+        """Return backend statistics.
+
+        Returns:
+            Dictionary of backend specific counters.
+        """
+        return {}
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe in-process LRU cache with a per-entry time to live."""
+
+    def __init__(self, maxsize: int = 256, ttl: float | None = 300.0) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries; 0 disables caching.
+            ttl: Seconds an entry stays valid, or None to keep entries until
+                they are evicted.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached value for ``key``, or None on a miss.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            The cached value, or None if absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store ``value`` under ``key``, evicting the oldest entries.
+
+        Args:
+            key: Cache key.
+            value: Serialized response body.
+        """
+        if self.maxsize <= 0:
+            return
+
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        """Return cache size and hit/miss counters.
+
+        Returns:
+            Dictionary with limits, entry count, hits and misses.
+        """
+        with self._lock:
+            return {
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
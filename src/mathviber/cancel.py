@@ -0,0 +1,96 @@
+"""Cancellation of work superseded by newer requests from the same client."""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+SUPERSEDED_MESSAGE = "Superseded by a newer request"
+
+
+class Cancelled(Exception):
+    """Raised when work is abandoned because a newer request superseded it."""
+
+
+def check_cancelled(cancelled: Callable[[], bool] | None) -> None:
+    """Raise ``Cancelled`` if the work has been superseded.
+
+    Args:
+        cancelled: Predicate telling whether the work is no longer wanted,
+            or None if it cannot be cancelled.
+
+    Raises:
+        Cancelled: If the predicate returns True.
+    """
+    if cancelled is not None and cancelled():
+        raise Cancelled(SUPERSEDED_MESSAGE)
+
+
+class GenerationRegistry:
+    """Thread-safe record of the latest request generation of each session.
+
+    A client numbers its requests with increasing generations, for example
+    one per keystroke. Once a request with a higher generation arrives from
+    the same session, the earlier ones are superseded: their evaluations and
+    renders can be stopped, since the client no longer wants the result.
+    The least recently seen sessions are forgotten beyond ``maxsize``.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        """Initialize the registry.
+
+        Args:
+            maxsize: Maximum number of sessions tracked.
+        """
+        self.maxsize = maxsize
+        self._latest: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.started = 0
+        self.superseded = 0
+
+    def begin(self, session: str, generation: int) -> Callable[[], bool]:
+        """Record a request and return its cancellation predicate.
+
+        Args:
+            session: Identifier of the client session.
+            generation: Number of the request within the session.
+
+        Returns:
+            Predicate returning True once a newer request of the session
+            has begun.
+        """
+        with self._lock:
+            if generation > self._latest.get(session, generation - 1):
+                self._latest[session] = generation
+            self._latest.move_to_end(session)
+            while len(self._latest) > self.maxsize:
+                self._latest.popitem(last=False)
+            self.started += 1
+
+        reported = False
+
+        def cancelled() -> bool:
+            nonlocal reported
+            with self._lock:
+                superseded = self._latest.get(session, generation) > generation
+                if superseded and not reported:
+                    reported = True
+                    self.superseded += 1
+            return superseded
+
+        return cancelled
+
+    def stats(self) -> dict[str, Any]:
+        """Return the number of tracked sessions and request counters.
+
+        Returns:
+            Dictionary with the session limit, sessions tracked, requests
+            begun and requests found superseded.
+        """
+        with self._lock:
+            return {
+                "maxsize": self.maxsize,
+                "sessions": len(self._latest),
+                "started": self.started,
+                "superseded": self.superseded,
+            }
@@ -0,0 +1,348 @@
+"""Chunked evaluation of expressions on very large uniform grids.
+
+The grid ``np.linspace(x_min, x_max, num_points)`` is walked in fixed-size
+blocks. Each block is passed to reducers that keep only a bounded summary,
+such as the points needed to draw the trace or running statistics, so peak
+memory depends on the chunk size and the plot width but not on
+``num_points``.
+"""
+
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+import numpy as np
+
+from mathviber.cancel import check_cancelled
+from mathviber.decimate import m4_indices, plot_coordinates
+from mathviber.sampling import evaluate_kernel
+
+DEFAULT_CHUNK_SIZE = 1 << 18
+
+
+def iter_chunks(
+    kernel: Callable[[np.ndarray], Any],
+    x_min: float,
+    x_max: float,
+    num_points: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cancelled: Callable[[], bool] | None = None,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Evaluate a kernel on a uniform grid, one block at a time.
+
+    The concatenated blocks equal ``np.linspace(x_min, x_max, num_points)``
+    and the kernel's values on it, but only one block is held at a time.
+
+    Args:
+        kernel: Function mapping x values to y values.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        num_points: Total number of points.
+        chunk_size: Number of points per block.
+        cancelled: Predicate checked before each block; evaluation stops
+            once it returns True.
+
+    Yields:
+        Tuples of (x_values, y_values) of consecutive blocks.
+
+    Raises:
+        ValueError: If ``num_points`` is below 2 or ``chunk_size`` below 1.
+        Cancelled: If ``cancelled`` returns True.
+    """
+    if num_points < 2:
+        raise ValueError("num_points must be at least 2")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    # Same arithmetic as np.linspace, so values match a full evaluation
+    step = (x_max - x_min) / (num_points - 1)
+    for start in range(0, num_points, chunk_size):
+        check_cancelled(cancelled)
+        stop = min(start + chunk_size, num_points)
+        x = np.arange(start, stop, dtype=float)
+        x *= step
+        x += x_min
+        if stop == num_points:
+            x[-1] = x_max
+        yield x, evaluate_kernel(kernel, x)
+
+
+class ChunkReducer(ABC):
+    """Consumer of evaluated blocks that keeps a bounded summary."""
+
+    @abstractmethod
+    def update(self, x: np.ndarray, y: np.ndarray) -> None:
+        """Fold one block into the summary.
+
+        Args:
+            x: X values of the block.
+            y: Y values of the block.
+        """
+
+    @abstractmethod
+    def result(self) -> Any:
+        """Return the summary of the blocks seen so far.
+
+        Returns:
+            Reducer specific summary.
+        """
+
+
+class M4Reducer(ChunkReducer):
+    """Keep the points needed to draw the trace at a given width.
+
+    Every block contributes its M4 points (first, last, min, max and first
+    gap of each pixel column), with columns laid out over the full x range.
+    Reducing the collected points once more gives exactly the M4 selection
+    of the whole trace, since each column's extremes are among them.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        x_range: tuple[float, float],
+        x_log: bool = False,
+        y_log: bool = False,
+    ) -> None:
+        """Initialize the reducer.
+
+        Args:
+            width: Plot width in pixels.
+            x_range: Full (x_min, x_max) range of the trace.
+            x_log: Whether the x-axis is logarithmic.
+            y_log: Whether the y-axis is logarithmic.
+        """
+        self.width = width
+        self.x_log = x_log and x_range[0] > 0
+        self.y_log = y_log
+        self._u_range = (
+            (float(np.log10(x_range[0])), float(np.log10(x_range[1])))
+            if self.x_log
+            else x_range
+        )
+        self._parts: list[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        self._size = 0
+
+    def _select(
+        self, x: np.ndarray, y: np.ndarray, u: np.ndarray, v: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Select the M4 points of a trace.
+
+        Args:
+            x: X values.
+            y: Y values.
+            u: X values in plot coordinates.
+            v: Y values in plot coordinates.
+
+        Returns:
+            The selected (x, y, u, v) values.
+        """
+        selected = m4_indices(u, v, self.width, x_range=self._u_range)
+        return x[selected], y[selected], u[selected], v[selected]
+
+    def _compact(self) -> None:
+        """Reduce the collected points to one M4 selection."""
+        if len(self._parts) > 1:
+            x, y, u, v = (
+                np.concatenate(arrays) for arrays in zip(*self._parts, strict=True)
+            )
+            self._parts = [self._select(x, y, u, v)]
+            self._size = self._parts[0][0].size
+
+    def update(self, x: np.ndarray, y: np.ndarray) -> None:
+        """Fold one block into the selection.
+
+        Args:
+            x: X values of the block.
+            y: Y values of the block.
+        """
+        u, v = plot_coordinates(x, y, self.x_log, self.y_log)
+        part = self._select(x, y, u, v)
+        self._parts.append(part)
+        self._size += part[0].size
+        if self._size > 8 * self.width:
+            self._compact()
+
+    def result(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the points to draw.
+
+        Returns:
+            Tuple of (x_values, y_values) of at most ``5 * width`` points.
+        """
+        self._compact()
+        if not self._parts:
+            return np.empty(0), np.empty(0)
+        x, y, _, _ = self._parts[0]
+        return x, y
+
+
+class StatsReducer(ChunkReducer):
+    """Running statistics of the finite y values.
+
+    Means and variances of blocks are merged with Chan's parallel update, so
+    the result does not depend on the chunk size beyond rounding.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.count = 0
+        self.finite = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+        self.x_at_min: float | None = None
+        self.x_at_max: float | None = None
+
+    def update(self, x: np.ndarray, y: np.ndarray) -> None:
+        """Fold one block into the statistics.
+
+        Args:
+            x: X values of the block.
+            y: Y values of the block.
+        """
+        self.count += y.size
+        mask = np.isfinite(y)
+        values = y[mask]
+        if values.size == 0:
+            return
+
+        block_mean = float(values.mean())
+        block_m2 = float(np.square(values - block_mean).sum())
+        total = self.finite + values.size
+        delta = block_mean - self.mean
+        self.mean += delta * values.size / total
+        self._m2 += block_m2 + delta**2 * self.finite * values.size / total
+        self.finite = total
+
+        low, high = int(np.argmin(values)), int(np.argmax(values))
+        if self.min is None or values[low] < self.min:
+            self.min, self.x_at_min = float(values[low]), float(x[mask][low])
+        if self.max is None or values[high] > self.max:
+            self.max, self.x_at_max = float(values[high]), float(x[mask][high])
+
+    def result(self) -> dict[str, Any]:
+        """Return the statistics.
+
+        Returns:
+            Dictionary with point counts, min and max with their x
+            positions, and the mean and standard deviation of finite values.
+        """
+        return {
+            "count": self.count,
+            "finite": self.finite,
+            "min": self.min,
+            "x_at_min": self.x_at_min,
+            "max": self.max,
+            "x_at_max": self.x_at_max,
+            "mean": self.mean if self.finite else None,
+            "std": float(np.sqrt(self._m2 / self.finite)) if self.finite else None,
+        }
+
+
+class SinkReducer(ChunkReducer):
+    """Pass every block to a callable, such as a streaming response."""
+
+    def __init__(self, sink: Callable[[np.ndarray, np.ndarray], None]) -> None:
+        """Initialize the reducer.
+
+        Args:
+            sink: Called with the x and y values of each block.
+        """
+        self.sink = sink
+        self.blocks = 0
+
+    def update(self, x: np.ndarray, y: np.ndarray) -> None:
+        """Send one block to the sink.
+
+        Args:
+            x: X values of the block.
+            y: Y values of the block.
+        """
+        self.sink(x, y)
+        self.blocks += 1
+
+    def result(self) -> int:
+        """Return the number of blocks sent.
+
+        Returns:
+            Number of blocks passed to the sink.
+        """
+        return self.blocks
+
+
+def reduce_chunks(
+    kernel: Callable[[np.ndarray], Any],
+    x_min: float,
+    x_max: float,
+    num_points: int,
+    reducers: Sequence[ChunkReducer],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cancelled: Callable[[], bool] | None = None,
+) -> list[Any]:
+    """Evaluate a kernel block by block and feed every block to reducers.
+
+    Args:
+        kernel: Function mapping x values to y values.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        num_points: Total number of points.
+        reducers: Reducers receiving each block in order.
+        chunk_size: Number of points per block.
+        cancelled: Predicate checked before each block.
+
+    Returns:
+        The result of each reducer.
+
+    Raises:
+        Cancelled: If ``cancelled`` returns True.
+    """
+    for x, y in iter_chunks(
+        kernel, x_min, x_max, num_points, chunk_size, cancelled=cancelled
+    ):
+        for reducer in reducers:
+            reducer.update(x, y)
+    return [reducer.result() for reducer in reducers]
+
+
+def iter_display_chunks(
+    kernel: Callable[[np.ndarray], Any],
+    x_min: float,
+    x_max: float,
+    num_points: int,
+    width: int,
+    x_log: bool = False,
+    y_log: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cancelled: Callable[[], bool] | None = None,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Evaluate a uniform grid block by block, reduced for display.
+
+    Each block is reduced to its M4 points over pixel columns laid out on
+    the full x range, so the concatenated blocks draw the same line as the
+    whole grid while holding at most about ``5 * width`` points plus a few
+    per block boundary. Use this to send a trace progressively.
+
+    Args:
+        kernel: Function mapping x values to y values.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        num_points: Total number of points.
+        width: Plot width in pixels.
+        x_log: Whether the x-axis is logarithmic.
+        y_log: Whether the y-axis is logarithmic.
+        chunk_size: Number of points evaluated per block.
+        cancelled: Predicate checked before each block.
+
+    Yields:
+        Tuples of (x_values, y_values) of consecutive reduced blocks.
+
+    Raises:
+        Cancelled: If ``cancelled`` returns True.
+    """
+    for x, y in iter_chunks(
+        kernel, x_min, x_max, num_points, chunk_size, cancelled=cancelled
+    ):
+        reducer = M4Reducer(width, (x_min, x_max), x_log=x_log, y_log=y_log)
+        reducer.update(x, y)
+        yield reducer.result()
@@ -1,6 +1,7 @@
 """Command-line interface for MathViber."""
 
 import argparse
+import sys
 
 from mathviber._version import __version__
 
@@ -33,8 +34,108 @@ def main(argv: list[str] | None = None) -> int:
         help="Enable debug mode",
     )
 
+    server = parser.add_argument_group(
+        "production server", "Options of --server (requires mathviber[server])"
+    )
+    server.add_argument(
+        "--server",
+        action="store_true",
+        help="Serve with Gunicorn worker processes instead of the development "
+        "server; send SIGHUP to reload the workers gracefully",
+    )
+    server.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    server.add_argument(
+        "--threads",
+        type=int,
+        default=4,
+        help="Request threads per worker (default: 4)",
+    )
+    server.add_argument(
+        "--keep-alive",
+        type=int,
+        default=5,
+        help="Seconds to hold idle keep-alive connections open (default: 5)",
+    )
+    server.add_argument(
+        "--timeout",
+        type=int,
+        default=60,
+        help="Seconds before an unresponsive worker is restarted (default: 60)",
+    )
+
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    render = commands.add_parser(
+        "render",
+        help="Render plots to files without starting the server",
+        description="Render the plots listed in a CSV or JSON Lines file, one "
+        "per row with the parameters of /api/update_plot. Plots that are "
+        "already up to date in the output directory are skipped.",
+    )
+    render.add_argument("input", help="CSV (.csv) or JSON Lines file of plots")
+    render.add_argument(
+        "-o",
+        "--output-dir",
+        required=True,
+        help="Directory to write the plot files to",
+    )
+    render.add_argument(
+        "-f",
+        "--format",
+        choices=("png", "svg", "html"),
+        default="png",
+        help="Format of plots that do not set one (default: png)",
+    )
+    render.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of plots rendered in parallel (default: number of CPUs)",
+    )
+    render.add_argument(
+        "--force",
+        action="store_true",
+        help="Render all plots, including those that are up to date",
+    )
+
     args = parser.parse_args(argv)
 
+    if args.command == "render":
+        return render_main(parser, args)
+
+    if args.server:
+        if args.debug:
+            parser.error("--debug cannot be used with --server")
+
+        from mathviber.server import run_server, server_options
+
+        try:
+            options = server_options(
+                host=args.host,
+                port=args.port,
+                workers=args.workers,
+                threads=args.threads,
+                keepalive=args.keep_alive,
+                timeout=args.timeout,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+        print(
+            f"MathViber {__version__} starting on {args.host}:{args.port} "
+            f"with {options['workers']} workers x {options['threads']} threads"
+        )
+        try:
+            run_server(options)
+        except RuntimeError as e:
+            parser.exit(1, f"mathviber: error: {e}\n")
+        return 0
+
     # Import and run the Flask app
     from mathviber.app import main as flask_main
 
@@ -47,5 +148,41 @@ def main(argv: list[str] | None = None) -> int:
     return 0
 
 
+def render_main(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Run the render subcommand.
+
+    Args:
+        parser: The command-line parser, for reporting usage errors.
+        args: The parsed arguments.
+
+    Returns:
+        0 if every plot was rendered or up to date, 1 otherwise.
+    """
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    from mathviber.export import read_items, render_items
+
+    def progress(filename: str, error: str | None) -> None:
+        if error is None:
+            print(f"Rendered {filename}")
+        else:
+            print(f"Failed {filename}: {error}", file=sys.stderr)
+
+    try:
+        items = list(read_items(args.input, default_format=args.format))
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"mathviber: error: {e}\n")
+
+    summary = render_items(
+        items, args.output_dir, jobs=args.jobs, force=args.force, progress=progress
+    )
+    print(
+        f"{len(summary['rendered'])} rendered, {len(summary['skipped'])} up to "
+        f"date, {len(summary['failed'])} failed"
+    )
+    return 1 if summary["failed"] else 0
+
+
 if __name__ == "__main__":
     exit(main())
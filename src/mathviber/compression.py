@@ -0,0 +1,158 @@
+"""Negotiated compression of HTTP responses.
+
+Responses are compressed with Brotli when the optional ``brotli`` package is
+installed (``pip install mathviber[compression]``) and the client accepts
+it, and with gzip otherwise.
+"""
+
+import functools
+import gzip
+from typing import Any
+
+from flask import Response
+from werkzeug.datastructures import Accept
+
+# Media types worth compressing; images and streamed responses are left alone
+COMPRESSIBLE_MIMETYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "text/css",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+    }
+)
+
+# Levels trading ratio for speed on responses compressed per request
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+@functools.cache
+def _brotli() -> Any:
+    """Return the brotli module, or None if it is not installed.
+
+    Returns:
+        The module or None.
+    """
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Return the supported content codings, most preferred first.
+
+    Returns:
+        Tuple of ``Content-Encoding`` tokens.
+    """
+    return ("br", "gzip") if _brotli() is not None else ("gzip",)
+
+
+def negotiate_encoding(accept: Accept) -> str | None:
+    """Choose the content coding of a response.
+
+    Args:
+        accept: The request's parsed ``Accept-Encoding`` header.
+
+    Returns:
+        The supported coding with the highest quality, preferring Brotli on
+        ties, or None to send the response uncompressed.
+    """
+    best = None
+    best_quality = 0.0
+    for encoding in available_encodings():
+        quality = accept[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str, level: int | None = None) -> bytes:
+    """Compress data with a content coding.
+
+    Args:
+        data: The data.
+        encoding: ``"br"`` or ``"gzip"``.
+        level: Brotli quality or gzip level; defaults to ``BROTLI_QUALITY``
+            or ``GZIP_LEVEL``.
+
+    Returns:
+        The compressed data.
+
+    Raises:
+        ValueError: If the coding is not supported.
+    """
+    if encoding == "br" and _brotli() is not None:
+        quality = BROTLI_QUALITY if level is None else level
+        compressed: bytes = _brotli().compress(data, quality=quality)
+        return compressed
+    if encoding == "gzip":
+        level = GZIP_LEVEL if level is None else level
+        # A fixed mtime keeps the output identical for identical input
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """Decompress data compressed with a content coding.
+
+    Args:
+        data: The compressed data.
+        encoding: ``"br"`` or ``"gzip"``.
+
+    Returns:
+        The decompressed data.
+
+    Raises:
+        ValueError: If the coding is not supported.
+    """
+    if encoding == "br" and _brotli() is not None:
+        decompressed: bytes = _brotli().decompress(data)
+        return decompressed
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def compress_response(response: Response, accept: Accept, min_size: int) -> Response:
+    """Compress a response body if it is worth it and the client accepts it.
+
+    Only complete, successful responses of a compressible type at least
+    ``min_size`` bytes long are compressed. Streamed responses, such as
+    NDJSON plot streams and files, are passed through, since compressing
+    them would hold back their first bytes. ``Vary: Accept-Encoding`` is
+    added to every response whose body could have been compressed.
+
+    Args:
+        response: The response.
+        accept: The request's parsed ``Accept-Encoding`` header.
+        min_size: Smallest body length in bytes to compress.
+
+    Returns:
+        The response, compressed in place if applicable.
+    """
+    if (
+        response.status_code != 200
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding(accept)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
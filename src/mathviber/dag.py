@@ -0,0 +1,400 @@
+"""Shared evaluation of expression families with common subexpressions."""
+
+import ast
+import hashlib
+import operator
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+import numpy as np
+
+from mathviber.expressions import ALLOWED_NAMES, ExpressionError, parse_expression
+
+# Python operators matching the whitelisted AST operators
+_OPERATORS: dict[type, Callable[..., Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.Mod: operator.mod,
+    ast.FloorDiv: operator.floordiv,
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+# Operators whose operands can be swapped without changing the result
+_COMMUTATIVE = (ast.Add, ast.Mult)
+
+
+def _digest(*parts: str) -> str:
+    """Hash the parts of a node into a fixed-size structural key.
+
+    Args:
+        *parts: Node kind followed by operator or name and operand keys.
+
+    Returns:
+        Hex digest identifying the subexpression.
+    """
+    return hashlib.blake2b("\x00".join(parts).encode(), digest_size=16).hexdigest()
+
+
+class _Node:
+    """A unique subexpression: an operation applied to other nodes."""
+
+    __slots__ = ("key", "function", "value", "children")
+
+    def __init__(
+        self,
+        key: str,
+        function: Callable[..., Any] | None = None,
+        value: Any = None,
+        children: tuple[int, ...] = (),
+    ) -> None:
+        """Initialize the node.
+
+        Args:
+            key: Structural digest identifying the subexpression, equal for
+                equal subexpressions of any expression.
+            function: Operation applied to the children's values, or None
+                for leaves.
+            value: Value of a leaf (None stands for the x array).
+            children: Indices of the operand nodes.
+        """
+        self.key = key
+        self.function = function
+        self.value = value
+        self.children = children
+
+
+class SubexpressionCache:
+    """Thread-safe LRU cache of evaluated subexpressions, bounded in bytes.
+
+    Entries are keyed by the evaluation grid and the structural key of a
+    subexpression, so requests on the same grid reuse each other's shared
+    intermediates and results. Cached arrays are read-only.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_bytes: Maximum total size of cached arrays; 0 disables
+                caching.
+        """
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> np.ndarray | None:
+        """Return the cached array for ``key``, or None on a miss.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            The cached array, or None.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: np.ndarray) -> None:
+        """Store an array, evicting the least recently used entries.
+
+        Args:
+            key: Cache key.
+            value: Evaluated subexpression; it is made read-only.
+        """
+        if value.nbytes > self.max_bytes:
+            return
+
+        value.flags.writeable = False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = value
+            self._bytes += value.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return cache size and hit/miss counters.
+
+        Returns:
+            Dictionary with the byte limit, bytes used, entry count, hits
+            and misses.
+        """
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "bytes": self._bytes,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class ExpressionDAG:
+    """Directed acyclic graph of the subexpressions of several expressions.
+
+    Structurally identical subtrees, such as ``exp(-x)`` in
+    ``sin(x)*exp(-x)`` and ``cos(x)*exp(-x)``, become a single node, so each
+    is evaluated once per request. Operands of ``+`` and ``*`` are ordered
+    canonically, so ``a*b`` and ``b*a`` are shared too; both are exactly
+    commutative in floating point. Intermediate arrays are released as soon
+    as their last consumer has been evaluated.
+    """
+
+    def __init__(self, expressions: list[str]) -> None:
+        """Parse the expressions and merge their subexpressions.
+
+        Expressions that fail validation are recorded in ``errors`` and left
+        out of the graph.
+
+        Args:
+            expressions: The mathematical expressions.
+        """
+        self.nodes: list[_Node] = []
+        self._index: dict[str, int] = {}
+        # Root node of each expression, or None if it was rejected
+        self.roots: list[int | None] = []
+        self.errors: list[str | None] = []
+
+        for expression in expressions:
+            try:
+                tree = parse_expression(expression)
+            except ExpressionError as e:
+                self.roots.append(None)
+                self.errors.append(str(e))
+                continue
+            try:
+                root = self._add(tree.body)
+            except RecursionError:
+                self.roots.append(None)
+                self.errors.append("Expression is too complex")
+                continue
+            except OverflowError:
+                self.roots.append(None)
+                self.errors.append("Number is too large")
+                continue
+            self.roots.append(root)
+            self.errors.append(None)
+
+    def _intern(self, node: _Node) -> int:
+        """Return the index of an equivalent node, adding it if it is new.
+
+        Args:
+            node: Candidate node.
+
+        Returns:
+            Index of the unique node with the same key.
+        """
+        index = self._index.get(node.key)
+        if index is None:
+            index = len(self.nodes)
+            self.nodes.append(node)
+            self._index[node.key] = index
+        return index
+
+    def _add(self, node: ast.AST) -> int:
+        """Add a validated AST node and its operands to the graph.
+
+        Nodes are appended after their operands, so ``self.nodes`` is in
+        evaluation order.
+
+        Args:
+            node: Validated AST node.
+
+        Returns:
+            Index of the node in the graph.
+        """
+        if isinstance(node, ast.Constant):
+            # Integers become floats, so constant powers such as 9**9**9
+            # overflow at once instead of running in arbitrary precision
+            value = float(node.value) if isinstance(node.value, int) else node.value
+            key = _digest("const", repr(value))
+            return self._intern(_Node(key, value=value))
+        if isinstance(node, ast.Name):
+            key = _digest("name", node.id)
+            return self._intern(_Node(key, value=ALLOWED_NAMES[node.id]))
+
+        operands: list[ast.expr]
+        if isinstance(node, ast.Call):
+            assert isinstance(node.func, ast.Name)
+            name = node.func.id
+            function = ALLOWED_NAMES[name]
+            kind = ("call", name)
+            operands = node.args
+            commutative = False
+        else:
+            op: ast.operator | ast.unaryop | ast.cmpop
+            if isinstance(node, ast.BinOp):
+                op, operands = node.op, [node.left, node.right]
+            elif isinstance(node, ast.UnaryOp):
+                op, operands = node.op, [node.operand]
+            else:
+                assert isinstance(node, ast.Compare)
+                op, operands = node.ops[0], [node.left, node.comparators[0]]
+            function = _OPERATORS[type(op)]
+            kind = ("op", type(op).__name__)
+            commutative = isinstance(op, _COMMUTATIVE)
+
+        children = tuple(self._add(operand) for operand in operands)
+        if commutative:
+            children = tuple(sorted(children, key=lambda c: self.nodes[c].key))
+        key = _digest(*kind, *(self.nodes[child].key for child in children))
+
+        return self._intern(_Node(key, function=function, children=children))
+
+    def _cacheable(self) -> set[int]:
+        """Return the nodes worth keeping across requests.
+
+        These are the expression results and the intermediates shared by
+        more than one consumer; leaves are never cached.
+
+        Returns:
+            Set of node indices.
+        """
+        consumers = [0] * len(self.nodes)
+        for node in self.nodes:
+            for child in set(node.children):
+                consumers[child] += 1
+        return {
+            index
+            for index, node in enumerate(self.nodes)
+            if node.function is not None
+            and (consumers[index] > 1 or index in self.roots)
+        }
+
+    def evaluate(
+        self,
+        x: np.ndarray,
+        cache: SubexpressionCache | None = None,
+        grid_key: Hashable = None,
+    ) -> tuple[list[np.ndarray | None], list[str | None]]:
+        """Evaluate every expression on ``x``, each unique node once.
+
+        Args:
+            x: X values.
+            cache: Optional cache of evaluated subexpressions shared across
+                requests.
+            grid_key: Key identifying ``x``, such as the grid bounds and
+                size; required to use ``cache``.
+
+        Returns:
+            Tuple of (y_values, errors) with one entry per expression; for
+            each expression exactly one of the two is None.
+        """
+        values: dict[int, Any] = {}
+        failures: dict[int, str] = {}
+
+        # Look up shared nodes first, so their subtrees are not evaluated
+        store = (
+            self._cacheable() if cache is not None and grid_key is not None else set()
+        )
+        for index in sorted(store):
+            cached = cache.get((grid_key, self.nodes[index].key))  # type: ignore[union-attr]
+            if cached is not None:
+                values[index] = cached
+
+        # Only nodes feeding a root and not already known are evaluated
+        remaining = [0] * len(self.nodes)
+        needed: set[int] = set()
+        stack = [root for root in self.roots if root is not None]
+        while stack:
+            index = stack.pop()
+            if index in needed:
+                continue
+            needed.add(index)
+            if index not in values:
+                stack.extend(self.nodes[index].children)
+
+        # Count consumers, so intermediates can be dropped after last use
+        for index in needed:
+            if index not in values:
+                for child in self.nodes[index].children:
+                    remaining[child] += 1
+        for root in self.roots:
+            if root is not None:
+                remaining[root] += 1
+
+        for index in sorted(needed):
+            if index in values:
+                continue
+            node = self.nodes[index]
+
+            if node.function is None:
+                values[index] = x if node.value is None else node.value
+                continue
+
+            failed = next((failures[c] for c in node.children if c in failures), None)
+            if failed is not None:
+                failures[index] = failed
+            else:
+                try:
+                    values[index] = node.function(*(values[c] for c in node.children))
+                except Exception as e:
+                    failures[index] = f"Error evaluating expression: {str(e)}"
+                else:
+                    if index in store and isinstance(values[index], np.ndarray):
+                        cache.set((grid_key, node.key), values[index])  # type: ignore[union-attr]
+
+            for child in node.children:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    values.pop(child, None)
+
+        results: list[np.ndarray | None] = []
+        errors: list[str | None] = list(self.errors)
+        for position, root in enumerate(self.roots):
+            if root is None:
+                results.append(None)
+            elif root in failures:
+                results.append(None)
+                errors[position] = failures[root]
+            else:
+                try:
+                    y = np.asarray(values[root], dtype=float)
+                    if y.shape != x.shape:
+                        y = np.broadcast_to(y, x.shape).copy()
+                    results.append(y)
+                except Exception as e:
+                    results.append(None)
+                    errors[position] = f"Error evaluating expression: {str(e)}"
+
+        return results, errors
+
+    def stats(self) -> dict[str, int]:
+        """Return the size of the graph.
+
+        Returns:
+            Dictionary with the number of expressions and unique nodes.
+        """
+        return {"expressions": len(self.roots), "nodes": len(self.nodes)}
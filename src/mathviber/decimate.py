@@ -0,0 +1,209 @@
+"""Downsampling of large traces before they are sent to the browser."""
+
+import numpy as np
+
+DECIMATION_METHODS = ("m4", "lttb")
+
+
+def m4_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    width: int,
+    x_range: tuple[float, float] | None = None,
+) -> np.ndarray:
+    """Select the first, last, min and max point of each pixel column.
+
+    Drawing the selected points as a line at ``width`` pixels produces the
+    same image as drawing every point, so peaks are never lost. A column
+    containing a non-finite value also keeps its first such point, so the
+    line still breaks there.
+
+    Args:
+        x: X positions, sorted ascending.
+        y: Y values.
+        width: Number of pixel columns.
+        x_range: Range covered by the columns; defaults to the range of
+            ``x``. Pass the full range when ``x`` is one chunk of a larger
+            trace, so all chunks share the same columns.
+
+    Returns:
+        Sorted indices of at most ``5 * width`` selected points.
+    """
+    if width < 1:
+        raise ValueError("width must be at least 1")
+
+    n = x.size
+    if x_range is None:
+        x_range = (x[0], x[-1]) if n else (0.0, 0.0)
+    start, stop = x_range
+    span = stop - start
+    if n == 0 or not span > 0:
+        return np.arange(n)
+
+    # Assign each point to a pixel column and find where columns start
+    columns = ((x - start) * (width / span)).astype(np.int64)
+    np.clip(columns, 0, width - 1, out=columns)
+    starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    column_of_point = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, n]))
+
+    finite = np.isfinite(y)
+    low = np.where(finite, y, np.inf)
+    high = np.where(finite, y, -np.inf)
+    column_min = np.minimum.reduceat(low, starts)
+    column_max = np.maximum.reduceat(high, starts)
+
+    # First index in each column attaining the min, the max and a gap
+    index = np.arange(n)
+    missing = np.int64(n)
+    min_index = np.minimum.reduceat(
+        np.where(low == column_min[column_of_point], index, missing), starts
+    )
+    max_index = np.minimum.reduceat(
+        np.where(high == column_max[column_of_point], index, missing), starts
+    )
+    gap_index = np.minimum.reduceat(np.where(finite, missing, index), starts)
+
+    selected = np.concatenate([starts, ends, min_index, max_index, gap_index])
+    return np.unique(selected[selected < missing])
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Select points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept. Every other bucket contributes the
+    point forming the largest triangle with the point chosen in the previous
+    bucket and the mean of the next bucket. Bucket means and triangle areas
+    are computed with NumPy; only the walk over buckets is sequential, since
+    each choice depends on the previous one.
+
+    Buckets are formed from the finite values. Where non-finite values lie
+    between two selected points, the last finite point before them, the
+    first of them and the first finite point after them are kept as well,
+    so the line still breaks at gaps and asymptotes.
+
+    Args:
+        x: X positions, sorted ascending.
+        y: Y values.
+        threshold: Number of finite points to keep, at least 3.
+
+    Returns:
+        Sorted indices of at most ``4 * threshold`` selected points.
+    """
+    if threshold < 3:
+        raise ValueError("threshold must be at least 3")
+
+    finite = np.isfinite(y)
+    kept = np.flatnonzero(finite)
+    selected: np.ndarray = kept[_lttb(x[kept], y[kept], threshold)]
+    if kept.size == y.size or selected.size < 2:
+        return selected
+
+    # Consecutive selected points with non-finite values between them
+    non_finite = np.flatnonzero(~finite)
+    gaps_before = np.searchsorted(non_finite, selected)
+    broken = gaps_before[1:] != gaps_before[:-1]
+    first_gap = non_finite[gaps_before[:-1][broken]]
+    last_gap = non_finite[gaps_before[1:][broken] - 1]
+    return np.unique(np.concatenate([selected, first_gap - 1, first_gap, last_gap + 1]))
+
+
+def _lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Select points of a finite trace with Largest-Triangle-Three-Buckets.
+
+    Args:
+        x: X positions, sorted ascending.
+        y: Finite y values.
+        threshold: Number of points to keep, at least 3.
+
+    Returns:
+        Sorted indices of the selected points.
+    """
+    n = x.size
+    if n <= threshold:
+        return np.arange(n)
+
+    # Interior points split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.r_[np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts, x[-1]]
+    mean_y = np.r_[np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts, y[-1]]
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = mean_x[bucket + 1], mean_y[bucket + 1]
+        area = np.abs(
+            (ax - cx) * (y[start:stop] - ay) - (ax - x[start:stop]) * (cy - ay)
+        )
+        previous = int(start + np.argmax(area))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def plot_coordinates(
+    x: np.ndarray, y: np.ndarray, x_log: bool = False, y_log: bool = False
+) -> tuple[np.ndarray, np.ndarray]:
+    """Map data values to the coordinates they are drawn at.
+
+    Args:
+        x: X values.
+        y: Y values.
+        x_log: Whether the x-axis is logarithmic; ignored unless all x
+            values are positive.
+        y_log: Whether the y-axis is logarithmic; non-positive y values
+            become NaN.
+
+    Returns:
+        Tuple of (u, v) plot coordinates.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.log10(x) if x_log and x.size and x[0] > 0 else x
+        v = np.where(y > 0, np.log10(np.abs(y)), np.nan) if y_log else y
+    return u, v
+
+
+def decimate(
+    x: np.ndarray,
+    y: np.ndarray,
+    width: int,
+    method: str = "m4",
+    x_log: bool = False,
+    y_log: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Downsample a trace for display at ``width`` pixels.
+
+    Points are bucketed in plot coordinates, so log axes are respected.
+
+    Args:
+        x: X values, sorted ascending.
+        y: Y values.
+        width: Target plot width in pixels.
+        method: ``"m4"`` (exact min/max per column, at most about
+            ``4 * width`` points) or ``"lttb"`` (``2 * width`` points of
+            similar shape, plus the ends of any gaps).
+        x_log: Whether the x-axis is logarithmic.
+        y_log: Whether the y-axis is logarithmic.
+
+    Returns:
+        Tuple of downsampled (x_values, y_values).
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method not in DECIMATION_METHODS:
+        raise ValueError(f"Unknown decimation method: {method}")
+    if x.size <= 4 * width:
+        return x, y
+
+    u, v = plot_coordinates(x, y, x_log, y_log)
+    if method == "m4":
+        selected = m4_indices(u, v, width)
+    else:
+        selected = lttb_indices(u, v, 2 * width)
+    return x[selected], y[selected]
@@ -0,0 +1,94 @@
+"""Serialization of evaluated arrays for plot responses."""
+
+import base64
+from typing import Any
+
+import numpy as np
+
+# Array encodings accepted by plot responses, mapped to the little-endian
+# NumPy dtype of binary encodings
+ARRAY_ENCODINGS: dict[str, str | None] = {
+    "text": None,
+    "float64": "<f8",
+    "float32": "<f4",
+}
+
+
+def encode_array(values: np.ndarray) -> list[float | None]:
+    """Convert an array to a JSON-compatible list.
+
+    JSON has no representation for NaN or infinity, so non-finite values
+    become None, which Plotly.js draws as a gap.
+
+    Args:
+        values: Array of numbers.
+
+    Returns:
+        List of floats, with None in place of non-finite values.
+    """
+    values = np.asarray(values, dtype=float)
+    result: list[float | None] = values.tolist()
+    if not np.isfinite(values).all():
+        for index in np.flatnonzero(~np.isfinite(values)):
+            result[index] = None
+    return result
+
+
+def encode_array_binary(values: np.ndarray, dtype: str = "<f8") -> dict[str, str]:
+    """Encode an array as a Plotly.js typed array specification.
+
+    The array buffer is base64-encoded as a whole, without converting
+    individual elements. NaN and infinity survive the round trip. Requires
+    Plotly.js 2.28 or newer on the client.
+
+    Args:
+        values: Array of numbers.
+        dtype: Little-endian float dtype, ``"<f8"`` or ``"<f4"``.
+
+    Returns:
+        Dictionary with the Plotly.js ``dtype`` code and base64 ``bdata``.
+    """
+    data = np.ascontiguousarray(values, dtype=dtype)
+    return {
+        "dtype": data.dtype.str[1:],
+        "bdata": base64.b64encode(data.data).decode("ascii"),
+    }
+
+
+def encode_trace_array(values: np.ndarray, encoding: str = "text") -> Any:
+    """Encode an array with one of the ``ARRAY_ENCODINGS``.
+
+    Args:
+        values: Array of numbers.
+        encoding: ``"text"`` for a JSON list, or ``"float64"``/``"float32"``
+            for a base64 typed array.
+
+    Returns:
+        JSON-compatible representation of the array.
+
+    Raises:
+        ValueError: If the encoding is unknown.
+    """
+    if encoding not in ARRAY_ENCODINGS:
+        raise ValueError(f"Unknown array encoding: {encoding}")
+
+    dtype = ARRAY_ENCODINGS[encoding]
+    if dtype is None:
+        return encode_array(values)
+    return encode_array_binary(values, dtype)
+
+
+def binary_arrays_supported(plotlyjs_version: str) -> bool:
+    """Return whether a Plotly.js version decodes base64 typed arrays.
+
+    Args:
+        plotlyjs_version: Plotly.js version string, such as ``"2.35.2"``.
+
+    Returns:
+        True for Plotly.js 2.28 and newer.
+    """
+    try:
+        major, minor = (int(part) for part in plotlyjs_version.split(".")[:2])
+    except ValueError:
+        return False
+    return (major, minor) >= (2, 28)
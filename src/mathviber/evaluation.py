@@ -0,0 +1,652 @@
+"""Process pool running expression evaluation under CPU and memory limits."""
+
+import errno
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable
+from multiprocessing.connection import Connection
+from typing import Any
+
+import numpy as np
+
+from mathviber.cancel import SUPERSEDED_MESSAGE, Cancelled
+from mathviber.chunked import M4Reducer, reduce_chunks
+from mathviber.dag import ExpressionDAG, SubexpressionCache
+from mathviber.decimate import decimate
+from mathviber.expressions import ExpressionCache, ExpressionError
+from mathviber.sampling import adaptive_sample, uniform_sample, uniform_sample_into
+from mathviber.shm import (
+    ArrayHandle,
+    SharedArrayWriter,
+    export_arrays,
+    import_arrays,
+    segment_prefix,
+    sweep_segments,
+    sweep_stale_segments,
+)
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+
+class EvaluationTimeout(Exception):
+    """Raised when an evaluation job does not finish within its timeout."""
+
+
+class EvaluationKilled(Exception):
+    """Raised when a worker dies while evaluating a job."""
+
+
+def sample_expression(
+    kernel: Any,
+    x_min: float,
+    x_max: float,
+    num_points: int,
+    sampling: str,
+    max_depth: int = 12,
+    tolerance: float = 5e-4,
+    x_log: bool = False,
+    y_log: bool = False,
+    chunk_size: int | None = None,
+    width: int = 1000,
+    cancelled: Callable[[], bool] | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sample a compiled kernel with the given sampling mode.
+
+    Uniform grids larger than ``chunk_size`` are evaluated block by block
+    and reduced to the M4 points of a ``width`` pixel plot as they go, so
+    peak memory does not grow with ``num_points``.
+
+    Args:
+        kernel: Compiled expression kernel.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        num_points: Number of points, or the evaluation budget with adaptive
+            sampling.
+        sampling: ``"uniform"`` or ``"adaptive"``.
+        max_depth: Maximum bisections of adaptive sampling.
+        tolerance: Acceptable chord error of adaptive sampling.
+        x_log: Whether the x-axis is logarithmic.
+        y_log: Whether the y-axis is logarithmic.
+        chunk_size: Points per block of chunked evaluation, or None to
+            always evaluate the whole grid at once.
+        width: Plot width in pixels that chunked results are reduced to.
+        cancelled: Predicate checked between chunks; chunked evaluation
+            stops once it returns True.
+
+    Returns:
+        Tuple of (x_values, y_values).
+
+    Raises:
+        Cancelled: If ``cancelled`` returns True.
+    """
+    if sampling == "uniform" and chunk_size and num_points > chunk_size:
+        reducer = M4Reducer(width, (x_min, x_max), x_log=x_log, y_log=y_log)
+        reduce_chunks(
+            kernel,
+            x_min,
+            x_max,
+            num_points,
+            [reducer],
+            chunk_size,
+            cancelled=cancelled,
+        )
+        return reducer.result()
+    if sampling == "adaptive":
+        return adaptive_sample(
+            kernel,
+            x_min,
+            x_max,
+            budget=num_points,
+            max_depth=max_depth,
+            tolerance=tolerance,
+            x_log=x_log,
+            y_log=y_log,
+        )
+    return uniform_sample(kernel, x_min, x_max, num_points)
+
+
+def sample_batch(
+    expressions: list[str],
+    x_min: float,
+    x_max: float,
+    num_points: int,
+    width: int = 1000,
+    method: str = "m4",
+    x_log: bool = False,
+    y_log: bool = False,
+    cache: SubexpressionCache | None = None,
+) -> tuple[list[tuple[np.ndarray, np.ndarray] | None], list[str | None]]:
+    """Evaluate several expressions on one uniform grid for display.
+
+    The expressions are merged into one ``ExpressionDAG``, so subexpressions
+    they share are evaluated once, and each curve is downsampled to
+    ``width`` pixel columns. A failing expression does not stop the others.
+
+    Args:
+        expressions: The mathematical expressions.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        num_points: Number of grid points.
+        width: Plot width in pixels the curves are downsampled to.
+        method: Decimation method, one of ``DECIMATION_METHODS``.
+        x_log: Whether the x-axis is logarithmic.
+        y_log: Whether the y-axis is logarithmic.
+        cache: Optional cache of evaluated subexpressions shared across
+            requests on the same grid.
+
+    Returns:
+        Tuple of (curves, errors) with one entry per expression. Each curve
+        is a tuple of downsampled (x_values, y_values); for each expression
+        exactly one of the curve and the error is None.
+    """
+    x = np.linspace(x_min, x_max, num_points)
+    ys, errors = ExpressionDAG(expressions).evaluate(
+        x, cache=cache, grid_key=("linspace", x_min, x_max, num_points)
+    )
+
+    curves: list[tuple[np.ndarray, np.ndarray] | None] = []
+    for index, (expression, y) in enumerate(zip(expressions, ys, strict=True)):
+        if not expression.strip():
+            errors[index] = "No expression provided"
+        if y is None or errors[index] is not None:
+            curves.append(None)
+            continue
+        curves.append(decimate(x, y, width, method=method, x_log=x_log, y_log=y_log))
+    return curves, errors
+
+
+def _sample_uniform_shared(
+    kernel: Any, x_min: float, x_max: float, num_points: int, prefix: str
+) -> ArrayHandle:
+    """Evaluate a kernel on a uniform grid straight into shared memory.
+
+    Args:
+        kernel: Compiled expression kernel.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        num_points: Number of points.
+        prefix: Name prefix of the segment.
+
+    Returns:
+        Handle to the x and y arrays.
+    """
+    writer = SharedArrayWriter([(num_points,), (num_points,)], prefix=prefix)
+    try:
+        x, y = writer.arrays
+        uniform_sample_into(kernel, x_min, x_max, x, y)
+        del x, y
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.finish()
+
+
+def _limit_memory(limit: int | None) -> None:
+    """Cap the address space of the current process.
+
+    The limit applies on top of what the process already maps after
+    importing NumPy, so it bounds the memory an evaluation may allocate.
+
+    Args:
+        limit: Additional bytes the process may map, or None for no limit.
+    """
+    if limit is None or resource is None:
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            mapped = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        mapped = 0
+    resource.setrlimit(resource.RLIMIT_AS, (mapped + limit, mapped + limit))
+
+
+def _worker_main(conn: Connection, memory_limit: int | None, prefix: str) -> None:
+    """Evaluate jobs received on ``conn`` until it is closed.
+
+    Results are written to a new shared memory segment, and only its handle
+    is sent back, so arrays are never pickled. Full uniform grids are
+    evaluated directly into the segment; other results are copied into it.
+
+    Args:
+        conn: Worker end of the job pipe.
+        memory_limit: Additional bytes the worker may map, or None.
+        prefix: Name prefix of the segments the worker creates.
+    """
+    _limit_memory(memory_limit)
+    kernels = ExpressionCache(maxsize=128)
+    reply: dict[str, Any]
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        try:
+            if job.pop("kind") == "batch":
+                curves, errors = sample_batch(**job)
+                arrays = [array for curve in curves if curve for array in curve]
+                reply = {"arrays": export_arrays(arrays, prefix=prefix)}
+                reply["errors"] = errors
+                del curves, arrays
+            elif job["sampling"] == "uniform" and not (
+                job.get("chunk_size") and job["num_points"] > job["chunk_size"]
+            ):
+                # Full grids are written to the segment as they are evaluated
+                kernel = kernels.compile(job["expression"])
+                reply = {
+                    "arrays": _sample_uniform_shared(
+                        kernel, job["x_min"], job["x_max"], job["num_points"], prefix
+                    )
+                }
+            else:
+                kernel = kernels.compile(job.pop("expression"))
+                x, y = sample_expression(kernel, **job)
+                reply = {"arrays": export_arrays([x, y], prefix=prefix)}
+                del x, y
+        except ExpressionError as e:
+            reply = {"error": str(e)}
+        except MemoryError:
+            reply = {"error": "Evaluation exceeded the memory limit"}
+        except OSError as e:
+            # Mapping a result segment beyond the limit fails with ENOMEM
+            if e.errno == errno.ENOMEM:
+                reply = {"error": "Evaluation exceeded the memory limit"}
+            else:
+                reply = {"error": f"Error evaluating expression: {str(e)}"}
+        except Exception as e:
+            reply = {"error": f"Error evaluating expression: {str(e)}"}
+
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            return
+
+
+class _Worker:
+    """A worker process and the parent's end of its job pipe."""
+
+    def __init__(
+        self,
+        context: multiprocessing.context.BaseContext,
+        memory_limit: int | None,
+        prefix: str,
+    ) -> None:
+        """Start the worker process.
+
+        Args:
+            context: Multiprocessing context used to start the process.
+            memory_limit: Additional bytes the worker may map, or None.
+            prefix: Name prefix of the segments the worker creates.
+        """
+        self.prefix = prefix
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(  # type: ignore[attr-defined]
+            target=_worker_main,
+            args=(child_conn, memory_limit, prefix),
+            name="mathviber-evaluate",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        """Terminate the process, close the pipe and remove its segments.
+
+        Segments the worker created but never handed over, for example
+        because it was killed mid-job, are found by their name prefix.
+        """
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        sweep_segments(f"{self.prefix}{self.process.pid}_")
+
+
+class EvaluationPool:
+    """A fixed set of pre-started processes that evaluate expressions.
+
+    A job that exceeds its wall-clock timeout is killed together with its
+    worker, which is replaced by a fresh process, so a pathological
+    expression cannot block the server. Each worker's address space is
+    capped with ``setrlimit``; allocations beyond it fail inside the worker
+    and are reported as errors. A job whose request is superseded is
+    stopped the same way. Sampled arrays come back through the
+    ``mathviber.shm`` shared memory transport rather than being pickled.
+    """
+
+    # Seconds between checks of a running job's cancellation predicate
+    poll_interval = 0.05
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 5.0,
+        memory_limit: int | None = 512 * 2**20,
+        start_method: str | None = None,
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            workers: Number of worker processes.
+            timeout: Default number of seconds a job may run, including the
+                wait for a free worker.
+            memory_limit: Bytes each worker may map on top of its baseline,
+                or None for no limit.
+            start_method: Multiprocessing start method; defaults to
+                ``"forkserver"`` where available, so workers are not forked
+                from a multithreaded server.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        if start_method is None:
+            methods = multiprocessing.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in methods else "spawn"
+
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._context = multiprocessing.get_context(start_method)
+        self._prefix = segment_prefix()
+
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._all: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._killed = 0
+        self._cancelled = 0
+        self._eval_time_total = 0.0
+        self._eval_time_max = 0.0
+
+    def start(self) -> None:
+        """Start the worker processes ahead of the first job."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Evaluation pool has been shut down")
+            if self._started:
+                return
+            # Segments left behind by a previous server that crashed
+            sweep_stale_segments()
+            for _ in range(self.workers):
+                worker = _Worker(self._context, self.memory_limit, self._prefix)
+                self._all.append(worker)
+                self._idle.put(worker)
+            self._started = True
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill a worker and put a fresh process in its place.
+
+        Args:
+            worker: The worker to replace.
+        """
+        worker.kill()
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+            if self._closed:
+                return
+            fresh = _Worker(self._context, self.memory_limit, self._prefix)
+            self._all.append(fresh)
+        self._idle.put(fresh)
+
+    def evaluate(
+        self,
+        expression: str,
+        x_min: float,
+        x_max: float,
+        num_points: int = 1000,
+        sampling: str = "uniform",
+        timeout: float | None = None,
+        cancelled: Callable[[], bool] | None = None,
+        **options: Any,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Evaluate an expression in a worker process.
+
+        Args:
+            expression: The mathematical expression.
+            x_min: Minimum x value.
+            x_max: Maximum x value.
+            num_points: Number of points, or the evaluation budget with
+                adaptive sampling.
+            sampling: ``"uniform"`` or ``"adaptive"``.
+            timeout: Seconds to wait; defaults to the pool's timeout.
+            cancelled: Predicate polled while the job runs; once it returns
+                True the worker is killed and replaced.
+            **options: Keyword arguments for ``sample_expression``.
+
+        Returns:
+            Tuple of (x_values, y_values).
+
+        Raises:
+            ExpressionError: If the expression is rejected or fails.
+            EvaluationTimeout: If no worker is free or the job does not
+                finish in time.
+            EvaluationKilled: If the worker died during the job.
+            Cancelled: If ``cancelled`` returns True.
+        """
+        job = {
+            "kind": "sample",
+            "expression": expression,
+            "x_min": x_min,
+            "x_max": x_max,
+            "num_points": num_points,
+            "sampling": sampling,
+            **options,
+        }
+        # The arrays are views of the worker's segment, not copies
+        x, y = self._run(job, timeout, cancelled)["arrays"]
+        return x, y
+
+    def evaluate_batch(
+        self,
+        expressions: list[str],
+        x_min: float,
+        x_max: float,
+        num_points: int,
+        timeout: float | None = None,
+        cancelled: Callable[[], bool] | None = None,
+        **options: Any,
+    ) -> tuple[list[tuple[np.ndarray, np.ndarray] | None], list[str | None]]:
+        """Evaluate several expressions on one grid in a worker process.
+
+        Only the downsampled curves are passed back. If the batch times out
+        or its worker dies, the expressions are retried one at a time, each
+        with the full timeout, so only the offending ones fail.
+
+        Args:
+            expressions: The mathematical expressions.
+            x_min: Minimum x value.
+            x_max: Maximum x value.
+            num_points: Number of grid points.
+            timeout: Seconds to wait; defaults to the pool's timeout.
+            cancelled: Predicate polled while the job runs; once it returns
+                True the worker is killed and replaced.
+            **options: Keyword arguments for ``sample_batch``, except
+                ``cache``.
+
+        Returns:
+            Tuple of (curves, errors) as returned by ``sample_batch``.
+
+        Raises:
+            ExpressionError: If the whole job fails, for example by
+                exceeding the memory limit.
+            EvaluationTimeout: If a single expression does not finish in
+                time or no worker is free for it.
+            EvaluationKilled: If the worker died evaluating a single
+                expression.
+            Cancelled: If ``cancelled`` returns True.
+        """
+        job = {
+            "kind": "batch",
+            "expressions": expressions,
+            "x_min": x_min,
+            "x_max": x_max,
+            "num_points": num_points,
+            **options,
+        }
+        curves: list[tuple[np.ndarray, np.ndarray] | None] = []
+        try:
+            reply = self._run(job, timeout, cancelled)
+        except (EvaluationTimeout, EvaluationKilled):
+            if len(expressions) == 1:
+                raise
+            # Find the expressions that failed the batch
+            errors: list[str | None] = []
+            for expression in expressions:
+                try:
+                    curve, failure = self.evaluate_batch(
+                        [expression],
+                        x_min,
+                        x_max,
+                        num_points,
+                        timeout=timeout,
+                        cancelled=cancelled,
+                        **options,
+                    )
+                except (ExpressionError, EvaluationTimeout, EvaluationKilled) as e:
+                    curve, failure = [None], [str(e)]
+                curves.extend(curve)
+                errors.extend(failure)
+            return curves, errors
+
+        arrays = iter(reply["arrays"])
+        for error in reply["errors"]:
+            curves.append(None if error is not None else (next(arrays), next(arrays)))
+        return curves, reply["errors"]
+
+    def _run(
+        self,
+        job: dict[str, Any],
+        timeout: float | None,
+        cancelled: Callable[[], bool] | None,
+    ) -> dict[str, Any]:
+        """Run a job on a free worker and wait for its reply.
+
+        Args:
+            job: Job description for ``_worker_main``.
+            timeout: Seconds to wait; defaults to the pool's timeout.
+            cancelled: Predicate polled while the job runs.
+
+        Returns:
+            The worker's reply, with ``arrays`` imported from shared memory.
+
+        Raises:
+            ExpressionError: If the worker reports an error.
+            EvaluationTimeout: If no worker is free or the job does not
+                finish in time.
+            EvaluationKilled: If the worker died during the job.
+            Cancelled: If ``cancelled`` returns True.
+        """
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timed_out += 1
+            raise EvaluationTimeout("No evaluation worker became available") from None
+        if cancelled is not None and cancelled():
+            self._idle.put(worker)
+            raise Cancelled(SUPERSEDED_MESSAGE)
+
+        with self._lock:
+            self._active += 1
+            self._submitted += 1
+        started = time.perf_counter()
+        try:
+            worker.conn.send(job)
+            # Wait in short slices so a superseded job is stopped early
+            while not worker.conn.poll(
+                max(min(deadline - time.monotonic(), self.poll_interval), 0)
+            ):
+                if cancelled is not None and cancelled():
+                    self._replace(worker)
+                    with self._lock:
+                        self._cancelled += 1
+                    raise Cancelled(SUPERSEDED_MESSAGE)
+                if time.monotonic() >= deadline:
+                    self._replace(worker)
+                    with self._lock:
+                        self._timed_out += 1
+                    raise EvaluationTimeout(
+                        f"Evaluation timed out after {timeout:g} seconds"
+                    )
+            reply: dict[str, Any] = worker.conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker)
+            with self._lock:
+                self._killed += 1
+            raise EvaluationKilled("Evaluation worker was killed") from None
+        finally:
+            with self._lock:
+                self._active -= 1
+
+        # Only jobs with a reply are timed, matching the average's divisor
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._eval_time_total += elapsed
+            self._eval_time_max = max(self._eval_time_max, elapsed)
+        self._idle.put(worker)
+
+        if "error" in reply:
+            with self._lock:
+                self._failed += 1
+            raise ExpressionError(reply["error"])
+
+        reply["arrays"] = import_arrays(reply["arrays"])
+
+        with self._lock:
+            self._completed += 1
+        return reply
+
+    def stats(self) -> dict[str, Any]:
+        """Return counters describing the pool's load and evaluation times.
+
+        Returns:
+            Dictionary of worker and job counts and evaluation timings.
+        """
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "idle": self._idle.qsize(),
+                "active": self._active,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timed_out": self._timed_out,
+                "killed": self._killed,
+                "cancelled": self._cancelled,
+                "eval_time_total": self._eval_time_total,
+                "eval_time_avg": (
+                    self._eval_time_total / finished if finished else 0.0
+                ),
+                "eval_time_max": self._eval_time_max,
+            }
+
+    def shutdown(self) -> None:
+        """Stop all worker processes."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._all)
+            self._all.clear()
+
+        for worker in workers:
+            worker.kill()
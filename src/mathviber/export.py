@@ -0,0 +1,462 @@
+"""Headless rendering of plots to files, without the web server.
+
+Items are read from a CSV or JSON Lines file with one plot per row, using
+the parameter names of ``/api/update_plot``. Each item is evaluated and
+drawn with the same code as the app and written to an output directory.
+A manifest in that directory records the parameters each file was rendered
+from, so a later run only renders items that are new or have changed.
+"""
+
+import csv
+import json
+import multiprocessing
+import os
+import shutil
+import uuid
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields
+from typing import Any
+
+from mathviber._version import __version__
+from mathviber.assets import asset_path
+from mathviber.cache import request_cache_key
+from mathviber.chunked import DEFAULT_CHUNK_SIZE
+from mathviber.decimate import decimate
+from mathviber.evaluation import sample_expression
+from mathviber.expressions import compile_expression
+from mathviber.figures import (
+    PLOT_CONFIG,
+    STATIC_HEIGHT,
+    STATIC_WIDTH,
+    build_interactive_figure,
+    build_static_figure,
+)
+from mathviber.sampling import SAMPLING_MODES
+
+OUTPUT_FORMATS = ("png", "svg", "html")
+
+# Records the parameters each output file was rendered from
+MANIFEST_NAME = ".mathviber-render.json"
+
+# Traces are reduced to what can be drawn at this many pixels; static images
+# are rendered at scale 2
+RENDER_WIDTH = 2 * STATIC_WIDTH
+
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off", ""}
+
+
+@dataclass(frozen=True)
+class RenderItem:
+    """Parameters of one plot to render.
+
+    Attributes:
+        expression: The mathematical expression.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        y_min: Minimum y value of the plot range, or None.
+        y_max: Maximum y value of the plot range, or None.
+        x_name: Label for x-axis.
+        y_name: Label for y-axis.
+        graph_title: Title for the graph.
+        x_log: Whether to use logarithmic scale for x-axis.
+        y_log: Whether to use logarithmic scale for y-axis.
+        num_points: Number of points, or the evaluation budget with
+            adaptive sampling.
+        sampling: ``"uniform"`` or ``"adaptive"``.
+        format: Output format, one of ``OUTPUT_FORMATS``.
+        name: Output file name without extension; defaults to a hash of
+            the parameters.
+    """
+
+    expression: str
+    x_min: float = -10.0
+    x_max: float = 10.0
+    y_min: float | None = None
+    y_max: float | None = None
+    x_name: str = "x"
+    y_name: str = "y"
+    graph_title: str = ""
+    x_log: bool = False
+    y_log: bool = False
+    num_points: int = 1000
+    sampling: str = "adaptive"
+    format: str = "png"
+    name: str | None = None
+
+    def key(self) -> str:
+        """Return a hash of everything the output file depends on.
+
+        Returns:
+            Hex digest of the plot parameters and the package version.
+        """
+        params = asdict(self)
+        params.pop("name")
+        return request_cache_key({"version": __version__, **params})
+
+    def filename(self) -> str:
+        """Return the name of the output file.
+
+        Returns:
+            File name with the format's extension.
+        """
+        return f"{self.name or 'plot_' + self.key()[:16]}.{self.format}"
+
+
+def _parse_bool(value: Any) -> bool:
+    """Convert a CSV or JSON value to a bool.
+
+    Args:
+        value: Bool, number or string such as ``"true"`` or ``"0"``.
+
+    Returns:
+        The parsed value.
+
+    Raises:
+        ValueError: If the value is not a recognized boolean.
+    """
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"Invalid boolean: {value!r}")
+
+
+def parse_item(raw: Mapping[str, Any], default_format: str = "png") -> RenderItem:
+    """Validate and convert one row of an items file.
+
+    Empty values, as produced by blank CSV cells, mean the default.
+
+    Args:
+        raw: Parameters by name.
+        default_format: Output format of items that do not set one.
+
+    Returns:
+        The render item.
+
+    Raises:
+        ValueError: If a parameter is unknown, missing or invalid.
+    """
+    unknown = set(raw) - {field.name for field in fields(RenderItem)}
+    if unknown:
+        names = ", ".join(sorted(map(str, unknown)))
+        raise ValueError(f"Unknown parameters: {names}")
+
+    values: dict[str, Any] = {"format": default_format}
+    for name, value in raw.items():
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        if name in ("x_min", "x_max", "y_min", "y_max"):
+            values[name] = float(value)
+        elif name == "num_points":
+            values[name] = int(value)
+        elif name in ("x_log", "y_log"):
+            values[name] = _parse_bool(value)
+        else:
+            values[name] = str(value).strip()
+
+    if not values.get("expression"):
+        raise ValueError("No expression provided")
+    item = RenderItem(**values)
+
+    if item.x_min >= item.x_max:
+        raise ValueError("X minimum must be less than X maximum")
+    if item.num_points < 3:
+        raise ValueError("Number of points must be at least 3")
+    if item.sampling not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {item.sampling}")
+    if item.format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown format: {item.format}")
+    if item.name is not None and (
+        os.path.basename(item.name) != item.name or item.name.startswith(".")
+    ):
+        raise ValueError(f"Invalid name: {item.name}")
+    return item
+
+
+def read_items(path: str, default_format: str = "png") -> Iterator[RenderItem]:
+    """Read render items from a CSV file or a JSON Lines file.
+
+    Files ending in ``.csv`` are read as CSV with a header row; any other
+    file is read as one JSON object per line. Blank lines are skipped.
+
+    Args:
+        path: Path of the items file.
+        default_format: Output format of items that do not set one.
+
+    Yields:
+        The render items in file order.
+
+    Raises:
+        ValueError: If a row is invalid; the message names the line.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(f)
+            rows: Iterable[tuple[int, Any]] = ((reader.line_num, row) for row in reader)
+        else:
+            rows = (
+                (number, line) for number, line in enumerate(f, start=1) if line.strip()
+            )
+
+        for number, row in rows:
+            try:
+                if isinstance(row, str):
+                    row = json.loads(row)
+                    if not isinstance(row, dict):
+                        raise ValueError("Expected a JSON object")
+                yield parse_item(row, default_format)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: {e}") from None
+
+
+def _write_atomically(path: str, write: Callable[[str], None]) -> None:
+    """Write a file under a temporary name and move it into place.
+
+    Args:
+        path: Final path of the file.
+        write: Called with the temporary path to write to.
+    """
+    partial_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(partial_path)
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def render_item(item: RenderItem, output_dir: str) -> str:
+    """Evaluate one item and write its plot file.
+
+    HTML files load Plotly.js from ``plotly.min.js`` in the same directory,
+    which ``render_items`` writes once.
+
+    Args:
+        item: The plot to render.
+        output_dir: Directory to write the file to.
+
+    Returns:
+        The name of the written file.
+
+    Raises:
+        ExpressionError: If the expression is rejected or fails.
+    """
+    import plotly.io as pio
+
+    kernel = compile_expression(item.expression)
+    x, y = sample_expression(
+        kernel,
+        item.x_min,
+        item.x_max,
+        num_points=item.num_points,
+        sampling=item.sampling,
+        x_log=item.x_log,
+        y_log=item.y_log,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        width=RENDER_WIDTH,
+    )
+    x, y = decimate(x, y, RENDER_WIDTH, x_log=item.x_log, y_log=item.y_log)
+
+    plot_options: dict[str, Any] = {
+        "x_name": item.x_name,
+        "y_name": item.y_name,
+        "graph_title": item.graph_title,
+        "x_log": item.x_log,
+        "y_log": item.y_log,
+        "y_min": item.y_min,
+        "y_max": item.y_max,
+    }
+    filename = item.filename()
+    path = os.path.join(output_dir, filename)
+
+    if item.format == "html":
+        fig = build_interactive_figure(item.expression, x, y, **plot_options)
+        _write_atomically(
+            path,
+            lambda partial: pio.write_html(
+                fig, partial, include_plotlyjs="directory", config=PLOT_CONFIG
+            ),
+        )
+    else:
+        fig = build_static_figure(item.expression, x, y, **plot_options)
+        _write_atomically(
+            path,
+            lambda partial: fig.write_image(
+                partial,
+                format=item.format,
+                width=STATIC_WIDTH,
+                height=STATIC_HEIGHT,
+                scale=2,
+            ),
+        )
+    return filename
+
+
+def _load_manifest(output_dir: str) -> dict[str, str]:
+    """Read the manifest of an output directory.
+
+    Args:
+        output_dir: The output directory.
+
+    Returns:
+        Parameter hash of each rendered file by name; empty if there is no
+        readable manifest.
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _save_manifest(output_dir: str, manifest: Mapping[str, str]) -> None:
+    """Write the manifest of an output directory.
+
+    Args:
+        output_dir: The output directory.
+        manifest: Parameter hash of each rendered file by name.
+    """
+
+    def write(partial: str) -> None:
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=0, sort_keys=True)
+
+    _write_atomically(os.path.join(output_dir, MANIFEST_NAME), write)
+
+
+def _write_plotlyjs(output_dir: str) -> None:
+    """Copy the Plotly.js bundle that HTML files load, if it is missing.
+
+    The bundle is the one the web app serves.
+
+    Args:
+        output_dir: The output directory.
+
+    Raises:
+        FileNotFoundError: If no Plotly.js bundle is installed.
+    """
+    path = os.path.join(output_dir, "plotly.min.js")
+    if os.path.exists(path):
+        return
+
+    source = asset_path("plotly.min.js")
+    if source is None:
+        raise FileNotFoundError("plotly.min.js")
+
+    def copy(partial: str) -> None:
+        shutil.copyfile(source, partial)
+
+    _write_atomically(path, copy)
+
+
+def render_items(
+    items: Iterable[RenderItem],
+    output_dir: str,
+    jobs: int | None = None,
+    force: bool = False,
+    progress: Callable[[str, str | None], None] | None = None,
+) -> dict[str, Any]:
+    """Render plot files, skipping those that are up to date.
+
+    A file is up to date if it exists and the manifest shows it was rendered
+    from the same parameters by the same package version. Items are rendered
+    in parallel worker processes; one failing item does not stop the others.
+
+    Args:
+        items: The plots to render.
+        output_dir: Directory to write the files to; created if missing.
+        jobs: Number of worker processes; defaults to the CPU count. With
+            one job, items are rendered in this process.
+        force: Whether to render up-to-date items again.
+        progress: Called with each rendered file name and its error, or
+            None on success.
+
+    Returns:
+        Dictionary with the ``rendered`` and ``skipped`` file names and the
+        ``failed`` ones as (file name, error message) pairs. An item whose
+        file name is taken by an earlier, different item fails as
+        ``"<file name> (item <number>)"`` and the earlier item is kept.
+
+    Raises:
+        ValueError: If ``jobs`` is below 1.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs < 1:
+        raise ValueError("jobs must be at least 1")
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+    summary: dict[str, Any] = {"rendered": [], "skipped": [], "failed": []}
+
+    pending: dict[str, RenderItem] = {}
+    keys: dict[str, str] = {}
+
+    def finish(filename: str, error: str | None) -> None:
+        if error is None:
+            manifest[filename] = pending[filename].key()
+            summary["rendered"].append(filename)
+        else:
+            manifest.pop(filename, None)
+            summary["failed"].append((filename, error))
+        if progress is not None:
+            progress(filename, error)
+
+    for number, item in enumerate(items, start=1):
+        filename = item.filename()
+        if filename in keys:
+            if keys[filename] != item.key():
+                # The first item keeps the name; only the duplicate fails
+                label = f"{filename} (item {number})"
+                summary["failed"].append((label, "Duplicate output name"))
+                if progress is not None:
+                    progress(label, "Duplicate output name")
+            continue
+        keys[filename] = item.key()
+        if (
+            not force
+            and manifest.get(filename) == item.key()
+            and os.path.exists(os.path.join(output_dir, filename))
+        ):
+            summary["skipped"].append(filename)
+            continue
+        pending[filename] = item
+
+    if any(item.format == "html" for item in pending.values()):
+        _write_plotlyjs(output_dir)
+
+    try:
+        if jobs == 1 or len(pending) <= 1:
+            for filename, item in pending.items():
+                try:
+                    render_item(item, output_dir)
+                except Exception as e:
+                    finish(filename, str(e))
+                else:
+                    finish(filename, None)
+        else:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            with ProcessPoolExecutor(
+                max_workers=min(jobs, len(pending)), mp_context=context
+            ) as executor:
+                futures = {
+                    executor.submit(render_item, item, output_dir): filename
+                    for filename, item in pending.items()
+                }
+                for future in as_completed(futures):
+                    error = future.exception()
+                    finish(futures[future], None if error is None else str(error))
+    finally:
+        # Keep the progress of an interrupted run
+        _save_manifest(output_dir, manifest)
+
+    return summary
@@ -0,0 +1,406 @@
+"""Validation and compilation of user supplied mathematical expressions."""
+
+import ast
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+# Functions and constants available to expressions
+ALLOWED_NAMES: dict[str, Any] = {
+    "x": None,  # Will be replaced with actual x values
+    "pi": np.pi,
+    "e": np.e,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "sqrt": np.sqrt,
+    "abs": np.abs,
+    "pow": np.power,
+    "sinh": np.sinh,
+    "cosh": np.cosh,
+    "tanh": np.tanh,
+    "arcsin": np.arcsin,
+    "arccos": np.arccos,
+    "arctan": np.arctan,
+}
+
+# Operators allowed in expressions
+ALLOWED_BINARY_OPS = (
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.Pow,
+    ast.Mod,
+    ast.FloorDiv,
+)
+ALLOWED_UNARY_OPS = (ast.UAdd, ast.USub)
+ALLOWED_COMPARE_OPS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+
+# Compiled expression: maps an array of x values to y values
+Kernel = Callable[[np.ndarray], Any]
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression is rejected or cannot be compiled."""
+
+
+def normalize_expression(expression: str) -> str:
+    """Normalize an expression to the form that is compiled.
+
+    Both ``^`` and ``**`` are accepted for powers.
+
+    Args:
+        expression: The mathematical expression.
+
+    Returns:
+        The expression with surrounding whitespace removed and ``^``
+        replaced by ``**``.
+    """
+    return expression.strip().replace("**", "^").replace("^", "**")
+
+
+class _Rejection(Exception):
+    """A problem located in the normalized form of an expression.
+
+    Positions are reported relative to the expression as typed, which
+    differs from the normalized form when it has surrounding whitespace or
+    ``^`` powers, so the message is completed by ``error``.
+    """
+
+    def __init__(self, message: str, offset: int, detail: str = "") -> None:
+        """Initialize the rejection.
+
+        Args:
+            message: Description of the problem.
+            offset: 0-based offset of the problem in the normalized
+                expression.
+            detail: Text appended after the position.
+        """
+        super().__init__(message)
+        self.message = message
+        self.offset = offset
+        self.detail = detail
+
+    def error(self, expression: str) -> ExpressionError:
+        """Build the error reported for an expression as typed.
+
+        Args:
+            expression: The expression as typed.
+
+        Returns:
+            ExpressionError mentioning the 1-based position of the problem
+            in ``expression``.
+        """
+        position = source_position(expression, self.offset) + 1
+        return ExpressionError(f"{self.message} at position {position}{self.detail}")
+
+
+def source_position(expression: str, offset: int) -> int:
+    """Map an offset in the normalized expression back to the typed one.
+
+    Args:
+        expression: The expression as typed.
+        offset: 0-based offset in ``normalize_expression(expression)``.
+
+    Returns:
+        The 0-based offset of the same character in ``expression``.
+    """
+    start = len(expression) - len(expression.lstrip())
+    stripped = expression.strip()
+    # Offset in the typed expression of each normalized character
+    positions = []
+    index = 0
+    while index < len(stripped):
+        if stripped.startswith("**", index):
+            positions += [index, index + 1]
+            index += 2
+        elif stripped[index] == "^":
+            positions += [index, index]
+            index += 1
+        else:
+            positions.append(index)
+            index += 1
+    # Syntax errors may point just past the end
+    positions.append(len(stripped))
+    return start + positions[min(max(offset, 0), len(positions) - 1)]
+
+
+def _reject(node: ast.AST, message: str) -> _Rejection:
+    """Build a rejection of a node, located at the node.
+
+    Args:
+        node: The offending AST node.
+        message: Description of the problem.
+
+    Returns:
+        Rejection at the column of the node in the normalized expression.
+    """
+    return _Rejection(message, getattr(node, "col_offset", 0))
+
+
+def _check_node(node: ast.AST) -> None:
+    """Recursively check that a node only uses whitelisted syntax and names.
+
+    Args:
+        node: AST node to check.
+
+    Raises:
+        _Rejection: If the node or one of its children is not allowed.
+    """
+    if isinstance(node, ast.Expression):
+        _check_node(node.body)
+    elif isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(
+            node.value, int | float | complex
+        ):
+            raise _reject(node, f"Unsupported constant {node.value!r}")
+    elif isinstance(node, ast.Name):
+        if node.id not in ALLOWED_NAMES:
+            raise _reject(node, f"Unknown name '{node.id}'")
+        if callable(ALLOWED_NAMES[node.id]):
+            raise _reject(node, f"Function '{node.id}' must be called")
+    elif isinstance(node, ast.BinOp):
+        if not isinstance(node.op, ALLOWED_BINARY_OPS):
+            raise _reject(node, f"Unsupported operator {type(node.op).__name__}")
+        _check_node(node.left)
+        _check_node(node.right)
+    elif isinstance(node, ast.UnaryOp):
+        if not isinstance(node.op, ALLOWED_UNARY_OPS):
+            raise _reject(node, f"Unsupported operator {type(node.op).__name__}")
+        _check_node(node.operand)
+    elif isinstance(node, ast.Compare):
+        if len(node.ops) != 1 or not isinstance(node.ops[0], ALLOWED_COMPARE_OPS):
+            raise _reject(node, "Unsupported comparison")
+        _check_node(node.left)
+        _check_node(node.comparators[0])
+    elif isinstance(node, ast.Call):
+        func = node.func
+        if not isinstance(func, ast.Name) or not callable(ALLOWED_NAMES.get(func.id)):
+            name = func.id if isinstance(func, ast.Name) else ast.unparse(func)
+            raise _reject(func, f"Unknown function '{name}'")
+        if node.keywords:
+            raise _reject(node.keywords[0], "Keyword arguments are not supported")
+        # Extra positional arguments of a ufunc are output buffers
+        expected = getattr(ALLOWED_NAMES[func.id], "nin", len(node.args))
+        if len(node.args) != expected:
+            plural = "" if expected == 1 else "s"
+            raise _reject(
+                node, f"Function '{func.id}' takes {expected} argument{plural}"
+            )
+        for arg in node.args:
+            if isinstance(arg, ast.Starred):
+                raise _reject(arg, "Argument unpacking is not supported")
+            _check_node(arg)
+    else:
+        raise _reject(node, f"Unsupported syntax '{type(node).__name__}'")
+
+
+def _parse_normalized(source: str) -> ast.Expression:
+    """Parse a normalized expression and check it against the whitelist.
+
+    Args:
+        source: The normalized expression.
+
+    Returns:
+        The validated expression AST.
+
+    Raises:
+        _Rejection: If the expression is invalid or not allowed at a known
+            position.
+        ExpressionError: If the expression is too complex to parse.
+    """
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        detail = f": {e.msg}" if e.msg and e.msg != "invalid syntax" else ""
+        if e.offset:
+            raise _Rejection("Invalid syntax", e.offset - 1, detail) from e
+        raise ExpressionError(f"Invalid syntax{detail}") from e
+    except (RecursionError, MemoryError, ValueError) as e:
+        raise ExpressionError("Expression is too complex") from e
+
+    try:
+        _check_node(tree)
+    except RecursionError as e:
+        raise ExpressionError("Expression is too complex") from e
+    return tree
+
+
+def parse_expression(expression: str) -> ast.Expression:
+    """Parse an expression and check it against the whitelist.
+
+    Args:
+        expression: The mathematical expression.
+
+    Returns:
+        The validated expression AST.
+
+    Raises:
+        ExpressionError: If the expression is invalid or not allowed.
+    """
+    try:
+        return _parse_normalized(normalize_expression(expression))
+    except _Rejection as e:
+        raise e.error(expression) from None
+
+
+def _compile_normalized(source: str) -> Kernel:
+    """Validate a normalized expression and compile it to a NumPy kernel.
+
+    Args:
+        source: The normalized expression.
+
+    Returns:
+        Function mapping an array of x values to y values.
+
+    Raises:
+        _Rejection: If the expression is invalid or not allowed at a known
+            position.
+        ExpressionError: If the expression cannot be compiled.
+    """
+    tree = _parse_normalized(source)
+
+    # Integer literals become floats, so constant powers such as 9**9**9
+    # overflow at once instead of running in arbitrary precision
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, int):
+            try:
+                node.value = float(node.value)
+            except OverflowError:
+                raise _reject(node, "Number is too large") from None
+
+    lambda_node = ast.Lambda(
+        args=ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg(arg="x")],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        ),
+        body=tree.body,
+    )
+    module = ast.Expression(body=lambda_node)
+    ast.fix_missing_locations(module)
+
+    try:
+        code = compile(module, "<expression>", "eval")
+    except (RecursionError, MemoryError, ValueError) as e:
+        raise ExpressionError("Expression is too complex") from e
+
+    namespace = {k: v for k, v in ALLOWED_NAMES.items() if k != "x"}
+    namespace["__builtins__"] = {}
+    kernel: Kernel = eval(code, namespace)
+    return kernel
+
+
+def compile_expression(expression: str) -> Kernel:
+    """Validate an expression and compile it to a vectorized NumPy kernel.
+
+    The expression becomes the body of ``lambda x: ...`` whose only free
+    names are the whitelisted NumPy functions and constants, so calling the
+    kernel on an array evaluates the whole expression with NumPy ufuncs.
+
+    Args:
+        expression: The mathematical expression.
+
+    Returns:
+        Function mapping an array of x values to y values.
+
+    Raises:
+        ExpressionError: If the expression is invalid or not allowed.
+    """
+    try:
+        return _compile_normalized(normalize_expression(expression))
+    except _Rejection as e:
+        raise e.error(expression) from None
+
+
+class ExpressionCache:
+    """Thread-safe LRU cache of compiled expression kernels.
+
+    Entries are keyed by the normalized expression. Rejected expressions are
+    cached as well, so repeated evaluations skip validation entirely; the
+    position in their error message is mapped to each spelling on a hit.
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of expressions kept; 0 disables caching.
+        """
+        self.maxsize = maxsize
+        # Values are kernels, or the rejections or error messages of
+        # rejected expressions
+        self._entries: OrderedDict[str, Kernel | _Rejection | str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, expression: str) -> Kernel:
+        """Return the compiled kernel, compiling it on a cache miss.
+
+        Args:
+            expression: The mathematical expression.
+
+        Returns:
+            Function mapping an array of x values to y values.
+
+        Raises:
+            ExpressionError: If the expression is forbidden or invalid.
+        """
+        key = normalize_expression(expression)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is None:
+            try:
+                entry = _compile_normalized(key)
+            except _Rejection as e:
+                entry = e
+            except ExpressionError as e:
+                entry = str(e)
+            if self.maxsize > 0:
+                with self._lock:
+                    self._entries[key] = entry
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+
+        if isinstance(entry, _Rejection):
+            raise entry.error(expression)
+        if isinstance(entry, str):
+            raise ExpressionError(entry)
+        return entry
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return cache size and hit/miss counters.
+
+        Returns:
+            Dictionary with the cache size limit, entry count, hits and misses.
+        """
+        with self._lock:
+            return {
+                "maxsize": self.maxsize,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,445 @@
+"""Plotly figures of MathViber plots, shared by the app and offline rendering.
+
+Plotly is imported on first use, so importing this module stays fast.
+"""
+
+import functools
+import uuid
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from mathviber.encoding import encode_trace_array
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Plotly.js configuration of interactive plots
+PLOT_CONFIG: dict[str, Any] = {
+    "displayModeBar": True,
+    "displaylogo": False,
+    "modeBarButtonsToAdd": ["downloadSvg"],
+    "toImageButtonOptions": {
+        "format": "png",
+        "filename": "mathviber_plot",
+        "height": 500,
+        "width": 800,
+        "scale": 2,
+    },
+}
+
+# Size in pixels of static images, rendered at scale 2
+STATIC_WIDTH = 800
+STATIC_HEIGHT = 500
+
+# Styling of interactive plots, built once and shared by every figure.
+# ``fill_layout`` adds the per-plot title, axis titles, types and range on
+# copies, so these dictionaries must not be modified.
+INTERACTIVE_AXIS: dict[str, Any] = {
+    "gridcolor": "lightgray",
+    "gridwidth": 1,
+    "zeroline": True,
+    "zerolinecolor": "black",
+    "zerolinewidth": 1,
+}
+INTERACTIVE_LAYOUT: dict[str, Any] = {
+    "title": {"x": 0.5, "font": {"size": 16, "family": "Arial"}},
+    "font": {"family": "Arial", "size": 12},
+    "plot_bgcolor": "white",
+    "paper_bgcolor": "white",
+    "showlegend": False,
+    "margin": {"l": 60, "r": 60, "t": 60, "b": 60},
+    "height": 500,
+    "xaxis": INTERACTIVE_AXIS,
+    "yaxis": INTERACTIVE_AXIS,
+}
+
+# Styling of static images for download
+STATIC_AXIS: dict[str, Any] = {"gridcolor": "lightgray", "zeroline": True}
+STATIC_LAYOUT: dict[str, Any] = {
+    "title": {"x": 0.5, "font": {"size": 16}},
+    "font": {"size": 12},
+    "plot_bgcolor": "white",
+    "paper_bgcolor": "white",
+    "showlegend": False,
+    "width": STATIC_WIDTH,
+    "height": STATIC_HEIGHT,
+    "xaxis": STATIC_AXIS,
+    "yaxis": STATIC_AXIS,
+}
+
+
+def fill_layout(
+    base: dict[str, Any],
+    title: str,
+    x_name: str,
+    y_name: str,
+    x_log: bool,
+    y_log: bool,
+    y_axis_range: list[float] | None,
+    showlegend: bool = False,
+) -> dict[str, Any]:
+    """Fill in the per-plot fields of a prebuilt layout.
+
+    Only the dictionaries holding per-plot fields are copied; the styling
+    is shared with ``base``.
+
+    Args:
+        base: Prebuilt layout, such as ``INTERACTIVE_LAYOUT``.
+        title: Title for the graph.
+        x_name: Label for x-axis.
+        y_name: Label for y-axis.
+        x_log: Whether to use logarithmic scale for x-axis.
+        y_log: Whether to use logarithmic scale for y-axis.
+        y_axis_range: Y-axis range, or None to autorange.
+        showlegend: Whether to show the trace legend.
+
+    Returns:
+        The Plotly layout as a plain dictionary.
+    """
+    layout = {**base, "title": {**base["title"], "text": title}}
+    layout["showlegend"] = showlegend
+    layout["xaxis"] = {
+        **base["xaxis"],
+        "title": {"text": x_name},
+        "type": "log" if x_log else "linear",
+    }
+    layout["yaxis"] = {
+        **base["yaxis"],
+        "title": {"text": y_name},
+        "type": "log" if y_log else "linear",
+    }
+    if y_axis_range is not None:
+        layout["yaxis"]["range"] = y_axis_range
+    return layout
+
+
+def interactive_figure_spec(
+    expression: str,
+    x: np.ndarray,
+    y: np.ndarray,
+    x_name: str = "x",
+    y_name: str = "y",
+    graph_title: str = "",
+    x_log: bool = False,
+    y_log: bool = False,
+    y_min: float | None = None,
+    y_max: float | None = None,
+) -> dict[str, Any]:
+    """Build the figure shown in the interactive plot as a plain dictionary.
+
+    The trace keeps the NumPy arrays, to be encoded by the caller.
+
+    Args:
+        expression: The mathematical expression.
+        x: X values.
+        y: Y values.
+        x_name: Label for x-axis.
+        y_name: Label for y-axis.
+        graph_title: Title for the graph.
+        x_log: Whether to use logarithmic scale for x-axis.
+        y_log: Whether to use logarithmic scale for y-axis.
+        y_min: Minimum y value for plot range.
+        y_max: Maximum y value for plot range.
+
+    Returns:
+        Dictionary with ``data`` and ``layout`` keys.
+    """
+    trace = {
+        "type": "scatter",
+        "x": x,
+        "y": y,
+        "mode": "lines",
+        "name": f"{y_name} = {expression}",
+        "line": {"color": "#2196F3", "width": 2},
+        "hovertemplate": (
+            f"<b>{x_name}:</b> %{{x}}<br><b>{y_name}:</b> %{{y}}<extra></extra>"
+        ),
+    }
+
+    # Set title
+    title = graph_title if graph_title else f"{y_name} = {expression}"
+
+    layout = fill_layout(
+        INTERACTIVE_LAYOUT,
+        title,
+        x_name,
+        y_name,
+        x_log,
+        y_log,
+        compute_y_range(y, y_min, y_max),
+    )
+    return {"data": [trace], "layout": layout}
+
+
+def batch_figure_spec(
+    curves: list[tuple[str, np.ndarray, np.ndarray]],
+    x_name: str = "x",
+    y_name: str = "y",
+    graph_title: str = "",
+    x_log: bool = False,
+    y_log: bool = False,
+    y_min: float | None = None,
+    y_max: float | None = None,
+) -> dict[str, Any]:
+    """Build an interactive figure overlaying several curves.
+
+    The traces keep the NumPy arrays, to be encoded by the caller.
+
+    Args:
+        curves: List of (expression, x_values, y_values), one per trace.
+        x_name: Label for x-axis.
+        y_name: Label for y-axis.
+        graph_title: Title for the graph.
+        x_log: Whether to use logarithmic scale for x-axis.
+        y_log: Whether to use logarithmic scale for y-axis.
+        y_min: Minimum y value for plot range.
+        y_max: Maximum y value for plot range.
+
+    Returns:
+        Dictionary with ``data`` and ``layout`` keys, one trace per curve.
+    """
+    # Traces take their colors from the default colorway
+    traces = [
+        {
+            "type": "scatter",
+            "x": x,
+            "y": y,
+            "mode": "lines",
+            "name": f"{y_name} = {expression}",
+            "line": {"width": 2},
+            "hovertemplate": f"<b>{expression}</b><br><b>{x_name}:</b> %{{x}}"
+            f"<br><b>{y_name}:</b> %{{y}}<extra></extra>",
+        }
+        for expression, x, y in curves
+    ]
+
+    all_y = np.concatenate([y for _, _, y in curves]) if curves else np.empty(0)
+    layout = fill_layout(
+        INTERACTIVE_LAYOUT,
+        graph_title,
+        x_name,
+        y_name,
+        x_log,
+        y_log,
+        compute_y_range(all_y, y_min, y_max),
+        showlegend=True,
+    )
+    return {"data": traces, "layout": layout}
+
+
+def encode_figure(figure: dict[str, Any], encoding: str) -> dict[str, Any]:
+    """Encode the trace arrays of a figure spec for JSON.
+
+    Args:
+        figure: Figure spec holding NumPy arrays, modified in place.
+        encoding: Array encoding, one of ``ARRAY_ENCODINGS``.
+
+    Returns:
+        The figure spec.
+    """
+    for trace in figure["data"]:
+        trace["x"] = encode_trace_array(trace["x"], encoding)
+        trace["y"] = encode_trace_array(trace["y"], encoding)
+    return figure
+
+
+def to_figure(figure: dict[str, Any]) -> "go.Figure":
+    """Wrap a figure spec in a Plotly figure without validating it.
+
+    The specs built here are checked against Plotly's schema by the tests,
+    so the per-property validation of ``graph_objects`` is skipped.
+
+    Args:
+        figure: Figure spec.
+
+    Returns:
+        The Plotly figure.
+    """
+    import plotly.graph_objects as go
+
+    return go.Figure(figure, _validate=False)
+
+
+@functools.cache
+def _default_template() -> dict[str, Any]:
+    """Return the default Plotly template as a plain dictionary.
+
+    Returns:
+        The ``plotly`` template, which ``graph_objects`` figures embed.
+    """
+    import plotly.io as pio
+
+    template: dict[str, Any] = pio.templates["plotly"].to_plotly_json()
+    return template
+
+
+def build_interactive_figure(
+    expression: str, x: np.ndarray, y: np.ndarray, **plot_options: Any
+) -> "go.Figure":
+    """Build the figure shown in the interactive plot.
+
+    Args:
+        expression: The mathematical expression.
+        x: X values.
+        y: Y values.
+        **plot_options: Keyword arguments for ``interactive_figure_spec``.
+
+    Returns:
+        The styled Plotly figure.
+    """
+    return to_figure(interactive_figure_spec(expression, x, y, **plot_options))
+
+
+def compute_y_range(
+    y: np.ndarray, y_min: float | None, y_max: float | None
+) -> list[float] | None:
+    """Compute the y-axis range from optional user limits.
+
+    A missing limit is filled in from the 5th or 95th percentile of the
+    finite y values.
+
+    Args:
+        y: Y values.
+        y_min: Minimum y value for plot range.
+        y_max: Maximum y value for plot range.
+
+    Returns:
+        The [min, max] range, or None to let Plotly autorange.
+    """
+    if y_min is not None and y_max is not None:
+        return [y_min, y_max]
+    if y_min is not None or y_max is not None:
+        finite_y = y[np.isfinite(y)]
+        if len(finite_y) > 0:
+            auto_y_min, auto_y_max = np.percentile(finite_y, [5, 95])
+            return [
+                y_min if y_min is not None else auto_y_min,
+                y_max if y_max is not None else auto_y_max,
+            ]
+    return None
+
+
+def create_interactive_plot(
+    expression: str,
+    x: np.ndarray,
+    y: np.ndarray,
+    include_plotlyjs: bool | str = False,
+    encoding: str = "text",
+    **plot_options: Any,
+) -> tuple[str, str]:
+    """Create an interactive Plotly plot.
+
+    Args:
+        expression: The mathematical expression.
+        x: X values.
+        y: Y values.
+        include_plotlyjs: How to include Plotly.js, as for
+            ``plotly.io.to_html``. By default the fragment relies on the
+            page loading Plotly.js, which the app serves itself.
+        encoding: Array encoding, one of ``ARRAY_ENCODINGS``. Binary
+            encodings need a Plotly.js that decodes typed arrays.
+        **plot_options: Keyword arguments for
+            ``interactive_figure_spec``.
+
+    Returns:
+        Tuple of (plot_html, plot_id).
+    """
+    import plotly.io as pio
+
+    figure = encode_figure(
+        interactive_figure_spec(expression, x, y, **plot_options), encoding
+    )
+    figure["layout"]["template"] = _default_template()
+
+    # Generate plot HTML and unique ID
+    plot_id = f"plot_{uuid.uuid4().hex}"
+    plot_html = pio.to_html(
+        figure,
+        include_plotlyjs=include_plotlyjs,
+        div_id=plot_id,
+        config=PLOT_CONFIG,
+        validate=False,
+    )
+
+    return plot_html, plot_id
+
+
+def create_figure_json(
+    expression: str,
+    x: np.ndarray,
+    y: np.ndarray,
+    encoding: str = "text",
+    **plot_options: Any,
+) -> dict[str, Any]:
+    """Create a compact JSON figure spec for ``Plotly.react``.
+
+    Only trace data and layout are returned. The default Plotly template
+    is left out because the layout sets the styling explicitly.
+
+    Args:
+        expression: The mathematical expression.
+        x: X values.
+        y: Y values.
+        encoding: Array encoding, one of ``ARRAY_ENCODINGS``.
+        **plot_options: Keyword arguments for
+            ``interactive_figure_spec``.
+
+    Returns:
+        Dictionary with ``data`` and ``layout`` keys.
+    """
+    figure = interactive_figure_spec(expression, x, y, **plot_options)
+    return encode_figure(figure, encoding)
+
+
+def build_static_figure(
+    expression: str,
+    x: np.ndarray,
+    y: np.ndarray,
+    x_name: str = "x",
+    y_name: str = "y",
+    graph_title: str = "",
+    x_log: bool = False,
+    y_log: bool = False,
+    y_min: float | None = None,
+    y_max: float | None = None,
+) -> "go.Figure":
+    """Build the figure of a static image for download.
+
+    Args:
+        expression: The mathematical expression.
+        x: X values.
+        y: Y values.
+        x_name: Label for x-axis.
+        y_name: Label for y-axis.
+        graph_title: Title for the graph.
+        x_log: Whether to use logarithmic scale for x-axis.
+        y_log: Whether to use logarithmic scale for y-axis.
+        y_min: Minimum y value for plot range.
+        y_max: Maximum y value for plot range.
+
+    Returns:
+        The styled Plotly figure.
+    """
+    # Create the same plot as interactive but save as static image
+    trace = {
+        "type": "scatter",
+        "x": x,
+        "y": y,
+        "mode": "lines",
+        "name": f"{y_name} = {expression}",
+        "line": {"color": "#2196F3", "width": 2},
+    }
+
+    title = graph_title if graph_title else f"{y_name} = {expression}"
+
+    layout = fill_layout(
+        STATIC_LAYOUT,
+        title,
+        x_name,
+        y_name,
+        x_log,
+        y_log,
+        compute_y_range(y, y_min, y_max),
+    )
+    return to_figure({"data": [trace], "layout": layout})
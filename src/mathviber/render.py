@@ -0,0 +1,261 @@
+"""Bounded worker pool for static image rendering."""
+
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import CancelledError, Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, TypeVar
+
+from mathviber.cancel import SUPERSEDED_MESSAGE, Cancelled
+
+T = TypeVar("T")
+
+
+class RenderQueueFull(Exception):
+    """Raised when a render job is rejected because the queue is full."""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render job does not finish within its timeout."""
+
+
+class RenderPool:
+    """A fixed set of long-lived worker threads that run render jobs.
+
+    Workers are started on the first submitted job and stay alive until
+    ``shutdown`` is called, so Kaleido's renderer process is started once and
+    reused rather than paid for inside every request. Jobs wait in a bounded
+    queue; when it is full new jobs are rejected immediately so callers can
+    apply backpressure. Queued jobs whose request has been superseded are
+    dropped without rendering.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        queue_size: int = 16,
+        timeout: float = 30.0,
+        warmup: bool = False,
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            workers: Number of worker threads.
+            queue_size: Maximum number of jobs waiting for a worker.
+            timeout: Default number of seconds to wait for a job in ``run``.
+            warmup: Whether to start a persistent Kaleido renderer when the
+                workers start.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.warmup = warmup
+
+        self._queue: queue.Queue[
+            tuple[Future[Any], Callable[[], Any], Callable[[], bool] | None] | None
+        ] = queue.Queue(maxsize=queue_size)
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self._kaleido_server = False
+
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._cancelled = 0
+        self._render_time_total = 0.0
+        self._render_time_max = 0.0
+
+    def _start(self) -> None:
+        """Start the worker threads and the optional warm renderer."""
+        if self.warmup:
+            try:
+                import kaleido
+
+                kaleido.start_sync_server(n=self.workers, silence_warnings=True)
+                self._kaleido_server = True
+            except Exception:
+                # Warm-up is best effort; older Kaleido releases manage their
+                # own persistent process and renders still work without it
+                self._kaleido_server = False
+
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"mathviber-render-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        self._started = True
+
+    def _work(self) -> None:
+        """Run jobs from the queue until a shutdown sentinel is received."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+
+                future, func, cancelled = item
+                if cancelled is not None and cancelled():
+                    future.cancel()
+                    with self._lock:
+                        self._cancelled += 1
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                with self._lock:
+                    self._active += 1
+                started = time.perf_counter()
+                try:
+                    result = func()
+                except Exception as e:
+                    future.set_exception(e)
+                    failed = True
+                else:
+                    future.set_result(result)
+                    failed = False
+                elapsed = time.perf_counter() - started
+
+                with self._lock:
+                    self._active -= 1
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+                    self._render_time_total += elapsed
+                    self._render_time_max = max(self._render_time_max, elapsed)
+            finally:
+                self._queue.task_done()
+
+    def submit(
+        self, func: Callable[[], T], cancelled: Callable[[], bool] | None = None
+    ) -> "Future[T]":
+        """Queue a render job without waiting for it.
+
+        Args:
+            func: Callable performing the render.
+            cancelled: Predicate checked when a worker picks up the job; the
+                job is cancelled instead of run if it returns True.
+
+        Returns:
+            Future resolved with the callable's result.
+
+        Raises:
+            RenderQueueFull: If the queue has no free slot.
+            RuntimeError: If the pool has been shut down.
+        """
+        future: Future[T] = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Render pool has been shut down")
+            if not self._started:
+                self._start()
+            try:
+                self._queue.put_nowait((future, func, cancelled))
+            except queue.Full:
+                self._rejected += 1
+                raise RenderQueueFull(
+                    f"Render queue is full ({self.queue_size} jobs waiting)"
+                ) from None
+            self._submitted += 1
+        return future
+
+    def run(
+        self,
+        func: Callable[[], T],
+        timeout: float | None = None,
+        cancelled: Callable[[], bool] | None = None,
+    ) -> T:
+        """Queue a render job and wait for its result.
+
+        A job that times out while still queued is cancelled. A job that is
+        already running is left to finish, but its result is discarded.
+
+        Args:
+            func: Callable performing the render.
+            timeout: Seconds to wait; defaults to the pool's timeout.
+            cancelled: Predicate checked when a worker picks up the job.
+
+        Returns:
+            The callable's result.
+
+        Raises:
+            RenderQueueFull: If the queue has no free slot.
+            RenderTimeout: If the job does not finish in time.
+            Cancelled: If the job was dropped because ``cancelled`` returned
+                True.
+        """
+        future = self.submit(func, cancelled=cancelled)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except CancelledError:
+            raise Cancelled(SUPERSEDED_MESSAGE) from None
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timed_out += 1
+            raise RenderTimeout("Plot rendering timed out") from None
+
+    def stats(self) -> dict[str, Any]:
+        """Return counters describing the pool's load and render times.
+
+        Returns:
+            Dictionary of queue depth, job counts and render timings.
+        """
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queue_depth": self._queue.qsize(),
+                "active": self._active,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "cancelled": self._cancelled,
+                "render_time_total": self._render_time_total,
+                "render_time_avg": (
+                    self._render_time_total / finished if finished else 0.0
+                ),
+                "render_time_max": self._render_time_max,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and stop the workers once the queue drains.
+
+        Args:
+            wait: Whether to block until the workers have exited.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads = list(self._threads)
+
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+        if self._kaleido_server:
+            try:
+                import kaleido
+
+                kaleido.stop_sync_server(silence_warnings=True)
+            except Exception:
+                pass
+            self._kaleido_server = False
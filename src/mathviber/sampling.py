@@ -0,0 +1,263 @@
+"""Sampling strategies for evaluating expressions over an x range."""
+
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+SAMPLING_MODES = ("uniform", "adaptive")
+
+
+def evaluate_kernel(kernel: Callable[[np.ndarray], Any], x: np.ndarray) -> np.ndarray:
+    """Evaluate a kernel and return a float array shaped like ``x``.
+
+    Args:
+        kernel: Function mapping x values to y values.
+        x: X values.
+
+    Returns:
+        Y values, broadcast to the shape of ``x`` for constant expressions.
+    """
+    y = np.asarray(kernel(x), dtype=float)
+    if y.shape != x.shape:
+        y = np.broadcast_to(y, x.shape).copy()
+    return y
+
+
+def uniform_sample(
+    kernel: Callable[[np.ndarray], Any], x_min: float, x_max: float, num_points: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Evaluate a kernel on evenly spaced points.
+
+    Args:
+        kernel: Function mapping x values to y values.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        num_points: Number of points to evaluate.
+
+    Returns:
+        Tuple of (x_values, y_values).
+    """
+    x = np.linspace(x_min, x_max, num_points)
+    return x, evaluate_kernel(kernel, x)
+
+
+def uniform_sample_into(
+    kernel: Callable[[np.ndarray], Any],
+    x_min: float,
+    x_max: float,
+    x_out: np.ndarray,
+    y_out: np.ndarray,
+    block_size: int = 1 << 16,
+) -> None:
+    """Evaluate a kernel on evenly spaced points, writing into given arrays.
+
+    The result equals ``uniform_sample`` with ``x_out.size`` points, but it
+    is built in place block by block, so only block-sized temporaries are
+    allocated besides the outputs.
+
+    Args:
+        kernel: Function mapping x values to y values.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        x_out: One-dimensional float array receiving the x values.
+        y_out: Array of the same size receiving the y values.
+        block_size: Number of points computed per block.
+    """
+    n = x_out.size
+    # Same arithmetic as np.linspace, so the values match bit for bit
+    div = max(n - 1, 1)
+    delta = np.subtract(x_max, x_min, dtype=float)
+    step = delta / div
+    for start in range(0, n, block_size):
+        block = x_out[start : start + block_size]
+        block[...] = np.arange(start, start + block.size)
+        if step == 0:
+            block /= div
+            block *= delta
+        else:
+            block *= step
+        block += x_min
+    if n > 1:
+        x_out[-1] = x_max
+
+    for start in range(0, n, block_size):
+        stop = start + block_size
+        y_out[start:stop] = evaluate_kernel(kernel, x_out[start:stop])
+
+
+def _robust_band(y: np.ndarray) -> tuple[float, float, float]:
+    """Return the central band of finite y values and its height.
+
+    Percentiles are used so that samples close to an asymptote do not
+    flatten the rest of the curve.
+
+    Args:
+        y: Y values.
+
+    Returns:
+        Tuple of (low, high, scale) where scale is never zero.
+    """
+    finite = y[np.isfinite(y)]
+    if finite.size == 0:
+        return 0.0, 0.0, 1.0
+    low, high = np.percentile(finite, [2, 98])
+    scale = high - low
+    if scale <= 0:
+        scale = max(float(np.max(np.abs(finite))), 1.0)
+    return float(low), float(high), float(scale)
+
+
+def _interval_errors(u: np.ndarray, v: np.ndarray, scale: float) -> np.ndarray:
+    """Estimate the drawing error of each interval in normalized units.
+
+    The error at an interior sample is its distance from the chord through
+    its neighbours, relative to the plot height. Each interval takes the
+    larger error of its two end points. Intervals between a finite and a
+    non-finite sample get an infinite error, so domain edges are located.
+
+    Args:
+        u: Sample positions (in plot coordinates).
+        v: Sample values (in plot coordinates).
+        scale: Plot height used to normalize errors.
+
+    Returns:
+        Array of ``len(u) - 1`` interval errors.
+    """
+    deviation = np.zeros_like(v)
+    du = u[2:] - u[:-2]
+    chord = v[:-2] + (v[2:] - v[:-2]) * (u[1:-1] - u[:-2]) / du
+    with np.errstate(invalid="ignore"):
+        deviation[1:-1] = np.abs(v[1:-1] - chord) / scale
+    deviation[~np.isfinite(deviation)] = 0.0
+
+    errors: np.ndarray = np.maximum(deviation[:-1], deviation[1:])
+    finite = np.isfinite(v)
+    errors[finite[:-1] != finite[1:]] = np.inf
+    return errors
+
+
+def _find_breaks(v: np.ndarray, jump_ratio: float) -> np.ndarray:
+    """Find intervals that span a discontinuity or an asymptote.
+
+    An interval is a break when its rise is large and either dwarfs the rise
+    of both neighbouring intervals (a jump), or it leaves the central band
+    of the curve on one side and re-enters from the other (an asymptote).
+
+    Args:
+        v: Sample values (in plot coordinates).
+        jump_ratio: How many times larger than its neighbours a jump must be.
+
+    Returns:
+        Indices of intervals to break.
+    """
+    if v.size < 2:
+        return np.empty(0, dtype=int)
+
+    low, high, scale = _robust_band(v)
+    with np.errstate(invalid="ignore"):
+        rise = np.abs(np.diff(v)) / scale
+    rise[~np.isfinite(rise)] = 0.0
+
+    neighbours = np.zeros_like(rise)
+    neighbours[1:] = rise[:-1]
+    neighbours[:-1] = np.maximum(neighbours[:-1], rise[1:])
+    jumps = (rise > 0.05) & (rise > jump_ratio * neighbours)
+
+    with np.errstate(invalid="ignore"):
+        above = v > high + scale
+        below = v < low - scale
+    asymptotes = (above[:-1] & below[1:]) | (below[:-1] & above[1:])
+
+    return np.flatnonzero(jumps | asymptotes)
+
+
+def adaptive_sample(
+    kernel: Callable[[np.ndarray], Any],
+    x_min: float,
+    x_max: float,
+    budget: int = 1000,
+    max_depth: int = 12,
+    tolerance: float = 5e-4,
+    jump_ratio: float = 8.0,
+    x_log: bool = False,
+    y_log: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Evaluate a kernel with more samples where the curve bends.
+
+    Sampling starts from a coarse uniform grid. Each round bisects the
+    intervals whose chord deviates from the curve by more than
+    ``tolerance`` of the plot height, largest errors first, all midpoints
+    being evaluated in a single vectorized call. Refinement stops when no
+    interval needs it, the evaluation budget is spent or intervals reach
+    ``max_depth`` bisections. Detected jumps and asymptotes are broken with
+    a NaN sample so Plotly does not draw a line across them.
+
+    Args:
+        kernel: Function mapping x values to y values.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        budget: Maximum number of kernel evaluations.
+        max_depth: Maximum number of times an initial interval is bisected.
+        tolerance: Acceptable chord error as a fraction of the plot height.
+        jump_ratio: How many times larger than its neighbours an interval's
+            rise must be to count as a discontinuity.
+        x_log: Sample evenly in log space, as drawn on a log x-axis.
+        y_log: Measure errors in log space, as drawn on a log y-axis.
+
+    Returns:
+        Tuple of (x_values, y_values), possibly including NaN breaks.
+
+    Raises:
+        ValueError: If the budget is smaller than 3.
+    """
+    if budget < 3:
+        raise ValueError("Sampling budget must be at least 3")
+
+    # Work in plot coordinates so refinement follows what is drawn
+    log_x = x_log and x_min > 0
+
+    def to_x(u: np.ndarray) -> np.ndarray:
+        return np.power(10.0, u) if log_x else u
+
+    def to_v(y: np.ndarray) -> np.ndarray:
+        if not y_log:
+            return y
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(y > 0, np.log10(np.where(y > 0, y, 1.0)), np.nan)
+
+    u_min, u_max = (np.log10(x_min), np.log10(x_max)) if log_x else (x_min, x_max)
+    initial_points = max(3, min(budget, budget // 8 + 1))
+    u = np.linspace(u_min, u_max, initial_points)
+    y = evaluate_kernel(kernel, to_x(u))
+    v = to_v(y)
+    depth = np.zeros(initial_points - 1, dtype=int)
+    evaluations = initial_points
+
+    while evaluations < budget:
+        errors = _interval_errors(u, v, _robust_band(v)[2])
+        candidates = np.flatnonzero((errors > tolerance) & (depth < max_depth))
+        if candidates.size == 0:
+            break
+
+        remaining = budget - evaluations
+        if candidates.size > remaining:
+            worst = np.argsort(errors[candidates])[::-1][:remaining]
+            candidates = np.sort(candidates[worst])
+
+        u_mid = (u[candidates] + u[candidates + 1]) / 2
+        y_mid = evaluate_kernel(kernel, to_x(u_mid))
+        evaluations += candidates.size
+
+        u = np.insert(u, candidates + 1, u_mid)
+        y = np.insert(y, candidates + 1, y_mid)
+        v = np.insert(v, candidates + 1, to_v(y_mid))
+        depth[candidates] += 1
+        depth = np.insert(depth, candidates + 1, depth[candidates])
+
+    breaks = _find_breaks(v, jump_ratio)
+    x = to_x(u)
+    if breaks.size:
+        x = np.insert(x, breaks + 1, (x[breaks] + x[breaks + 1]) / 2)
+        y = np.insert(y, breaks + 1, np.nan)
+    return x, y
@@ -0,0 +1,166 @@
+"""Production WSGI server for the MathViber app.
+
+The server is Gunicorn, an optional dependency installed with
+``pip install mathviber[server]``. A master process forks the workers and
+restarts any that die; sending it ``SIGHUP`` replaces the workers gracefully,
+so a new release is picked up without dropping requests.
+"""
+
+import os
+import shutil
+import tempfile
+from collections.abc import Mapping
+from typing import Any
+
+from flask import Flask
+
+
+def default_workers() -> int:
+    """Return the default number of worker processes.
+
+    Returns:
+        Number of CPUs available to this process.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS
+        return os.cpu_count() or 1
+
+
+def server_options(
+    host: str = "127.0.0.1",
+    port: int = 5000,
+    workers: int | None = None,
+    threads: int = 4,
+    keepalive: int = 5,
+    timeout: int = 60,
+) -> dict[str, Any]:
+    """Build the Gunicorn settings of the production server.
+
+    Args:
+        host: Host to bind the server to.
+        port: Port to bind the server to.
+        workers: Number of worker processes; defaults to the CPU count.
+        threads: Request threads per worker; more than one selects the
+            threaded worker.
+        keepalive: Seconds an idle keep-alive connection is held open.
+        timeout: Seconds a worker may be unresponsive, for example stuck in
+            one request, before it is killed and replaced. Also the time
+            workers get to finish their requests on reload or shutdown.
+
+    Returns:
+        Dictionary of Gunicorn setting names and values.
+
+    Raises:
+        ValueError: If a count or duration is out of range.
+    """
+    workers = default_workers() if workers is None else workers
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if threads < 1:
+        raise ValueError("threads must be at least 1")
+    if keepalive < 0 or timeout < 1:
+        raise ValueError("keepalive must be positive and timeout at least 1")
+
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread" if threads > 1 else "sync",
+        "keepalive": keepalive,
+        "timeout": timeout,
+        "graceful_timeout": timeout,
+        # Each worker builds its own app, since thread and process pools
+        # must not be shared across a fork
+        "preload_app": False,
+    }
+
+
+def warm_up(app: Flask) -> None:
+    """Prepare an app for traffic by serving one page and one plot.
+
+    This compiles the page template and an expression, and builds the plot
+    as figure JSON and as an HTML fragment. The fragment imports
+    ``plotly.io`` and the default template, so the first real request of a
+    worker is as fast as the following ones.
+
+    Args:
+        app: The application to warm up.
+    """
+    client = app.test_client()
+    client.get("/")
+    for response_format in ("json", "html"):
+        client.post(
+            "/api/update_plot",
+            json={
+                "expression": "sin(x)",
+                "format": response_format,
+                "sampling": "uniform",
+            },
+        )
+
+
+def run_server(
+    options: Mapping[str, Any], config: Mapping[str, Any] | None = None
+) -> None:
+    """Run the app under Gunicorn until the master process is stopped.
+
+    NumPy and the app module are imported once in the master, so forked
+    workers start with them loaded; Plotly is imported by each worker's
+    warm-up. Every worker then creates its own app and warms it up before it
+    accepts connections. Unless an artifact directory or store is
+    configured, the workers share a temporary directory, removed when the
+    server stops, so each can serve plots scheduled by the others.
+
+    Args:
+        options: Gunicorn settings, as returned by ``server_options``.
+        config: Optional configuration overrides for ``create_app``.
+
+    Raises:
+        RuntimeError: If Gunicorn is not installed.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise RuntimeError(
+            "The production server requires gunicorn; "
+            "install it with: pip install mathviber[server]"
+        ) from None
+
+    from mathviber.app import create_app
+
+    config = dict(config or {})
+    master_pid = os.getpid()
+    shared_directory = None
+    if not (
+        config.get("ARTIFACT_DIR")
+        or config.get("ARTIFACT_STORE")
+        or os.environ.get("MATHVIBER_ARTIFACT_DIR")
+    ):
+        shared_directory = tempfile.mkdtemp(prefix="mathviber_plots_")
+        config["ARTIFACT_DIR"] = shared_directory
+
+    class MathViberApplication(BaseApplication):
+        """Gunicorn application creating a warmed-up app in each worker."""
+
+        def load_config(self) -> None:
+            """Apply the server options to Gunicorn's settings."""
+            for name, value in options.items():
+                self.cfg.set(name, value)
+
+        def load(self) -> Flask:
+            """Create the worker's app.
+
+            Returns:
+                The warmed-up application.
+            """
+            app = create_app(config)
+            warm_up(app)
+            return app
+
+    try:
+        MathViberApplication().run()
+    finally:
+        # Workers exit through here too, but only the master cleans up
+        if shared_directory is not None and os.getpid() == master_pid:
+            shutil.rmtree(shared_directory, ignore_errors=True)
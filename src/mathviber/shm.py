@@ -0,0 +1,374 @@
+"""Shared memory transport for NumPy arrays between processes.
+
+A producer writes arrays straight into a named shared memory segment and
+sends a small picklable ``ArrayHandle`` instead of the arrays. The consumer
+maps the segment and gets NumPy arrays that are views of it, without copying.
+
+Segment names start with ``mathviber_<pid>_`` where ``<pid>`` is the process
+that owns the transport (for example a server with worker processes), so
+segments left behind by crashed producers or consumers can be found and
+removed with ``sweep_segments`` and ``sweep_stale_segments``.
+"""
+
+import os
+import threading
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import numpy as np
+
+SEGMENT_PREFIX = "mathviber_"
+
+# Directory where POSIX shared memory segments are visible, if any
+_SHM_DIR = "/dev/shm"
+
+# Process-wide counters reported by ``stats``
+_stats_lock = threading.Lock()
+_stats = {
+    "created": 0,
+    "attached": 0,
+    "live_mappings": 0,
+    "mapped_bytes": 0,
+    "swept": 0,
+}
+
+
+def _count(**changes: int) -> None:
+    """Update the process-wide counters.
+
+    Args:
+        **changes: Amount to add to each named counter.
+    """
+    with _stats_lock:
+        for name, change in changes.items():
+            _stats[name] += change
+
+
+def segment_prefix(owner_pid: int | None = None) -> str:
+    """Return the name prefix of segments owned by a process.
+
+    Args:
+        owner_pid: Owning process id; defaults to the current process.
+
+    Returns:
+        Prefix shared by the owner's segment names.
+    """
+    return f"{SEGMENT_PREFIX}{os.getpid() if owner_pid is None else owner_pid}_"
+
+
+@dataclass(frozen=True)
+class ArrayHandle:
+    """Picklable description of arrays stored in a shared memory segment.
+
+    Attributes:
+        name: Name of the segment.
+        dtype: Data type string shared by all arrays.
+        shapes: Shape of each array.
+        offsets: Byte offset of each array in the segment.
+    """
+
+    name: str
+    dtype: str
+    shapes: tuple[tuple[int, ...], ...]
+    offsets: tuple[int, ...]
+
+
+class _Mapping:
+    """A mapped segment, closed when its last array is garbage collected.
+
+    Arrays never view the segment's buffer directly: ``SharedMemory.close``
+    would unmap it even while such views exist. They are created from
+    ``_ArrayOwner`` objects that count references instead.
+    """
+
+    def __init__(self, block: SharedMemory) -> None:
+        """Take ownership of a mapped segment.
+
+        Args:
+            block: The mapped shared memory segment.
+        """
+        assert block.buf is not None, "shared memory segment is not mapped"
+        self.block = block
+        self.size = block.size
+        # Raw address of the mapping; views use it instead of exporting the
+        # buffer, so the mapping can still be closed once they are gone
+        probe = np.frombuffer(block.buf, dtype=np.uint8)
+        self.address = probe.ctypes.data
+        del probe
+        self._refs = 0
+        self._lock = threading.Lock()
+        _count(live_mappings=1, mapped_bytes=self.size)
+
+    def acquire(self) -> None:
+        """Register one more array viewing the mapping."""
+        with self._lock:
+            self._refs += 1
+
+    def release(self) -> None:
+        """Unregister an array, closing the mapping after the last one."""
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        self.block.close()
+        _count(live_mappings=-1, mapped_bytes=-self.size)
+
+
+class _ArrayOwner:
+    """Base object of a consumer array, keeping its mapping alive.
+
+    NumPy arrays created from it, and all views derived from those, hold a
+    reference to the owner, so the mapping is released only when no array
+    uses it anymore.
+    """
+
+    def __init__(
+        self, mapping: _Mapping, offset: int, shape: tuple[int, ...], dtype: str
+    ) -> None:
+        """Describe one array of a mapping.
+
+        Args:
+            mapping: The mapped segment.
+            offset: Byte offset of the array in the segment.
+            shape: Shape of the array.
+            dtype: Data type string of the array.
+        """
+        mapping.acquire()
+        self._mapping = mapping
+        self.__array_interface__ = {
+            "version": 3,
+            "shape": shape,
+            "typestr": np.dtype(dtype).str,
+            "data": (mapping.address + offset, False),
+        }
+
+    def __del__(self) -> None:
+        """Release the mapping when the last array is gone."""
+        self._mapping.release()
+
+
+def _map_arrays(
+    mapping: _Mapping,
+    shapes: Sequence[tuple[int, ...]],
+    offsets: Sequence[int],
+    dtype: str,
+) -> list[np.ndarray]:
+    """Create arrays viewing a mapping, each keeping it alive.
+
+    Args:
+        mapping: The mapped segment.
+        shapes: Shape of each array.
+        offsets: Byte offset of each array in the segment.
+        dtype: Data type string of all arrays.
+
+    Returns:
+        One array per shape.
+    """
+    # Hold a reference while the owners are created, so the mapping is not
+    # closed before the last one exists
+    mapping.acquire()
+    try:
+        return [
+            np.asarray(_ArrayOwner(mapping, offset, shape, dtype))
+            for shape, offset in zip(shapes, offsets, strict=True)
+        ]
+    finally:
+        mapping.release()
+
+
+class SharedArrayWriter:
+    """Producer side: arrays backed by a new named shared memory segment.
+
+    Fill ``arrays`` in place, for example with ``out=`` arguments of ufuncs,
+    then call ``finish`` to get a handle to send to the consumer.
+    """
+
+    def __init__(
+        self,
+        shapes: Sequence[tuple[int, ...]],
+        dtype: Any = np.float64,
+        prefix: str | None = None,
+    ) -> None:
+        """Create the segment and the writable views into it.
+
+        Args:
+            shapes: Shape of each array.
+            dtype: Data type of all arrays.
+            prefix: Segment name prefix; defaults to ``segment_prefix()``.
+        """
+        self.dtype = np.dtype(dtype)
+        self.shapes = tuple(tuple(shape) for shape in shapes)
+
+        # Align every array to 64 bytes
+        offsets = []
+        size = 0
+        for shape in self.shapes:
+            offsets.append(size)
+            nbytes = int(np.prod(shape, dtype=np.int64)) * self.dtype.itemsize
+            size += -(-nbytes // 64) * 64
+        self.offsets = tuple(offsets)
+
+        name = f"{prefix or segment_prefix()}{os.getpid()}_{uuid.uuid4().hex[:12]}"
+        self._block: SharedMemory | None = SharedMemory(
+            name=name, create=True, size=max(size, 1)
+        )
+        _count(created=1)
+        self.name = self._block.name
+        self.arrays = _map_arrays(
+            _Mapping(self._block), self.shapes, self.offsets, self.dtype.str
+        )
+
+    def finish(self) -> ArrayHandle:
+        """Stop writing and return a handle for the consumer.
+
+        The producer's mapping is closed once no view of ``arrays`` is left;
+        the segment lives on until the consumer imports it.
+
+        Returns:
+            Handle describing the arrays.
+        """
+        self.arrays = []
+        self._block = None
+        return ArrayHandle(self.name, self.dtype.str, self.shapes, self.offsets)
+
+    def discard(self) -> None:
+        """Drop the segment without handing it to a consumer."""
+        self.arrays = []
+        if self._block is not None:
+            self._block.unlink()
+            self._block = None
+
+
+def export_arrays(
+    arrays: Sequence[np.ndarray], prefix: str | None = None
+) -> ArrayHandle:
+    """Copy arrays into a new shared memory segment.
+
+    Args:
+        arrays: Arrays of one data type.
+        prefix: Segment name prefix; defaults to ``segment_prefix()``.
+
+    Returns:
+        Handle describing the arrays.
+    """
+    dtype = np.result_type(*arrays) if arrays else np.float64
+    writer = SharedArrayWriter([a.shape for a in arrays], dtype=dtype, prefix=prefix)
+    try:
+        # Index the views so that no reference outlives the copy
+        for index, array in enumerate(arrays):
+            writer.arrays[index][...] = array
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.finish()
+
+
+def import_arrays(handle: ArrayHandle) -> list[np.ndarray]:
+    """Map a segment and return its arrays as zero-copy views.
+
+    The segment's name is removed right away, so it cannot leak even if this
+    process crashes; the memory itself is freed once every returned array,
+    and every view derived from one, has been garbage collected.
+
+    Args:
+        handle: Handle sent by the producer.
+
+    Returns:
+        The arrays described by the handle.
+    """
+    block = SharedMemory(name=handle.name)
+    block.unlink()
+    _count(attached=1)
+
+    return _map_arrays(_Mapping(block), handle.shapes, handle.offsets, handle.dtype)
+
+
+def discard_handle(handle: ArrayHandle) -> None:
+    """Remove a segment that will not be imported.
+
+    Args:
+        handle: Handle sent by the producer.
+    """
+    try:
+        SharedMemory(name=handle.name).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def sweep_segments(prefix: str) -> int:
+    """Remove segments whose name starts with ``prefix``.
+
+    Use this after a producer crashed, with the prefix of its segments.
+
+    Args:
+        prefix: Segment name prefix.
+
+    Returns:
+        Number of segments removed.
+    """
+    try:
+        names = os.listdir(_SHM_DIR)
+    except OSError:
+        return 0
+
+    removed = 0
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        try:
+            block = SharedMemory(name=name)
+        except (FileNotFoundError, ValueError):
+            continue
+        block.close()
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            continue
+        removed += 1
+
+    _count(swept=removed)
+    return removed
+
+
+def sweep_stale_segments() -> int:
+    """Remove segments whose owning process no longer exists.
+
+    Returns:
+        Number of segments removed.
+    """
+    try:
+        names = os.listdir(_SHM_DIR)
+    except OSError:
+        return 0
+
+    owners: set[int] = set()
+    for name in names:
+        if name.startswith(SEGMENT_PREFIX):
+            owner = name[len(SEGMENT_PREFIX) :].split("_", 1)[0]
+            if owner.isdigit():
+                owners.add(int(owner))
+
+    removed = 0
+    for pid in owners:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            removed += sweep_segments(segment_prefix(pid))
+        except PermissionError:
+            # The process exists but belongs to another user
+            continue
+    return removed
+
+
+def stats() -> dict[str, int]:
+    """Return the process-wide transport counters.
+
+    Returns:
+        Dictionary with segments created and attached, live mappings,
+        mapped bytes and swept segments.
+    """
+    with _stats_lock:
+        return dict(_stats)
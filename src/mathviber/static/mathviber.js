@@ -0,0 +1,267 @@
+let updateTimeout;
+let lastPlotData = null;
+let viewportController = null;
+let streamController = null;
+
+// Requests are numbered per page, so the server can stop work on
+// ones that a newer request has superseded
+const sessionId = (window.crypto && crypto.randomUUID)
+    ? crypto.randomUUID()
+    : Math.random().toString(36).slice(2) + Date.now().toString(36);
+let plotGeneration = 0;
+let viewportGeneration = 0;
+let viewportHandlerAttached = false;
+
+// Trace array encoding supported by the loaded Plotly.js, set by the server
+const arrayEncoding = document.body.dataset.arrayEncoding;
+
+// Function to collect current form data
+function getFormData() {
+    return {
+        expression: document.getElementById('user_input').value.trim(),
+        x_min: document.getElementById('x_min').value,
+        x_max: document.getElementById('x_max').value,
+        y_min: document.getElementById('y_min').value,
+        y_max: document.getElementById('y_max').value,
+        x_name: document.getElementById('x_name').value,
+        y_name: document.getElementById('y_name').value,
+        graph_title: document.getElementById('graph_title').value,
+        x_log: document.getElementById('x_log').checked,
+        y_log: document.getElementById('y_log').checked
+    };
+}
+
+// Function to check if form data has changed
+function hasFormDataChanged(newData) {
+    if (!lastPlotData) return true;
+    return JSON.stringify(newData) !== JSON.stringify(lastPlotData);
+}
+
+// Function to update plot via a streaming request: a coarse preview
+// is drawn first, then refined chunks are appended as they arrive
+async function updatePlot() {
+    const formData = getFormData();
+
+    // Don't update if expression is empty
+    if (!formData.expression) {
+        document.getElementById('realtime-plot-container').style.display = 'none';
+        return;
+    }
+
+    // Don't update if data hasn't changed
+    if (!hasFormDataChanged(formData)) {
+        return;
+    }
+
+    // A new plot replaces any zoomed view being fetched and any
+    // plot still streaming in
+    if (viewportController) viewportController.abort();
+    if (streamController) streamController.abort();
+    const controller = new AbortController();
+    streamController = controller;
+
+    // Show loading indicator
+    document.getElementById('update-indicator').style.display = 'block';
+    document.getElementById('realtime-plot-container').classList.add('updating');
+
+    const plotDiv = document.getElementById('realtime-plot');
+    let failed = false;
+
+    function handleMessage(data) {
+        if (data.type === 'preview') {
+            document.getElementById('update-indicator').style.display = 'none';
+            document.getElementById('realtime-plot-container').classList.remove('updating');
+
+            // Show plot container before drawing so Plotly can size the plot
+            document.getElementById('realtime-plot-container').style.display = 'block';
+
+            // Update the existing plot in place instead of rebuilding it
+            Plotly.react(plotDiv, data.figure.data, data.figure.layout, data.config);
+            if (!viewportHandlerAttached) {
+                plotDiv.on('plotly_relayout', updateViewport);
+                viewportHandlerAttached = true;
+            }
+            document.getElementById('realtime-function-title').textContent = 'Function: y = ' + formData.expression;
+            document.getElementById('realtime-download-btn').style.display = 'none';
+        } else if (data.type === 'chunk') {
+            // Typed arrays are converted so they append to the plain
+            // arrays of the main trace
+            Plotly.extendTraces(plotDiv, {
+                x: [Array.from(decodeArray(data.x))],
+                y: [Array.from(decodeArray(data.y))]
+            }, [0]);
+        } else if (data.type === 'done') {
+            // The refined trace is complete, so drop the preview
+            Plotly.deleteTraces(plotDiv, 1);
+
+            // Update download link
+            if (data.plot_filename) {
+                const downloadBtn = document.getElementById('realtime-download-btn');
+                downloadBtn.href = '/download/' + data.plot_filename;
+                downloadBtn.style.display = 'inline-block';
+            }
+
+            // Store current data
+            lastPlotData = {...formData};
+        } else if (data.type === 'error') {
+            // A superseded stream is replaced by the newer one
+            if (data.superseded) return;
+            // Show error (could be enhanced with better error display)
+            console.error('Plot update error:', data.error);
+            failed = true;
+        }
+    }
+
+    try {
+        const response = await fetch('/api/stream_plot', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            signal: controller.signal,
+            body: JSON.stringify({
+                ...formData,
+                encoding: arrayEncoding,
+                session: sessionId,
+                generation: ++plotGeneration
+            })
+        });
+
+        // Messages are newline-delimited JSON
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (!failed) {
+            const {done, value} = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, {stream: true});
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.filter(line => line).forEach(line => handleMessage(JSON.parse(line)));
+        }
+    } catch (error) {
+        if (error.name === 'AbortError') return;
+        console.error('Network error:', error);
+        failed = true;
+    } finally {
+        if (streamController === controller) streamController = null;
+    }
+
+    if (failed) {
+        // Hide plot container on error
+        document.getElementById('update-indicator').style.display = 'none';
+        document.getElementById('realtime-plot-container').classList.remove('updating');
+        document.getElementById('realtime-plot-container').style.display = 'none';
+    }
+}
+
+// Decode a typed array spec ({dtype, bdata}) or return a plain array
+function decodeArray(values) {
+    if (!values || !values.bdata) return values;
+    const bytes = Uint8Array.from(atob(values.bdata), c => c.charCodeAt(0));
+    return values.dtype === 'f4' ? new Float32Array(bytes.buffer) : new Float64Array(bytes.buffer);
+}
+
+// Re-sample the expression for the visible x range after a zoom or pan
+function updateViewport(eventData) {
+    // Wait until the streamed plot is complete
+    if (!lastPlotData || streamController) return;
+
+    let range;
+    if (eventData['xaxis.range[0]'] !== undefined) {
+        range = [eventData['xaxis.range[0]'], eventData['xaxis.range[1]']];
+    } else if (eventData['xaxis.range']) {
+        range = eventData['xaxis.range'];
+    } else if (eventData['xaxis.autorange']) {
+        // Reset to the range entered in the form
+        range = null;
+    } else {
+        return;
+    }
+
+    if (range === null) {
+        range = [parseFloat(lastPlotData.x_min || -10), parseFloat(lastPlotData.x_max || 10)];
+    } else if (lastPlotData.x_log) {
+        // Log axis ranges are reported as powers of ten
+        range = range.map(r => Math.pow(10, r));
+    }
+
+    // Only the latest viewport matters, so cancel any request in flight
+    if (viewportController) viewportController.abort();
+    viewportController = new AbortController();
+
+    const plotDiv = document.getElementById('realtime-plot');
+    fetch('/api/viewport', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        signal: viewportController.signal,
+        body: JSON.stringify({
+            expression: lastPlotData.expression,
+            x_min: range[0],
+            x_max: range[1],
+            width: plotDiv.clientWidth || 800,
+            x_log: lastPlotData.x_log,
+            y_log: lastPlotData.y_log,
+            encoding: arrayEncoding,
+            session: sessionId,
+            generation: ++viewportGeneration
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            Plotly.restyle(plotDiv, {x: [decodeArray(data.x)], y: [decodeArray(data.y)]}, [0]);
+        } else if (!data.superseded) {
+            console.error('Viewport update error:', data.error);
+        }
+    })
+    .catch(error => {
+        if (error.name !== 'AbortError') {
+            console.error('Network error:', error);
+        }
+    });
+}
+
+// Debounced update function; superseded requests are aborted and
+// cancelled on the server, so a short delay is cheap
+function debouncedUpdate() {
+    clearTimeout(updateTimeout);
+    updateTimeout = setTimeout(updatePlot, 150); // 150ms delay
+}
+
+// Add event listeners to all form inputs
+document.addEventListener('DOMContentLoaded', function() {
+    const inputs = [
+        'user_input', 'x_min', 'x_max', 'y_min', 'y_max',
+        'x_name', 'y_name', 'graph_title', 'x_log', 'y_log'
+    ];
+
+    inputs.forEach(inputId => {
+        const element = document.getElementById(inputId);
+        if (element) {
+            if (element.type === 'checkbox') {
+                element.addEventListener('change', debouncedUpdate);
+            } else {
+                element.addEventListener('input', debouncedUpdate);
+                element.addEventListener('change', debouncedUpdate);
+            }
+        }
+    });
+
+    // If there's already a plot on page load, trigger initial update
+    const expression = document.getElementById('user_input').value.trim();
+    if (expression) {
+        setTimeout(updatePlot, 100); // Small delay to ensure page is fully loaded
+    }
+});
+
+// Handle form submission to prevent conflicts with real-time updates
+document.querySelector('form').addEventListener('submit', function(e) {
+    // Clear any pending updates
+    clearTimeout(updateTimeout);
+
+    // Hide real-time plot container since we're doing a full page update
+    document.getElementById('realtime-plot-container').style.display = 'none';
+});
@@ -0,0 +1,53 @@
+"""Shared helpers for tests that request and render plot images."""
+
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask.testing import FlaskClient
+
+FAKE_PNG = b"\x89PNG\r\n\x1a\nfake"
+
+
+def fake_write_image(fig: Any, path: str, **kwargs: Any) -> None:
+    """Write placeholder PNG bytes instead of running Kaleido.
+
+    Args:
+        fig: The figure being rendered.
+        path: Path to write the image to.
+        **kwargs: Ignored rendering options.
+    """
+    with open(path, "wb") as f:
+        f.write(FAKE_PNG)
+
+
+@pytest.fixture
+def write_image() -> Iterator[MagicMock]:
+    """Replace Kaleido rendering with placeholder PNG bytes.
+
+    Yields:
+        The mock of ``Figure.write_image``.
+    """
+    with patch(
+        "plotly.graph_objects.Figure.write_image",
+        autospec=True,
+        side_effect=fake_write_image,
+    ) as mock_write:
+        yield mock_write
+
+
+def request_plot(client: FlaskClient, expression: str = "x**2") -> str:
+    """Request a plot update and return the download filename.
+
+    Args:
+        client: Flask test client.
+        expression: Expression to plot.
+
+    Returns:
+        The plot filename returned by the API.
+    """
+    response = client.post("/api/update_plot", json={"expression": expression})
+    data = response.get_json()
+    assert data["success"] is True
+    return data["plot_filename"]
@@ -0,0 +1,239 @@
+"""Test the plot artifact store."""
+
+import os
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import flask
+import pytest
+from flask import Response
+
+from mathviber.app import create_app
+from mathviber.artifacts import DirectoryStore
+from tests.conftest import FAKE_PNG, request_plot
+
+
+def write_bytes(size: int):
+    """Create a writer of a file with the given number of bytes.
+
+    Args:
+        size: File size.
+
+    Returns:
+        Function writing the file to a path.
+    """
+    return lambda path: Path(path).write_bytes(b"x" * size)
+
+
+def set_last_use(store: DirectoryStore, name: str, seconds_ago: float) -> None:
+    """Backdate the last use of a stored file.
+
+    Args:
+        store: The store.
+        name: File name.
+        seconds_ago: Age of the last use.
+    """
+    when = time.time() - seconds_ago
+    os.utime(store.path(name), (when, when))
+
+
+def test_put_and_get(tmp_path: Path) -> None:
+    """Test that stored files are found and invalid names are refused."""
+    store = DirectoryStore(str(tmp_path))
+    path = store.put("plot_a.png", write_bytes(10))
+
+    assert store.get("plot_a.png") == path == str(tmp_path / "plot_a.png")
+    assert store.get("plot_b.png") is None
+    assert store.get("../plot_a.png") is None
+    assert os.listdir(tmp_path) == ["plot_a.png"]
+    with pytest.raises(ValueError):
+        store.put(".hidden", write_bytes(1))
+    with pytest.raises(ValueError):
+        store.put("notes.txt", write_bytes(1))
+
+    stats = store.stats()
+    assert (stats["files"], stats["bytes"]) == (1, 10)
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_failed_write_leaves_nothing(tmp_path: Path) -> None:
+    """Test that a failing writer does not leave a partial file."""
+    store = DirectoryStore(str(tmp_path))
+
+    def fail(path: str) -> None:
+        Path(path).write_bytes(b"partial")
+        raise RuntimeError("render failed")
+
+    with pytest.raises(RuntimeError):
+        store.put("plot_a.png", fail)
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_files_are_evicted(tmp_path: Path) -> None:
+    """Test that the store is kept within its size limit."""
+    store = DirectoryStore(str(tmp_path), max_bytes=25)
+    store.put("plot_a.png", write_bytes(10))
+    store.put("plot_b.png", write_bytes(10))
+    set_last_use(store, "plot_a.png", 20)
+    set_last_use(store, "plot_b.png", 10)
+
+    # Using a file makes it the most recently used
+    assert store.get("plot_a.png") is not None
+    store.put("plot_c.png", write_bytes(10))
+
+    assert sorted(os.listdir(tmp_path)) == ["plot_a.png", "plot_c.png"]
+    assert store.stats()["evicted"] == 1
+    assert store.stats()["bytes"] == 20
+
+
+def test_unused_files_expire(tmp_path: Path) -> None:
+    """Test that files unused for longer than max_age are evicted."""
+    store = DirectoryStore(str(tmp_path), max_age=60)
+    store.put("plot_0.png", write_bytes(1))
+    store.put("plot_1.png", write_bytes(1))
+    set_last_use(store, "plot_0.png", 120)
+
+    assert store.sweep() == 1
+    assert os.listdir(tmp_path) == ["plot_1.png"]
+
+
+def test_startup_recovery(tmp_path: Path) -> None:
+    """Test that earlier files are reused and abandoned partial files removed."""
+    (tmp_path / "plot_d.png").write_bytes(b"x" * 10)
+    (tmp_path / "plot_e.png.1.tmp").write_bytes(b"x")
+    (tmp_path / "plot_f.png.2.tmp").write_bytes(b"x")
+    old = time.time() - 2 * DirectoryStore.partial_max_age
+    os.utime(tmp_path / "plot_e.png.1.tmp", (old, old))
+
+    store = DirectoryStore(str(tmp_path))
+
+    assert store.get("plot_d.png") is not None
+    assert sorted(os.listdir(tmp_path)) == ["plot_d.png", "plot_f.png.2.tmp"]
+    assert store.stats()["bytes"] == 10
+
+
+def test_sweep_leaves_other_files_alone(tmp_path: Path) -> None:
+    """Test that files not named like artifacts are never removed."""
+    (tmp_path / "notes.txt").write_bytes(b"x" * 100)
+    (tmp_path / "notes.txt.1.tmp").write_bytes(b"x")
+    old = time.time() - 2 * DirectoryStore.partial_max_age
+    os.utime(tmp_path / "notes.txt", (old, old))
+    os.utime(tmp_path / "notes.txt.1.tmp", (old, old))
+
+    store = DirectoryStore(str(tmp_path), max_bytes=10, max_age=60)
+    store.put("plot_a.png", write_bytes(5))
+
+    assert store.sweep() == 0
+    assert sorted(os.listdir(tmp_path)) == [
+        "notes.txt",
+        "notes.txt.1.tmp",
+        "plot_a.png",
+    ]
+    assert store.stats()["bytes"] == 5
+
+
+def test_background_sweeper(tmp_path: Path) -> None:
+    """Test that the sweeper thread evicts expired files."""
+    store = DirectoryStore(str(tmp_path), max_age=60, sweep_interval=0.05)
+    store.put("plot_a.png", write_bytes(1))
+    set_last_use(store, "plot_a.png", 120)
+
+    store.start()
+    try:
+        deadline = time.monotonic() + 5
+        while os.listdir(tmp_path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        store.close()
+
+    assert os.listdir(tmp_path) == []
+    # A directory given to the store is kept
+    assert tmp_path.exists()
+
+
+def test_private_directory_is_removed_on_close() -> None:
+    """Test that the default temporary directory is removed on close."""
+    store = DirectoryStore()
+    store.put("plot_a.png", write_bytes(1))
+    store.close()
+
+    assert not os.path.exists(store.directory)
+
+
+def test_identical_plots_share_one_file() -> None:
+    """Test that plot filenames are derived from the plot parameters."""
+    client = create_app({"RESULT_CACHE_SIZE": 0}).test_client()
+
+    def filename(expression: str) -> str:
+        response = client.post("/api/update_plot", json={"expression": expression})
+        return response.get_json()["plot_filename"]
+
+    assert filename("x**2") == filename("x**2")
+    assert filename("x**2") != filename("x**3")
+
+
+def test_evicted_plot_is_rendered_again(write_image: MagicMock) -> None:
+    """Test that a download evicted from the store is rendered on request.
+
+    Args:
+        write_image: Rendering mock.
+    """
+    app = create_app()
+    client = app.test_client()
+    store = app.extensions["mathviber_artifact_store"]
+    filename = request_plot(client, "x")
+
+    assert client.get(f"/plot/{filename}").status_code == 200
+    os.remove(store.path(filename))
+    assert client.get(f"/plot/{filename}").data == FAKE_PNG
+
+    assert write_image.call_count == 2
+    assert client.get("/api/stats").get_json()["artifacts"]["hits"] >= 1
+
+
+def test_plot_evicted_while_sending_is_rendered_again(
+    write_image: MagicMock,
+) -> None:
+    """Test that a file removed after its lookup is rendered again.
+
+    Args:
+        write_image: Rendering mock.
+    """
+    client = create_app().test_client()
+    filename = request_plot(client, "x")
+    assert client.get(f"/plot/{filename}").status_code == 200
+
+    def evict_then_send(path: str, **kwargs: Any) -> Response:
+        if send.call_count == 1:
+            os.remove(path)
+        return flask.send_file(path, **kwargs)
+
+    with patch("mathviber.app.send_file", side_effect=evict_then_send) as send:
+        response = client.get(f"/plot/{filename}")
+
+    assert response.status_code == 200
+    assert response.data == FAKE_PNG
+    assert write_image.call_count == 2
+
+
+def test_shared_directory_serves_other_servers_plots(
+    tmp_path: Path, write_image: MagicMock
+) -> None:
+    """Test that servers sharing a directory serve each other's renders.
+
+    Args:
+        tmp_path: Temporary directory.
+        write_image: Rendering mock.
+    """
+    config = {"ARTIFACT_DIR": str(tmp_path), "DEFERRED_RENDER": False}
+    first = create_app(config).test_client()
+    second = create_app(config).test_client()
+
+    filename = request_plot(first, "x")
+    response = second.get(f"/download/{filename}")
+
+    assert response.status_code == 200
+    assert response.data == FAKE_PNG
+    assert write_image.call_count == 1
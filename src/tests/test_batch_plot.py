@@ -0,0 +1,138 @@
+"""Test the batch plotting API."""
+
+import numpy as np
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from mathviber.app import create_app
+
+
+@pytest.fixture
+def app() -> Flask:
+    """Create a Flask app instance for testing.
+
+    Returns:
+        Flask: Test Flask application.
+    """
+    return create_app({"MAX_BATCH_SIZE": 3, "MAX_BATCH_POINTS": 100_000})
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """Create a test client for the Flask app.
+
+    Args:
+        app: Flask application fixture.
+
+    Returns:
+        FlaskClient: Test client for making requests.
+    """
+    return app.test_client()
+
+
+def test_batch_returns_one_trace_per_expression(client: FlaskClient) -> None:
+    """Test that all expressions are plotted on a shared grid.
+
+    Args:
+        client: Flask test client.
+    """
+    response = client.post(
+        "/api/batch_plot",
+        json={
+            "expressions": ["x", "x**2", "2*x"],
+            "x_min": 0,
+            "x_max": 1,
+            "num_points": 11,
+        },
+    )
+    data = response.get_json()
+
+    assert data["success"] is True
+    assert data["errors"] == []
+    traces = data["figure"]["data"]
+    assert [trace["name"] for trace in traces] == ["y = x", "y = x**2", "y = 2*x"]
+    assert data["figure"]["layout"]["showlegend"] is True
+
+    grid = np.linspace(0, 1, 11)
+    for trace in traces:
+        np.testing.assert_array_equal(trace["x"], grid)
+    np.testing.assert_allclose(traces[1]["y"], grid**2)
+
+
+def test_batch_reports_errors_per_expression(client: FlaskClient) -> None:
+    """Test that failing expressions do not fail the batch.
+
+    Args:
+        client: Flask test client.
+    """
+    data = client.post(
+        "/api/batch_plot", json={"expressions": ["sin(x)", "q", " "]}
+    ).get_json()
+
+    assert data["success"] is True
+    assert len(data["figure"]["data"]) == 1
+    assert [(e["index"], e["expression"]) for e in data["errors"]] == [
+        (1, "q"),
+        (2, ""),
+    ]
+    assert data["errors"][0]["error"].startswith("Unknown name 'q'")
+    assert data["errors"][1]["error"] == "No expression provided"
+
+
+def test_batch_fails_when_nothing_evaluates(client: FlaskClient) -> None:
+    """Test that a batch without any valid expression is an error.
+
+    Args:
+        client: Flask test client.
+    """
+    data = client.post("/api/batch_plot", json={"expressions": ["q", "x+"]}).get_json()
+
+    assert data["error"] == "No expression could be evaluated"
+    assert len(data["errors"]) == 2
+
+
+def test_batch_is_cached(client: FlaskClient) -> None:
+    """Test that repeated batches are answered from the result cache.
+
+    Args:
+        client: Flask test client.
+    """
+    body = {"expressions": ["x", "x**3"], "encoding": "float32"}
+    first = client.post("/api/batch_plot", json=body)
+    second = client.post("/api/batch_plot", json=body)
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.data == first.data
+    assert first.get_json()["figure"]["data"][0]["y"]["dtype"] == "f4"
+
+
+@pytest.mark.parametrize(
+    ("body", "error"),
+    [
+        ({"expressions": "x"}, "Expressions must be a list of strings"),
+        ({"expressions": [1]}, "Expressions must be a list of strings"),
+        ({"expressions": ["", " "]}, "No expression provided"),
+        ({"expressions": ["x"] * 4}, "At most 3 expressions per batch"),
+        ({"expressions": ["x"], "x_min": 2, "x_max": 1}, "X minimum must be less"),
+        ({"expressions": ["x"], "num_points": 2}, "Number of points must be"),
+        (
+            {"expressions": ["x", "x**2"], "num_points": 60_000},
+            "At most 100000 points per batch",
+        ),
+        ({"expressions": ["x"], "x_min": "left"}, "Invalid numeric input"),
+    ],
+)
+def test_batch_rejects_invalid_requests(
+    client: FlaskClient, body: dict, error: str
+) -> None:
+    """Test that invalid batch requests report an error.
+
+    Args:
+        client: Flask test client.
+        body: Request body.
+        error: Expected start of the error message.
+    """
+    data = client.post("/api/batch_plot", json=body).get_json()
+    assert data["error"].startswith(error)
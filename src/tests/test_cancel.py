@@ -0,0 +1,177 @@
+"""Test cancellation of superseded plot requests."""
+
+import json
+import time
+from collections.abc import Callable
+
+import numpy as np
+import pytest
+
+from mathviber.app import create_app
+from mathviber.cancel import Cancelled, GenerationRegistry
+from mathviber.chunked import SinkReducer, reduce_chunks
+from mathviber.evaluation import EvaluationPool
+from mathviber.expressions import compile_expression
+from mathviber.render import RenderPool
+
+
+def flips_after(calls: int) -> Callable[[], bool]:
+    """Create a predicate that turns True after a number of calls.
+
+    Args:
+        calls: Number of calls answered with False.
+
+    Returns:
+        The predicate.
+    """
+    count = 0
+
+    def cancelled() -> bool:
+        nonlocal count
+        count += 1
+        return count > calls
+
+    return cancelled
+
+
+def test_newer_generation_supersedes_older() -> None:
+    """Test that only the latest request of a session stays current."""
+    registry = GenerationRegistry()
+    first = registry.begin("a", 1)
+    other = registry.begin("b", 1)
+    assert not first()
+
+    second = registry.begin("a", 2)
+    assert first() and first()
+    assert not second()
+    assert not other()
+
+    # A request arriving after a newer one is stale from the start
+    assert registry.begin("a", 1)()
+    assert registry.stats() == {
+        "maxsize": 4096,
+        "sessions": 2,
+        "started": 4,
+        "superseded": 2,
+    }
+
+
+def test_registry_forgets_old_sessions() -> None:
+    """Test that the least recently seen sessions are evicted."""
+    registry = GenerationRegistry(maxsize=2)
+    registry.begin("a", 5)
+    registry.begin("b", 1)
+    registry.begin("c", 1)
+
+    assert registry.stats()["sessions"] == 2
+    assert not registry.begin("a", 1)()
+
+
+def test_chunked_evaluation_stops_when_cancelled() -> None:
+    """Test that no block is evaluated after cancellation."""
+    blocks = []
+    with pytest.raises(Cancelled):
+        reduce_chunks(
+            compile_expression("x"),
+            0,
+            1,
+            1000,
+            [SinkReducer(lambda x, y: blocks.append(x))],
+            chunk_size=100,
+            cancelled=flips_after(3),
+        )
+    assert len(blocks) == 3
+
+
+def test_superseded_render_is_dropped() -> None:
+    """Test that a queued render of a superseded request never runs."""
+    pool = RenderPool(workers=1)
+    calls = []
+    try:
+        with pytest.raises(Cancelled):
+            pool.run(lambda: calls.append(1), cancelled=lambda: True)
+        assert pool.run(lambda: 42, cancelled=lambda: False) == 42
+    finally:
+        pool.shutdown()
+
+    assert calls == []
+    assert pool.stats()["cancelled"] == 1
+
+
+def test_superseded_worker_job_is_killed() -> None:
+    """Test that a running process job is stopped once superseded."""
+    pool = EvaluationPool(workers=1, timeout=30.0, memory_limit=64 * 2**20)
+    pool.start()
+    try:
+        started = time.monotonic()
+        with pytest.raises(Cancelled):
+            pool.evaluate(
+                "sin(x)**cos(x)",
+                1,
+                2,
+                num_points=10_000_000,
+                sampling="uniform",
+                chunk_size=1 << 16,
+                cancelled=flips_after(1),
+            )
+        assert time.monotonic() - started < 1.0
+        assert pool.stats()["cancelled"] == 1
+
+        # The worker was replaced and serves the next job
+        x, _ = pool.evaluate("x", 0, 1, num_points=3)
+        np.testing.assert_array_equal(x, [0, 0.5, 1])
+    finally:
+        pool.shutdown()
+
+
+def test_stale_update_is_answered_as_superseded() -> None:
+    """Test that the API drops requests older than the session's latest."""
+    client = create_app().test_client()
+    current = client.post(
+        "/api/update_plot",
+        json={"expression": "x", "format": "json", "session": "s", "generation": 2},
+    )
+    stale = client.post(
+        "/api/update_plot",
+        json={"expression": "x**2", "format": "json", "session": "s", "generation": 1},
+    )
+
+    assert current.get_json()["success"] is True
+    assert stale.get_json() == {
+        "error": "Superseded by a newer request",
+        "superseded": True,
+    }
+    assert client.get("/api/stats").get_json()["generations"]["superseded"] == 1
+
+
+def test_stream_stops_when_superseded() -> None:
+    """Test that a stream ends early once a newer request begins."""
+    client = create_app({"STREAM_CHUNK_SIZE": 1000}).test_client()
+    response = client.post(
+        "/api/stream_plot",
+        json={
+            "expression": "sin(x)",
+            "sampling": "uniform",
+            "num_points": 100000,
+            "session": "s",
+            "generation": 1,
+        },
+        buffered=False,
+    )
+    messages = iter(response.response)
+    assert json.loads(next(messages))["type"] == "preview"
+    assert json.loads(next(messages))["type"] == "chunk"
+
+    # Viewport requests do not supersede plot updates
+    client.post(
+        "/api/viewport", json={"expression": "x", "session": "s", "generation": 9}
+    )
+    assert json.loads(next(messages))["type"] == "chunk"
+
+    client.post(
+        "/api/stream_plot", json={"expression": "x", "session": "s", "generation": 2}
+    )
+    rest = [json.loads(line) for line in messages]
+    assert rest == [
+        {"type": "error", "error": "Superseded by a newer request", "superseded": True}
+    ]
@@ -0,0 +1,132 @@
+"""Test chunked evaluation of large uniform grids."""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from mathviber.app import create_app
+from mathviber.chunked import (
+    M4Reducer,
+    SinkReducer,
+    StatsReducer,
+    iter_chunks,
+    reduce_chunks,
+)
+from mathviber.decimate import decimate
+from mathviber.evaluation import sample_expression
+from mathviber.expressions import compile_expression
+
+
+def test_chunks_match_full_evaluation() -> None:
+    """Test that blocks concatenate to the full grid and its values."""
+    kernel = compile_expression("sin(x) * x")
+    chunks = list(iter_chunks(kernel, -3, 7, 1001, chunk_size=128))
+
+    assert [x.size for x, _ in chunks] == [128] * 7 + [105]
+    x = np.concatenate([x for x, _ in chunks])
+    np.testing.assert_array_equal(x, np.linspace(-3, 7, 1001))
+    np.testing.assert_array_equal(np.concatenate([y for _, y in chunks]), kernel(x))
+
+
+@pytest.mark.parametrize("chunk_size", [97, 1000, 4096])
+@pytest.mark.parametrize(
+    ("expression", "x_range", "x_log", "y_log"),
+    [
+        ("sin(50*x) + (x > 3)", (0, 10), False, False),
+        ("tan(x)", (-5, 5), False, False),
+        ("sqrt(x - 5)", (0, 10), False, False),
+        ("x**3 - 2", (0.01, 100), True, True),
+    ],
+)
+def test_m4_reducer_matches_full_decimation(
+    chunk_size: int,
+    expression: str,
+    x_range: tuple[float, float],
+    x_log: bool,
+    y_log: bool,
+) -> None:
+    """Test that merging per-chunk selections gives the exact M4 result.
+
+    Args:
+        chunk_size: Points per block.
+        expression: Expression to evaluate.
+        x_range: Range of the grid.
+        x_log: Whether the x-axis is logarithmic.
+        y_log: Whether the y-axis is logarithmic.
+    """
+    kernel = compile_expression(expression)
+    x = np.linspace(*x_range, 20_000)
+    expected = decimate(x, kernel(x), 100, x_log=x_log, y_log=y_log)
+
+    reducer = M4Reducer(100, x_range, x_log=x_log, y_log=y_log)
+    reduce_chunks(kernel, *x_range, 20_000, [reducer], chunk_size=chunk_size)
+    actual = reducer.result()
+
+    np.testing.assert_array_equal(actual[0], expected[0])
+    np.testing.assert_array_equal(actual[1], expected[1])
+
+
+def test_stats_and_sink_reducers() -> None:
+    """Test running statistics and streaming of blocks."""
+    kernel = compile_expression("log(x)")
+    blocks = []
+    stats, count = reduce_chunks(
+        kernel,
+        -1,
+        4,
+        5001,
+        [StatsReducer(), SinkReducer(lambda x, y: blocks.append(x[0]))],
+        chunk_size=1000,
+    )
+
+    x = np.linspace(-1, 4, 5001)
+    y = np.log(x)
+    finite = y[np.isfinite(y)]
+    assert count == 6 and blocks[1] == x[1000]
+    assert stats["count"] == 5001
+    assert stats["finite"] == finite.size
+    assert stats["max"] == finite.max() and stats["x_at_max"] == 4
+    assert stats["min"] == finite.min() and stats["x_at_min"] == x[y == finite.min()]
+    assert stats["mean"] == pytest.approx(finite.mean())
+    assert stats["std"] == pytest.approx(finite.std())
+
+
+def test_chunked_sampling_bounds_memory() -> None:
+    """Test that peak memory does not grow with the number of points."""
+    kernel = compile_expression("sin(x) * exp(-x**2)")
+    num_points = 4_000_000
+
+    tracemalloc.start()
+    x, y = sample_expression(
+        kernel, -5, 5, num_points, "uniform", chunk_size=1 << 16, width=1000
+    )
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # The full grid alone would take 32 MB
+    assert peak < 8 * 2**20
+    assert x[0] == -5 and x[-1] == 5
+    assert x.size <= 5000
+
+
+def test_update_plot_uses_chunks_for_large_grids() -> None:
+    """Test that chunked evaluation returns the same plot as a full one."""
+    body = {
+        "expression": "sin(x**2)",
+        "sampling": "uniform",
+        "num_points": 50_000,
+        "width": 200,
+        "format": "json",
+    }
+    responses = [
+        create_app({"CHUNK_SIZE": chunk_size})
+        .test_client()
+        .post("/api/update_plot", json=body)
+        .get_json()
+        for chunk_size in (1000, 1_000_000)
+    ]
+
+    chunked, full = (response["figure"]["data"][0] for response in responses)
+    assert chunked["x"] == full["x"]
+    assert chunked["y"] == full["y"]
@@ -0,0 +1,157 @@
+"""Test response compression and fingerprinted static assets."""
+
+import gzip
+import json
+import os
+import re
+from unittest.mock import patch
+
+import pytest
+from flask.testing import FlaskClient
+from werkzeug.datastructures import Accept
+
+from mathviber.app import create_app
+from mathviber.assets import STATIC_DIR
+from mathviber.compression import negotiate_encoding
+
+
+@pytest.fixture
+def client() -> FlaskClient:
+    """Create a test client for the Flask app.
+
+    Returns:
+        FlaskClient: Test client for making requests.
+    """
+    return create_app().test_client()
+
+
+def test_negotiate_encoding() -> None:
+    """Test that the accepted coding with the highest quality is chosen."""
+    with patch("mathviber.compression._brotli", return_value=object()):
+        assert negotiate_encoding(Accept([("gzip", 1), ("br", 1)])) == "br"
+        assert negotiate_encoding(Accept([("gzip", 1), ("br", 0.5)])) == "gzip"
+        assert negotiate_encoding(Accept([("*", 1)])) == "br"
+        assert negotiate_encoding(Accept([("gzip", 0)])) is None
+        assert negotiate_encoding(Accept()) is None
+
+    # Without the brotli package only gzip is offered
+    with patch("mathviber.compression._brotli", return_value=None):
+        assert negotiate_encoding(Accept([("br", 1)])) is None
+        assert negotiate_encoding(Accept([("br", 1), ("gzip", 0.1)])) == "gzip"
+
+
+def test_json_is_compressed(client: FlaskClient) -> None:
+    """Test that large JSON responses are gzipped when accepted.
+
+    Args:
+        client: Flask test client.
+    """
+    payload = {"expression": "sin(x)", "format": "json"}
+    plain = client.post("/api/update_plot", json=payload)
+    compressed = client.post(
+        "/api/update_plot", json=payload, headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert len(compressed.data) < len(plain.data) / 2
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+
+
+def test_brotli_is_preferred(client: FlaskClient) -> None:
+    """Test that Brotli is used when installed and accepted.
+
+    Args:
+        client: Flask test client.
+    """
+    brotli = pytest.importorskip("brotli")
+    response = client.post(
+        "/", data={"user_input": "x**2"}, headers={"Accept-Encoding": "gzip, br"}
+    )
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert b"Function: y =" in brotli.decompress(response.data)
+
+
+@pytest.mark.parametrize(
+    "path, kwargs",
+    [
+        # Below the size threshold
+        ("/api/update_plot", {"json": {"expression": ""}}),
+        # Streamed, so compression would hold back the first messages
+        ("/api/stream_plot", {"json": {"expression": "x"}}),
+    ],
+)
+def test_responses_left_uncompressed(client: FlaskClient, path: str, kwargs) -> None:
+    """Test that small and streamed responses are sent as they are.
+
+    Args:
+        client: Flask test client.
+        path: Route to request.
+        kwargs: Request arguments.
+    """
+    response = client.post(path, headers={"Accept-Encoding": "gzip"}, **kwargs)
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+
+
+def test_compression_can_be_disabled() -> None:
+    """Test that COMPRESSION_MIN_SIZE=None turns compression off."""
+    client = create_app({"COMPRESSION_MIN_SIZE": None}).test_client()
+    response = client.post(
+        "/", data={"user_input": "x**2"}, headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_page_assets_are_fingerprinted(client: FlaskClient) -> None:
+    """Test that CSS and JavaScript are served from immutable asset URLs.
+
+    Args:
+        client: Flask test client.
+    """
+    page = client.get("/").data.decode()
+    urls = re.findall(r'"(/assets/[0-9a-f]{16}/mathviber\.(?:css|js))"', page)
+    assert len(urls) == 2
+    assert "<style>" not in page
+
+    for url in urls:
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.cache_control.immutable
+        assert response.cache_control.max_age == 365 * 24 * 3600
+        with open(os.path.join(STATIC_DIR, url.rsplit("/", 1)[1]), "rb") as f:
+            assert gzip.decompress(response.data) == f.read()
+
+        etag = response.headers["ETag"]
+        revalidated = client.get(
+            url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        assert revalidated.status_code == 304
+
+        # Uncompressed responses have their own ETag
+        plain = client.get(url)
+        assert "Content-Encoding" not in plain.headers
+        assert plain.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/assets/0000000000000000/mathviber.css",
+        "/assets/0000000000000000/missing.css",
+        "/static/mathviber.css",
+    ],
+)
+def test_stale_asset_urls_are_not_found(client: FlaskClient, url: str) -> None:
+    """Test that assets are only served under their current fingerprint.
+
+    Args:
+        client: Flask test client.
+        url: Asset URL with a wrong fingerprint or path.
+    """
+    assert client.get(url).status_code == 404
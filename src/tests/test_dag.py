@@ -0,0 +1,137 @@
+"""Test shared evaluation of expression families."""
+
+import ast
+import time
+import weakref
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from mathviber.dag import ExpressionDAG, SubexpressionCache
+from mathviber.expressions import compile_expression
+
+FAMILY = ["sin(x)*exp(-x)", "cos(x)*exp(-x)", "exp(-x)", "exp(-x)*sin(x) + 1"]
+
+
+def test_shared_subtrees_become_one_node() -> None:
+    """Test that identical and commuted subtrees are merged."""
+    dag = ExpressionDAG(FAMILY)
+
+    # x, exp(-x) and its operands, sin, cos, the products and the sum
+    assert dag.stats() == {"expressions": 4, "nodes": 9}
+    assert dag.roots[2] == dag.nodes[dag.roots[0]].children[1]
+
+
+def test_results_match_compiled_kernels() -> None:
+    """Test that shared evaluation gives the same values as separate kernels."""
+    expressions = [*FAMILY, "x < 0", "2*pi", "x % 3 - x // 3", "abs(-x)**0.5"]
+    x = np.linspace(-5, 5, 101)
+
+    ys, errors = ExpressionDAG(expressions).evaluate(x)
+
+    assert errors == [None] * len(expressions)
+    for expression, y in zip(expressions, ys, strict=True):
+        expected = np.broadcast_to(compile_expression(expression)(x), x.shape)
+        np.testing.assert_array_equal(y, expected)
+
+
+def test_each_unique_node_is_evaluated_once() -> None:
+    """Test that a shared call runs once per evaluation."""
+    calls = []
+
+    def counting_exp(values: np.ndarray) -> np.ndarray:
+        calls.append(values)
+        return np.exp(values)
+
+    with patch.dict("mathviber.dag.ALLOWED_NAMES", {"exp": counting_exp}):
+        dag = ExpressionDAG(FAMILY)
+    dag.evaluate(np.linspace(0, 1, 10))
+
+    assert len(calls) == 1
+
+
+def test_intermediates_are_released() -> None:
+    """Test that an intermediate is freed once its last consumer is done."""
+    negated = []
+
+    def recording_neg(values: np.ndarray) -> np.ndarray:
+        result = -values
+        negated.append(weakref.ref(result))
+        return result
+
+    def checking_sin(values: np.ndarray) -> np.ndarray:
+        # -x was only needed by exp(-x), which has been evaluated already
+        assert negated[0]() is None
+        return np.sin(values)
+
+    with (
+        patch.dict("mathviber.dag._OPERATORS", {ast.USub: recording_neg}),
+        patch.dict("mathviber.dag.ALLOWED_NAMES", {"sin": checking_sin}),
+    ):
+        dag = ExpressionDAG(["exp(-x)*2", "sin(x)"])
+    ys, errors = dag.evaluate(np.linspace(0, 1, 10))
+
+    assert errors == [None, None]
+    assert len(negated) == 1
+
+
+def test_errors_are_reported_per_expression() -> None:
+    """Test that invalid expressions do not affect the others."""
+    ys, errors = ExpressionDAG(["q", "sin(x)", "x % 1j"]).evaluate(np.zeros(3))
+
+    assert ys[0] is None and errors[0] == "Unknown name 'q' at position 1"
+    np.testing.assert_array_equal(ys[1], np.zeros(3))
+    assert ys[2] is None and errors[2].startswith("Error evaluating expression")
+
+
+def test_huge_constant_powers_fail_fast() -> None:
+    """Test that constant powers are evaluated in floating point."""
+    expressions = ["9**9**9", "x", "x**9**9**9", "1" * 400]
+    started = time.monotonic()
+    ys, errors = ExpressionDAG(expressions).evaluate(np.ones(10))
+
+    assert time.monotonic() - started < 5
+    assert [y is None for y in ys] == [True, False, True, True]
+    assert errors[0].startswith("Error evaluating expression")
+    assert errors[2].startswith("Error evaluating expression")
+    assert errors[3] == "Number is too large"
+
+
+def test_cache_reuses_shared_nodes_across_requests() -> None:
+    """Test that a later request on the same grid reuses cached nodes."""
+    cache = SubexpressionCache()
+    x = np.linspace(0, 1, 10)
+    grid = ("linspace", 0, 1, 10)
+    first, _ = ExpressionDAG(FAMILY[:2]).evaluate(x, cache=cache, grid_key=grid)
+
+    # exp(-x) was shared, so the new family does not recompute it
+    with patch.dict(
+        "mathviber.dag.ALLOWED_NAMES",
+        {"exp": Mock(side_effect=AssertionError("exp(-x) was recomputed"), nin=1)},
+    ):
+        dag = ExpressionDAG(["sin(x)*exp(-x)", "tanh(x)*exp(-x)"])
+    ys, errors = dag.evaluate(x, cache=cache, grid_key=grid)
+
+    assert errors == [None, None]
+    assert ys[0] is first[0]
+    np.testing.assert_allclose(ys[1], np.tanh(x) * np.exp(-x))
+
+    # Other grids do not share entries
+    ys, _ = ExpressionDAG(["exp(-x)"]).evaluate(
+        x[:5], cache=cache, grid_key=("linspace", 0, 1, 5)
+    )
+    assert ys[0].shape == (5,)
+
+
+def test_cache_is_bounded_in_bytes() -> None:
+    """Test that the least recently used arrays are evicted first."""
+    cache = SubexpressionCache(max_bytes=160)
+    cache.set("a", np.zeros(10))
+    cache.set("b", np.zeros(10))
+    cache.set("c", np.zeros(10))
+
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 160
+    with pytest.raises(ValueError):
+        cache.get("b")[0] = 1.0
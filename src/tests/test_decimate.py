@@ -0,0 +1,140 @@
+"""Test downsampling of large traces."""
+
+import numpy as np
+import pytest
+
+from mathviber.app import create_app
+from mathviber.decimate import decimate, lttb_indices, m4_indices
+from mathviber.expressions import compile_expression
+from mathviber.sampling import adaptive_sample
+
+X = np.linspace(0, 10, 200_001)
+Y = np.sin(50 * X)
+
+
+def test_small_traces_are_unchanged() -> None:
+    """Test that traces already within the budget pass through."""
+    x = np.linspace(0, 1, 100)
+    x_out, y_out = decimate(x, x**2, width=100)
+
+    assert x_out is x
+    np.testing.assert_array_equal(y_out, x**2)
+
+
+def test_m4_keeps_extremes_of_every_column() -> None:
+    """Test that M4 preserves the min and max of each pixel column."""
+    y = Y.copy()
+    y[12345] = 25.0
+    y[150000] = -25.0
+    x_out, y_out = decimate(X, y, width=500)
+
+    assert x_out.size <= 4 * 500
+    assert y_out.max() == 25.0
+    assert y_out.min() == -25.0
+    assert x_out[0] == X[0] and x_out[-1] == X[-1]
+    assert np.all(np.diff(x_out) > 0)
+
+    columns = np.minimum((X * 50).astype(int), 499)
+    out_columns = np.minimum((x_out * 50).astype(int), 499)
+    for column in (0, 123, 499):
+        in_column = y[columns == column]
+        kept = y_out[out_columns == column]
+        assert kept.max() == in_column.max()
+        assert kept.min() == in_column.min()
+
+
+def test_m4_keeps_gaps() -> None:
+    """Test that NaN gaps survive decimation."""
+    y = Y.copy()
+    y[100000:100050] = np.nan
+    _, y_out = decimate(X, y, width=500)
+
+    assert np.isnan(y_out).sum() == 1
+
+
+def test_m4_width_must_be_positive() -> None:
+    """Test that a zero width is rejected."""
+    with pytest.raises(ValueError):
+        m4_indices(X, Y, 0)
+
+
+def test_lttb_selects_threshold_points() -> None:
+    """Test that LTTB returns the requested number of points."""
+    y = Y.copy()
+    y[54321] = 30.0
+    indices = lttb_indices(X, y, 1000)
+
+    assert indices.size == 1000
+    assert indices[0] == 0 and indices[-1] == X.size - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 54321 in indices
+
+
+def assert_no_line_across_gaps(y: np.ndarray, indices: np.ndarray) -> None:
+    """Check that no drawn segment joins points across non-finite values.
+
+    Args:
+        y: Original y values.
+        indices: Selected indices.
+    """
+    for start, stop in zip(indices[:-1], indices[1:], strict=True):
+        if np.isfinite(y[start]) and np.isfinite(y[stop]):
+            assert np.isfinite(y[start : stop + 1]).all()
+
+
+def test_lttb_keeps_gaps() -> None:
+    """Test that LTTB breaks the line where values are missing."""
+    y = Y.copy()
+    y[::7] = np.nan
+    indices = lttb_indices(X, y, 500)
+
+    assert indices.size <= 4 * 500
+    assert np.isfinite(y[indices]).sum() >= 500
+    assert_no_line_across_gaps(y, indices)
+
+
+def test_lttb_keeps_asymptotes() -> None:
+    """Test that LTTB does not join the branches of tan(x)."""
+    x, y = adaptive_sample(compile_expression("tan(x)"), -5, 5, budget=20000)
+    x_out, y_out = decimate(x, y, width=500, method="lttb")
+
+    assert np.isnan(y_out).sum() == 4
+    indices = np.searchsorted(x, x_out)
+    assert_no_line_across_gaps(y, indices)
+
+
+def test_unknown_method_is_rejected() -> None:
+    """Test that unknown methods raise ValueError."""
+    with pytest.raises(ValueError, match="Unknown decimation method"):
+        decimate(X, Y, 100, method="every-other")
+
+
+def test_update_api_payload_is_bounded() -> None:
+    """Test that dense evaluations are downsampled before plotting."""
+    client = create_app().test_client()
+    response = client.post(
+        "/api/update_plot",
+        json={
+            "expression": "sin(50*x)",
+            "sampling": "uniform",
+            "num_points": 500_000,
+            "width": 400,
+            "format": "json",
+        },
+    )
+    trace = response.get_json()["figure"]["data"][0]
+
+    assert len(trace["x"]) <= 4 * 400
+    assert max(trace["y"]) == pytest.approx(1.0, abs=1e-6)
+
+
+def test_update_api_limits_num_points() -> None:
+    """Test that requests above MAX_POINTS are rejected."""
+    client = create_app({"MAX_POINTS": 10_000}).test_client()
+    response = client.post(
+        "/api/update_plot", json={"expression": "x", "num_points": 20_000}
+    )
+
+    assert response.get_json() == {
+        "error": "Number of points must be between 3 and 10000"
+    }
@@ -0,0 +1,163 @@
+"""Test deferred rendering of downloadable plot images."""
+
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from mathviber.app import create_app, plot_spec_name
+from tests.conftest import FAKE_PNG, request_plot
+
+
+@pytest.fixture
+def app() -> Flask:
+    """Create a Flask app instance for testing.
+
+    Returns:
+        Flask: Test Flask application.
+    """
+    return create_app()
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """Create a test client for the Flask app.
+
+    Args:
+        app: Flask application fixture.
+
+    Returns:
+        FlaskClient: Test client for making requests.
+    """
+    return app.test_client()
+
+
+def test_update_plot_does_not_render_png(
+    client: FlaskClient, write_image: MagicMock
+) -> None:
+    """Test that plot updates return a filename without rasterizing.
+
+    Args:
+        client: Flask test client.
+        write_image: Rendering mock.
+    """
+    filename = request_plot(client)
+
+    assert filename.startswith("plot_") and filename.endswith(".png")
+    write_image.assert_not_called()
+
+
+def test_plot_rendered_on_first_request_and_cached(
+    client: FlaskClient, write_image: MagicMock
+) -> None:
+    """Test that the PNG is rendered once, on first request.
+
+    Args:
+        client: Flask test client.
+        write_image: Rendering mock.
+    """
+    filename = request_plot(client)
+
+    response = client.get(f"/plot/{filename}")
+    assert response.status_code == 200
+    assert response.content_type == "image/png"
+    assert response.data == FAKE_PNG
+
+    download_response = client.get(f"/download/{filename}")
+    assert download_response.status_code == 200
+    assert download_response.data == FAKE_PNG
+
+    assert write_image.call_count == 1
+
+
+def test_eager_render_mode(write_image: MagicMock) -> None:
+    """Test that disabling deferred rendering renders during the update.
+
+    Args:
+        write_image: Rendering mock.
+    """
+    client = create_app({"DEFERRED_RENDER": False}).test_client()
+
+    filename = request_plot(client)
+    assert write_image.call_count == 1
+
+    response = client.get(f"/plot/{filename}")
+    assert response.status_code == 200
+    assert write_image.call_count == 1
+
+
+def test_evicted_spec_is_read_from_the_store(write_image: MagicMock) -> None:
+    """Test that specs beyond the cache size are rendered from the store.
+
+    Args:
+        write_image: Rendering mock.
+    """
+    app = create_app({"PLOT_SPEC_CACHE_SIZE": 1})
+    client = app.test_client()
+
+    first = request_plot(client, "x**2")
+    request_plot(client, "x**3")
+
+    response = client.get(f"/plot/{first}")
+    assert response.status_code == 200
+    assert response.data == FAKE_PNG
+
+
+def test_plot_without_spec_is_not_found() -> None:
+    """Test that a plot whose spec is gone everywhere is not found."""
+    app = create_app({"PLOT_SPEC_CACHE_SIZE": 1})
+    client = app.test_client()
+    store = app.extensions["mathviber_artifact_store"]
+
+    first = request_plot(client, "x**2")
+    request_plot(client, "x**3")
+    os.remove(store.path(plot_spec_name(first)))
+
+    response = client.get(f"/plot/{first}")
+    assert response.status_code == 404
+    assert b"Plot not found" in response.data
+
+
+def test_deferred_plot_served_by_another_server(
+    tmp_path: Path, write_image: MagicMock
+) -> None:
+    """Test that servers sharing a store render each other's deferred plots.
+
+    Args:
+        tmp_path: Temporary directory.
+        write_image: Rendering mock.
+    """
+    config = {"ARTIFACT_DIR": str(tmp_path)}
+    first = create_app(config).test_client()
+    second = create_app(config).test_client()
+
+    filename = request_plot(first, "x")
+    write_image.assert_not_called()
+
+    response = second.get(f"/plot/{filename}")
+    assert response.status_code == 200
+    assert response.data == FAKE_PNG
+    assert first.get(f"/download/{filename}").data == FAKE_PNG
+    assert write_image.call_count == 1
+
+
+def test_render_failure_returns_error(client: FlaskClient) -> None:
+    """Test that a failing render is reported as a server error.
+
+    Args:
+        client: Flask test client.
+    """
+    filename = request_plot(client)
+
+    with patch(
+        "plotly.graph_objects.Figure.write_image",
+        autospec=True,
+        side_effect=RuntimeError("no renderer"),
+    ):
+        response = client.get(f"/download/{filename}")
+
+    assert response.status_code == 500
+    assert b"Error rendering plot" in response.data
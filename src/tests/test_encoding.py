@@ -0,0 +1,100 @@
+"""Test array encodings of plot responses."""
+
+import base64
+
+import numpy as np
+import pytest
+
+from mathviber.app import create_app
+from mathviber.encoding import (
+    binary_arrays_supported,
+    encode_array_binary,
+    encode_trace_array,
+)
+
+
+def decode(spec: dict[str, str]) -> np.ndarray:
+    """Decode a typed array specification the way Plotly.js does.
+
+    Args:
+        spec: Dictionary with ``dtype`` and ``bdata``.
+
+    Returns:
+        The decoded array.
+    """
+    return np.frombuffer(base64.b64decode(spec["bdata"]), dtype="<" + spec["dtype"])
+
+
+def test_binary_round_trip_keeps_non_finite_values() -> None:
+    """Test that float64 encoding is lossless, including NaN and infinity."""
+    values = np.array([0.1, -2.5, np.nan, np.inf, 1e300])
+    spec = encode_array_binary(values)
+
+    assert spec["dtype"] == "f8"
+    np.testing.assert_array_equal(decode(spec), values)
+
+
+def test_float32_encoding_halves_payload() -> None:
+    """Test that float32 encoding uses four bytes per value."""
+    values = np.linspace(0, 1, 1000)
+    spec = encode_trace_array(values, "float32")
+
+    assert spec["dtype"] == "f4"
+    assert len(base64.b64decode(spec["bdata"])) == 4000
+    np.testing.assert_allclose(decode(spec), values, rtol=1e-7)
+
+
+def test_text_encoding_is_a_list() -> None:
+    """Test that the text encoding returns plain JSON numbers."""
+    assert encode_trace_array(np.array([1.0, np.nan]), "text") == [1.0, None]
+
+
+def test_unknown_encoding_is_rejected() -> None:
+    """Test that unknown encodings raise a ValueError."""
+    with pytest.raises(ValueError, match="Unknown array encoding"):
+        encode_trace_array(np.zeros(3), "float16")
+
+
+@pytest.mark.parametrize(
+    ("version", "supported"),
+    [("2.27.1", False), ("2.28.0", True), ("3.0.1", True), ("dev", False)],
+)
+def test_binary_support_by_plotlyjs_version(version: str, supported: bool) -> None:
+    """Test detection of Plotly.js typed array support.
+
+    Args:
+        version: Plotly.js version string.
+        supported: Expected result.
+    """
+    assert binary_arrays_supported(version) is supported
+
+
+def test_update_api_returns_binary_arrays() -> None:
+    """Test that the update API ships typed arrays when requested."""
+    client = create_app().test_client()
+    response = client.post(
+        "/api/update_plot",
+        json={
+            "expression": "1/x",
+            "x_min": -1,
+            "x_max": 1,
+            "format": "json",
+            "encoding": "float64",
+            "sampling": "uniform",
+        },
+    )
+    trace = response.get_json()["figure"]["data"][0]
+
+    x = decode(trace["x"])
+    np.testing.assert_array_equal(x, np.linspace(-1, 1, 1000))
+    np.testing.assert_array_equal(decode(trace["y"]), 1 / x)
+
+
+def test_update_api_rejects_unknown_encoding() -> None:
+    """Test that an unknown encoding is reported as an error."""
+    client = create_app().test_client()
+    response = client.post(
+        "/api/update_plot",
+        json={"expression": "x", "format": "json", "encoding": "hex"},
+    )
+    assert response.get_json() == {"error": "Unknown encoding: hex"}
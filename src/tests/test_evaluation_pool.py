@@ -0,0 +1,194 @@
+"""Test the process pool evaluation backend."""
+
+from collections.abc import Iterator
+
+import numpy as np
+import pytest
+
+from mathviber.app import create_app
+from mathviber.evaluation import (
+    EvaluationKilled,
+    EvaluationPool,
+    EvaluationTimeout,
+    sample_batch,
+    sample_expression,
+)
+from mathviber.expressions import ExpressionError, compile_expression
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[EvaluationPool]:
+    """Create a one-worker evaluation pool shared by the tests.
+
+    Yields:
+        EvaluationPool: Started pool with a 64 MiB memory limit.
+    """
+    evaluation_pool = EvaluationPool(workers=1, timeout=10.0, memory_limit=64 * 2**20)
+    evaluation_pool.start()
+    yield evaluation_pool
+    evaluation_pool.shutdown()
+
+
+def test_results_match_inline_evaluation(pool: EvaluationPool) -> None:
+    """Test that worker results equal in-process sampling.
+
+    Args:
+        pool: Evaluation pool fixture.
+    """
+    for sampling in ("uniform", "adaptive"):
+        x, y = pool.evaluate("tan(x)", -5, 5, num_points=500, sampling=sampling)
+        expected_x, expected_y = sample_expression(
+            compile_expression("tan(x)"), -5, 5, num_points=500, sampling=sampling
+        )
+        np.testing.assert_array_equal(x, expected_x)
+        np.testing.assert_array_equal(y, expected_y)
+
+
+def test_errors_are_raised_in_the_caller(pool: EvaluationPool) -> None:
+    """Test that rejected expressions raise ExpressionError.
+
+    Args:
+        pool: Evaluation pool fixture.
+    """
+    with pytest.raises(ExpressionError, match="Unknown name 'q'"):
+        pool.evaluate("q", 0, 1)
+    assert pool.stats()["failed"] >= 1
+
+
+def test_batch_matches_inline_evaluation(pool: EvaluationPool) -> None:
+    """Test that batches evaluated by a worker equal in-process batches.
+
+    Args:
+        pool: Evaluation pool fixture.
+    """
+    expressions = ["sin(x)", "q", "tan(x)*exp(-x)"]
+    curves, errors = pool.evaluate_batch(expressions, -5, 5, 100_000, width=200)
+    expected_curves, expected_errors = sample_batch(
+        expressions, -5, 5, 100_000, width=200
+    )
+
+    assert errors == expected_errors
+    assert curves[1] is None
+    for curve, expected in zip(curves, expected_curves, strict=True):
+        if expected is not None:
+            np.testing.assert_array_equal(curve[0], expected[0])
+            np.testing.assert_array_equal(curve[1], expected[1])
+
+
+def test_timed_out_job_is_killed(pool: EvaluationPool) -> None:
+    """Test that a slow job is killed and its worker replaced.
+
+    Args:
+        pool: Evaluation pool fixture.
+    """
+    killed = pool.stats()["timed_out"]
+    with pytest.raises(EvaluationTimeout, match="timed out"):
+        pool.evaluate(
+            "sin(x)**cos(x)", 1, 2, num_points=1_000_000, sampling="uniform", timeout=0
+        )
+
+    assert pool.stats()["timed_out"] == killed + 1
+    x, _ = pool.evaluate("x", 0, 1, num_points=3)
+    np.testing.assert_array_equal(x, [0, 0.5, 1])
+
+
+def test_timings_count_only_finished_jobs() -> None:
+    """Test that timed-out jobs do not skew the average evaluation time."""
+    pool = EvaluationPool(workers=1, timeout=10.0)
+    try:
+        with pytest.raises(EvaluationTimeout):
+            pool.evaluate(
+                "sin(x)**cos(x)",
+                1,
+                2,
+                num_points=100_000_000,
+                sampling="uniform",
+                chunk_size=1 << 16,
+                timeout=0.3,
+            )
+        pool.evaluate("x", 0, 1, num_points=3)
+
+        stats = pool.stats()
+        assert stats["timed_out"] == 1
+        assert stats["eval_time_avg"] <= stats["eval_time_max"] < 0.3
+    finally:
+        pool.shutdown()
+
+
+def test_memory_limit_is_enforced(pool: EvaluationPool) -> None:
+    """Test that allocations beyond the limit become an error.
+
+    Args:
+        pool: Evaluation pool fixture.
+    """
+    with pytest.raises(ExpressionError, match="memory limit"):
+        pool.evaluate("x + x*x", 0, 1, num_points=20_000_000, sampling="uniform")
+
+    # The worker survives and keeps serving jobs
+    x, _ = pool.evaluate("x", 0, 1, num_points=3)
+    assert x.size == 3
+
+
+def test_dead_worker_is_replaced(pool: EvaluationPool) -> None:
+    """Test that a crashed worker turns into an error and is replaced.
+
+    Args:
+        pool: Evaluation pool fixture.
+    """
+    worker = pool._all[0]
+    worker.process.kill()
+    worker.process.join()
+
+    with pytest.raises(EvaluationKilled):
+        pool.evaluate("x", 0, 1)
+
+    assert pool.stats()["killed"] == 1
+    x, _ = pool.evaluate("x", 0, 1, num_points=3)
+    assert x.size == 3
+
+
+def test_update_plot_reports_timeouts() -> None:
+    """Test that killed jobs become clean API errors."""
+    app = create_app({"EVALUATION_BACKEND": "process", "EVALUATION_TIMEOUT": 0})
+    try:
+        response = app.test_client().post(
+            "/api/update_plot",
+            json={"expression": "sin(x)", "num_points": 1_000_000},
+        )
+        assert response.get_json() == {"error": "Evaluation timed out after 0 seconds"}
+
+        stats = app.test_client().get("/api/stats").get_json()
+        assert stats["evaluation_pool"]["timed_out"] == 1
+    finally:
+        app.extensions["mathviber_evaluation_pool"].shutdown()
+
+
+def test_batch_plot_reports_timeouts() -> None:
+    """Test that a slow expression times out without failing its batch."""
+    slow = "+".join(
+        "(" + "+".join(f"sin({k}*x+{g})" for k in range(1, 50)) + ")" for g in range(40)
+    )
+    app = create_app({"EVALUATION_BACKEND": "process", "EVALUATION_TIMEOUT": 1})
+    try:
+        response = app.test_client().post(
+            "/api/batch_plot",
+            json={"expressions": [slow, "x"], "num_points": 200_000},
+        )
+        data = response.get_json()
+        assert data["success"] is True
+        assert [trace["name"] for trace in data["figure"]["data"]] == ["y = x"]
+        assert data["errors"] == [
+            {
+                "index": 0,
+                "expression": slow,
+                "error": "Evaluation timed out after 1 seconds",
+            }
+        ]
+    finally:
+        app.extensions["mathviber_evaluation_pool"].shutdown()
+
+
+def test_unknown_backend_is_rejected() -> None:
+    """Test that a misconfigured backend fails at startup."""
+    with pytest.raises(ValueError, match="Unknown evaluation backend: threads"):
+        create_app({"EVALUATION_BACKEND": "threads"})
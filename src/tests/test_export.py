@@ -0,0 +1,214 @@
+"""Test headless rendering of plots to files."""
+
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mathviber.cli import main
+from mathviber.export import (
+    MANIFEST_NAME,
+    RenderItem,
+    parse_item,
+    read_items,
+    render_items,
+)
+
+
+def test_parse_item_converts_values() -> None:
+    """Test that CSV strings are converted and blank cells use defaults."""
+    item = parse_item(
+        {
+            "expression": "sin(x)",
+            "x_min": "0",
+            "x_max": "6.5",
+            "y_min": "",
+            "x_log": "no",
+            "y_log": "TRUE",
+            "num_points": "200",
+            "name": "sine",
+        },
+        default_format="svg",
+    )
+
+    assert item == RenderItem(
+        expression="sin(x)",
+        x_min=0.0,
+        x_max=6.5,
+        y_log=True,
+        num_points=200,
+        format="svg",
+        name="sine",
+    )
+    assert item.filename() == "sine.svg"
+    assert RenderItem("x").filename().startswith("plot_")
+
+
+@pytest.mark.parametrize(
+    "raw, message",
+    [
+        ({"x_min": "1"}, "No expression"),
+        ({"expression": "x", "colour": "red"}, "Unknown parameters: colour"),
+        ({"expression": "x", "x_min": "2", "x_max": "1"}, "less than"),
+        ({"expression": "x", "x_log": "maybe"}, "Invalid boolean"),
+        ({"expression": "x", "format": "pdf"}, "Unknown format"),
+        ({"expression": "x", "name": "../escape"}, "Invalid name"),
+    ],
+)
+def test_parse_item_rejects_invalid_rows(raw: dict, message: str) -> None:
+    """Test that invalid rows are rejected with a clear message.
+
+    Args:
+        raw: Row parameters.
+        message: Expected part of the error message.
+    """
+    with pytest.raises(ValueError, match=message):
+        parse_item(raw)
+
+
+def test_read_items_csv_and_jsonl(tmp_path: Path) -> None:
+    """Test that both input formats give the same items."""
+    csv_path = tmp_path / "items.csv"
+    csv_path.write_text("expression,x_max,y_log\nsin(x),5,\nexp(x),,true\n")
+    jsonl_path = tmp_path / "items.jsonl"
+    jsonl_path.write_text(
+        '{"expression": "sin(x)", "x_max": 5}\n\n'
+        '{"expression": "exp(x)", "y_log": true}\n'
+    )
+
+    expected = [
+        RenderItem("sin(x)", x_max=5.0),
+        RenderItem("exp(x)", y_log=True),
+    ]
+    assert list(read_items(str(csv_path))) == expected
+    assert list(read_items(str(jsonl_path))) == expected
+
+
+def test_read_items_names_invalid_line(tmp_path: Path) -> None:
+    """Test that a parse error reports the line it is on."""
+    path = tmp_path / "items.jsonl"
+    path.write_text('{"expression": "x"}\n[1, 2]\n')
+
+    with pytest.raises(ValueError, match="items.jsonl:2: Expected a JSON object"):
+        list(read_items(str(path)))
+
+
+def test_render_items_skips_up_to_date_files(tmp_path: Path) -> None:
+    """Test that only new, changed or missing plots are rendered again."""
+    items = [
+        RenderItem("sin(x)", format="html", name="sine"),
+        RenderItem("x**2", format="html", name="square"),
+    ]
+    summary = render_items(items, str(tmp_path), jobs=1)
+
+    assert sorted(summary["rendered"]) == ["sine.html", "square.html"]
+    assert "Plotly.newPlot" in (tmp_path / "sine.html").read_text()
+    assert (tmp_path / "plotly.min.js").exists()
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert manifest == {"sine.html": items[0].key(), "square.html": items[1].key()}
+
+    summary = render_items(items, str(tmp_path), jobs=1)
+    assert summary == {
+        "rendered": [],
+        "skipped": ["sine.html", "square.html"],
+        "failed": [],
+    }
+
+    # A changed item and a deleted file are rendered again
+    items[1] = RenderItem("x**3", format="html", name="square")
+    (tmp_path / "sine.html").unlink()
+    summary = render_items(items, str(tmp_path), jobs=1)
+    assert sorted(summary["rendered"]) == ["sine.html", "square.html"]
+
+    assert render_items(items, str(tmp_path), jobs=1, force=True)["skipped"] == []
+
+
+def test_render_items_continues_after_failure(tmp_path: Path) -> None:
+    """Test that a failing item is reported without stopping the others."""
+    items = [
+        RenderItem("__import__('os')", format="html", name="bad"),
+        RenderItem("x", format="html", name="good"),
+        RenderItem("x**2", format="html", name="good"),
+    ]
+    summary = render_items(items, str(tmp_path), jobs=1)
+
+    assert summary["rendered"] == ["good.html"]
+    assert [name for name, _ in summary["failed"]] == [
+        "good.html (item 3)",
+        "bad.html",
+    ]
+    assert not (tmp_path / "bad.html").exists()
+    assert [p for p in os.listdir(tmp_path) if p.endswith(".tmp")] == []
+
+
+def test_render_items_rejects_duplicate_names(tmp_path: Path) -> None:
+    """Test that a later item reusing a name fails without affecting the first."""
+    first = RenderItem("x", format="html", name="line")
+    duplicate = RenderItem("x**2", format="html", name="line")
+    failed = [("line.html (item 2)", "Duplicate output name")]
+    reported = []
+
+    def progress(filename: str, error: str | None) -> None:
+        reported.append((filename, error))
+
+    summary = render_items([first, duplicate, first], str(tmp_path), jobs=1)
+    assert summary == {"rendered": ["line.html"], "skipped": [], "failed": failed}
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert manifest == {"line.html": first.key()}
+
+    # The duplicate of an up-to-date item is rejected too
+    summary = render_items([first, duplicate], str(tmp_path), progress=progress)
+    assert summary == {"rendered": [], "skipped": ["line.html"], "failed": failed}
+    assert reported == failed
+
+
+def test_render_items_in_parallel(tmp_path: Path) -> None:
+    """Test that items are rendered in worker processes."""
+    items = [RenderItem(f"sin({k}*x)", format="html") for k in range(1, 4)]
+    summary = render_items(items, str(tmp_path), jobs=2)
+
+    assert sorted(summary["rendered"]) == sorted(item.filename() for item in items)
+    assert all((tmp_path / item.filename()).exists() for item in items)
+
+
+def test_render_image_uses_static_figure(tmp_path: Path) -> None:
+    """Test that image formats are written with the static figure size."""
+
+    def write_image(fig, path, format, width, height, scale) -> None:
+        Path(path).write_text(f"{format} {width}x{height}@{scale}")
+
+    with patch("plotly.graph_objects.Figure.write_image", write_image):
+        summary = render_items(
+            [RenderItem("x", format="svg", name="line")], str(tmp_path), jobs=1
+        )
+
+    assert summary["rendered"] == ["line.svg"]
+    assert (tmp_path / "line.svg").read_text() == "svg 800x500@2"
+
+
+def test_cli_render(tmp_path: Path, capsys) -> None:
+    """Test the render subcommand and its exit status."""
+    items = tmp_path / "items.csv"
+    items.write_text("expression,name\nsin(x),sine\n")
+    out = tmp_path / "out"
+
+    assert main(["render", str(items), "-o", str(out), "-f", "html", "-j", "1"]) == 0
+    assert "1 rendered, 0 up to date, 0 failed" in capsys.readouterr().out
+    assert (out / "sine.html").exists()
+
+    items.write_text("expression,name\nsin(x),sine\nfoo(x),bad\n")
+    assert main(["render", str(items), "-o", str(out), "-f", "html"]) == 1
+    captured = capsys.readouterr()
+    assert "0 rendered, 1 up to date, 1 failed" in captured.out
+    assert "Failed bad.html" in captured.err
+
+
+def test_cli_render_reports_invalid_input(tmp_path: Path, capsys) -> None:
+    """Test that an unreadable items file exits with an error."""
+    with pytest.raises(SystemExit) as exc_info:
+        main(["render", str(tmp_path / "missing.csv"), "-o", str(tmp_path)])
+
+    assert exc_info.value.code == 1
+    assert "missing.csv" in capsys.readouterr().err
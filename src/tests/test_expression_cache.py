@@ -0,0 +1,94 @@
+"""Test the compiled expression cache."""
+
+import pytest
+
+from mathviber.app import create_app
+from mathviber.expressions import ExpressionCache, ExpressionError
+
+
+def test_repeat_compile_is_a_hit() -> None:
+    """Test that compiling the same expression twice reuses the kernel."""
+    cache = ExpressionCache()
+
+    first = cache.compile("sin(x)")
+    second = cache.compile("  sin(x) ")
+
+    assert first is second
+    assert cache.stats() == {"maxsize": 512, "size": 1, "hits": 1, "misses": 1}
+
+
+def test_power_spellings_share_an_entry() -> None:
+    """Test that ``^`` and ``**`` normalize to the same cache key."""
+    cache = ExpressionCache()
+
+    assert cache.compile("x^2") is cache.compile("x**2")
+    assert cache.stats()["size"] == 1
+
+
+def test_rejected_expressions_are_cached() -> None:
+    """Test that rejected expressions raise on every lookup."""
+    cache = ExpressionCache()
+
+    for _ in range(2):
+        with pytest.raises(ExpressionError, match="Unknown function"):
+            cache.compile("__import__('os')")
+        with pytest.raises(ExpressionError, match="Invalid syntax"):
+            cache.compile("x +")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+
+
+def test_cached_rejection_positions_match_each_spelling() -> None:
+    """Test that a cached rejection reports positions as typed."""
+    cache = ExpressionCache()
+
+    with pytest.raises(ExpressionError, match="position 8"):
+        cache.compile("x**2 + foo")
+    with pytest.raises(ExpressionError, match="position 9"):
+        cache.compile("  x^2 + foo")
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    """Test that the cache size limit evicts the oldest entry."""
+    cache = ExpressionCache(maxsize=2)
+
+    cache.compile("x")
+    cache.compile("x + 1")
+    cache.compile("x")
+    cache.compile("x + 2")
+
+    assert cache.stats()["size"] == 2
+    cache.compile("x")
+    assert cache.stats()["hits"] == 2
+    cache.compile("x + 1")
+    assert cache.stats()["misses"] == 4
+
+
+def test_zero_size_disables_caching() -> None:
+    """Test that a cache size of zero keeps no entries."""
+    cache = ExpressionCache(maxsize=0)
+
+    cache.compile("x")
+    cache.compile("x")
+
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["misses"] == 2
+
+
+def test_app_reports_cache_counters() -> None:
+    """Test that plot updates use the cache and expose its counters."""
+    client = create_app({"EXPRESSION_CACHE_SIZE": 8}).test_client()
+
+    for x_max in (5, 10):
+        response = client.post(
+            "/api/update_plot", json={"expression": "x**2", "x_max": x_max}
+        )
+        assert response.get_json()["success"] is True
+
+    stats = client.get("/api/stats").get_json()["expression_cache"]
+    assert stats["maxsize"] == 8
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
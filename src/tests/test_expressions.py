@@ -0,0 +1,122 @@
+"""Test the AST based expression compiler."""
+
+import time
+
+import numpy as np
+import pytest
+
+from mathviber.app import create_app
+from mathviber.expressions import compile_expression, parse_expression
+
+X = np.linspace(0.5, 2.0, 7)
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected"),
+    [
+        ("sin(x) + x^2", np.sin(X) + X**2),
+        ("x**2 + 2*x + 1", X**2 + 2 * X + 1),
+        ("-exp(-x) % 1", -np.exp(-X) % 1),
+        ("log10(x) // 1", np.log10(X) // 1),
+        ("pow(x, 3) / sqrt(x)", np.power(X, 3) / np.sqrt(X)),
+        ("abs(cos(pi*x)) * e", np.abs(np.cos(np.pi * X)) * np.e),
+        ("(x > 1) * x", (X > 1) * X),
+    ],
+)
+def test_kernel_matches_numpy(expression: str, expected: np.ndarray) -> None:
+    """Test that compiled kernels compute the same values as NumPy.
+
+    Args:
+        expression: Expression to compile.
+        expected: Values computed directly with NumPy.
+    """
+    kernel = compile_expression(expression)
+    np.testing.assert_allclose(kernel(X), expected)
+
+
+def test_constant_expression_returns_scalar() -> None:
+    """Test that expressions without x evaluate to a scalar."""
+    assert compile_expression("sin(pi/2) + cos(0)")(X) == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize(
+    ("expression", "message"),
+    [
+        ("import os", "Invalid syntax"),
+        ("x +", "Invalid syntax"),
+        ("__builtins__", "Unknown name '__builtins__' at position 1"),
+        ("x + y", "Unknown name 'y' at position 5"),
+        ("open('file.txt')", "Unknown function 'open' at position 1"),
+        ("x.real", "Unsupported syntax 'Attribute' at position 1"),
+        ("2 * sin", "Function 'sin' must be called at position 5"),
+        ("pi(x)", "Unknown function 'pi' at position 1"),
+        ("x + 'a'", "Unsupported constant 'a' at position 5"),
+        ("[x for x in ()]", "Unsupported syntax 'ListComp' at position 1"),
+        ("sin(x=1)", "Keyword arguments are not supported at position 5"),
+        ("sin(x, x)", "Function 'sin' takes 1 argument at position 1"),
+        ("pow(x)", "Function 'pow' takes 2 arguments at position 1"),
+        ("x and 1", "Unsupported syntax 'BoolOp' at position 1"),
+        ("x << 2", "Unsupported operator LShift at position 1"),
+        ("0 < x < 1", "Unsupported comparison at position 1"),
+    ],
+)
+def test_rejected_expressions(expression: str, message: str) -> None:
+    """Test that disallowed syntax is rejected with its position.
+
+    Args:
+        expression: Expression to compile.
+        message: Expected start of the error message.
+    """
+    with pytest.raises(ValueError) as exc_info:
+        parse_expression(expression)
+    assert str(exc_info.value).startswith(message)
+
+
+@pytest.mark.parametrize(
+    ("expression", "position"),
+    [
+        ("x^2 + foo", 7),
+        ("   x^2 + foo", 10),
+        ("  x**2 + foo", 10),
+        (" x^2^3 + foo", 10),
+        (" x^2 + )", 8),
+    ],
+)
+def test_positions_refer_to_typed_expression(expression: str, position: int) -> None:
+    """Test that positions count the characters as typed.
+
+    Args:
+        expression: Expression to compile.
+        position: Expected 1-based position of the error.
+    """
+    with pytest.raises(ValueError, match=f"at position {position}\\b"):
+        compile_expression(expression)
+    assert expression[position - 1] in "f)"
+
+
+def test_deeply_nested_expression_is_rejected() -> None:
+    """Test that pathological nesting fails cleanly."""
+    with pytest.raises(ValueError, match="too complex|Invalid syntax"):
+        compile_expression("(" * 5000 + "x" + ")" * 5000)
+
+
+def test_huge_integer_literal_is_rejected() -> None:
+    """Test that integer literals beyond the float range are rejected."""
+    with pytest.raises(ValueError, match="Number is too large at position 3"):
+        compile_expression("x+" + "9" * 400)
+
+
+@pytest.mark.parametrize("expression", ["9**9**9", "x**9**9**9"])
+def test_huge_constant_powers_fail_fast(expression: str) -> None:
+    """Test that constant powers are computed in floating point.
+
+    Args:
+        expression: Expression with an enormous constant power.
+    """
+    client = create_app().test_client()
+
+    started = time.monotonic()
+    data = client.post("/api/update_plot", json={"expression": expression}).get_json()
+
+    assert time.monotonic() - started < 5
+    assert data["error"].startswith("Error evaluating expression")
@@ -0,0 +1,120 @@
+"""Test the compact figure JSON response of the update API."""
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from mathviber.app import PLOT_CONFIG, create_app
+from mathviber.encoding import encode_array
+
+
+@pytest.fixture
+def app() -> Flask:
+    """Create a Flask app instance for testing.
+
+    Returns:
+        Flask: Test Flask application.
+    """
+    return create_app()
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """Create a test client for the Flask app.
+
+    Args:
+        app: Flask application fixture.
+
+    Returns:
+        FlaskClient: Test client for making requests.
+    """
+    return app.test_client()
+
+
+def test_json_format_returns_figure(client: FlaskClient) -> None:
+    """Test that the JSON format returns trace data and layout only.
+
+    Args:
+        client: Flask test client.
+    """
+    response = client.post(
+        "/api/update_plot",
+        json={
+            "expression": "x**2",
+            "x_min": 0,
+            "x_max": 2,
+            "graph_title": "Parabola",
+            "y_log": True,
+            "format": "json",
+            "sampling": "uniform",
+        },
+    )
+    data = response.get_json()
+
+    assert data["success"] is True
+    assert "plot_html" not in data
+    assert b"<script" not in response.data
+    assert data["config"] == PLOT_CONFIG
+    assert data["plot_filename"].endswith(".png")
+
+    figure = data["figure"]
+    assert set(figure) == {"data", "layout"}
+    assert "template" not in figure["layout"]
+    assert figure["layout"]["title"]["text"] == "Parabola"
+    assert figure["layout"]["yaxis"]["type"] == "log"
+
+    trace = figure["data"][0]
+    assert trace["type"] == "scatter"
+    assert len(trace["x"]) == 1000
+    assert trace["x"][0] == 0.0 and trace["x"][-1] == 2.0
+    assert trace["y"][-1] == 4.0
+
+
+def test_formats_are_cached_separately(client: FlaskClient) -> None:
+    """Test that the response format is part of the cache key.
+
+    Args:
+        client: Flask test client.
+    """
+    client.post("/api/update_plot", json={"expression": "x"})
+    response = client.post(
+        "/api/update_plot", json={"expression": "x", "format": "json"}
+    )
+
+    assert response.headers["X-Cache"] == "MISS"
+    assert "figure" in response.get_json()
+
+
+def test_unknown_format_is_rejected(client: FlaskClient) -> None:
+    """Test that unsupported formats return an error.
+
+    Args:
+        client: Flask test client.
+    """
+    response = client.post(
+        "/api/update_plot", json={"expression": "x", "format": "svg"}
+    )
+    assert response.get_json() == {"error": "Unknown format: svg"}
+
+
+def test_non_finite_values_become_null() -> None:
+    """Test that NaN and infinity are encoded as JSON null."""
+    import numpy as np
+
+    assert encode_array(np.array([1.0, np.nan, np.inf, -2.0])) == [
+        1.0,
+        None,
+        None,
+        -2.0,
+    ]
+
+
+def test_page_loads_plotlyjs_once(client: FlaskClient) -> None:
+    """Test that the page loads Plotly.js itself, not once per plot.
+
+    Args:
+        client: Flask test client.
+    """
+    response = client.post("/", data={"user_input": "x"})
+    assert response.data.count(b"/plotly.min.js") == 1
+    assert b"cdn.plot.ly" not in response.data
@@ -0,0 +1,130 @@
+"""Test figures built from the prebuilt layouts."""
+
+import copy
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from mathviber.figures import (
+    INTERACTIVE_LAYOUT,
+    STATIC_LAYOUT,
+    batch_figure_spec,
+    build_static_figure,
+    create_figure_json,
+    create_interactive_plot,
+    encode_figure,
+    interactive_figure_spec,
+)
+
+PLOT_OPTIONS = {
+    "x_name": "t",
+    "y_name": "v",
+    "x_log": True,
+    "y_log": False,
+    "y_min": 0.0,
+    "y_max": None,
+}
+
+
+@pytest.fixture
+def data() -> tuple[np.ndarray, np.ndarray]:
+    """Create sample data with a gap.
+
+    Returns:
+        Tuple of (x, y) arrays.
+    """
+    x = np.linspace(0.1, 2, 50)
+    y = np.sin(x)
+    y[10] = np.nan
+    return x, y
+
+
+def validated(figure: dict) -> dict:
+    """Pass a figure spec through Plotly's validation.
+
+    Args:
+        figure: Figure spec.
+
+    Returns:
+        The validated spec, without the default template.
+    """
+    result = go.Figure(figure).to_plotly_json()
+    result["layout"].pop("template")
+    return result
+
+
+def test_specs_are_valid(data: tuple[np.ndarray, np.ndarray]) -> None:
+    """Test that the specs are unchanged by Plotly's validation.
+
+    Args:
+        data: Sample data.
+    """
+    x, y = data
+    figure = create_figure_json("sin(x)", x, y, encoding="float64", **PLOT_OPTIONS)
+    assert validated(figure) == figure
+    assert figure["layout"]["title"]["text"] == "v = sin(x)"
+    assert figure["layout"]["xaxis"]["type"] == "log"
+    assert figure["layout"]["yaxis"]["range"][0] == 0.0
+
+    curves = [("sin(x)", x, y), ("cos(x)", x, np.cos(x))]
+    batch = encode_figure(batch_figure_spec(curves, **PLOT_OPTIONS), "float64")
+    assert validated(batch) == batch
+    assert batch["layout"]["showlegend"]
+
+    # Static figures skip validation when built
+    static = build_static_figure("sin(x)", x, y, **PLOT_OPTIONS)
+    assert json.loads(go.Figure(static.to_dict()).to_json()) == json.loads(
+        static.to_json()
+    )
+    assert static.layout.width == 800
+
+
+def test_autorange_omits_range(data: tuple[np.ndarray, np.ndarray]) -> None:
+    """Test that no y range is sent when Plotly should autorange.
+
+    Args:
+        data: Sample data.
+    """
+    x, y = data
+    figure = interactive_figure_spec("sin(x)", x, y)
+    assert "range" not in figure["layout"]["yaxis"]
+    assert figure["layout"]["xaxis"]["type"] == "linear"
+
+
+@pytest.mark.parametrize(("encoding", "binary"), [("text", False), ("float64", True)])
+def test_interactive_plot_uses_encoding(
+    data: tuple[np.ndarray, np.ndarray], encoding: str, binary: bool
+) -> None:
+    """Test that the HTML fragment encodes arrays as requested.
+
+    Args:
+        data: Sample data.
+        encoding: Array encoding.
+        binary: Whether the arrays are expected as typed arrays.
+    """
+    x, y = data
+    plot_html, _ = create_interactive_plot("sin(x)", x, y, encoding=encoding)
+
+    assert ('"bdata"' in plot_html) is binary
+
+
+def test_base_layouts_are_not_modified(data: tuple[np.ndarray, np.ndarray]) -> None:
+    """Test that per-plot fields do not leak into the shared layouts.
+
+    Args:
+        data: Sample data.
+    """
+    x, y = data
+    interactive = copy.deepcopy(INTERACTIVE_LAYOUT)
+    static = copy.deepcopy(STATIC_LAYOUT)
+
+    first = create_figure_json("sin(x)", x, y, graph_title="First", **PLOT_OPTIONS)
+    create_interactive_plot("cos(x)", x, y, graph_title="Second")
+    build_static_figure("tan(x)", x, y, graph_title="Third", y_max=1.0)
+    batch_figure_spec([("x", x, y)], graph_title="Fourth")
+
+    assert INTERACTIVE_LAYOUT == interactive
+    assert STATIC_LAYOUT == static
+    assert first["layout"]["title"]["text"] == "First"
@@ -0,0 +1,73 @@
+"""Test that importing the package stays fast.
+
+Workers are started on demand, so import time is part of their cold start.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Budget for importing mathviber.app, excluding Flask and NumPy, which it
+# cannot do without; override with MATHVIBER_IMPORT_BUDGET_MS on slow machines
+IMPORT_BUDGET_MS = float(os.environ.get("MATHVIBER_IMPORT_BUDGET_MS", 150))
+
+# Heavy packages that must only be imported when first used
+DEFERRED_PACKAGES = ("plotly", "kaleido", "pandas", "sympy")
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Import a module in a fresh interpreter and report import times.
+
+    Args:
+        module: Module to import.
+
+    Returns:
+        Cumulative import time in microseconds of every module imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "module, forbidden",
+    [
+        ("mathviber.app", DEFERRED_PACKAGES),
+        ("mathviber.cli", DEFERRED_PACKAGES + ("numpy", "flask")),
+    ],
+)
+def test_heavy_packages_are_not_imported(
+    module: str, forbidden: tuple[str, ...]
+) -> None:
+    """Test that importing a module leaves heavy packages unloaded.
+
+    Args:
+        module: Module to import.
+        forbidden: Top-level packages that must not be imported.
+    """
+    loaded = {name.split(".")[0] for name in import_times(module)}
+    assert loaded.isdisjoint(forbidden), sorted(loaded & set(forbidden))
+
+
+def test_app_import_time_budget() -> None:
+    """Test that mathviber.app imports within its time budget."""
+    own_times = []
+    for _ in range(3):
+        times = import_times("mathviber.app")
+        own = times["mathviber.app"] - times["flask"] - times["numpy"]
+        own_times.append(own / 1000)
+
+    assert min(own_times) <= IMPORT_BUDGET_MS
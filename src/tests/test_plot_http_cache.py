@@ -0,0 +1,104 @@
+"""Test HTTP caching of plot images."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from flask.testing import FlaskClient
+
+from mathviber.app import create_app
+from tests.conftest import FAKE_PNG, request_plot
+
+
+@pytest.fixture
+def client() -> FlaskClient:
+    """Create a test client for the Flask app.
+
+    Returns:
+        FlaskClient: Test client for making requests.
+    """
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize("route", ["plot", "download"])
+def test_images_are_cacheable(
+    client: FlaskClient, write_image: MagicMock, route: str
+) -> None:
+    """Test that images carry a strong ETag and immutable cache headers.
+
+    Args:
+        client: Flask test client.
+        write_image: Rendering mock.
+        route: Image route.
+    """
+    filename = request_plot(client)
+    response = client.get(f"/{route}/{filename}")
+
+    assert response.status_code == 200
+    assert response.data == FAKE_PNG
+    assert response.get_etag() == (filename.removesuffix(".png"), False)
+    cache_control = response.cache_control
+    assert cache_control.public and cache_control.immutable
+    assert cache_control.max_age == 365 * 24 * 3600
+    assert cache_control.no_cache is None
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+
+def test_matching_etag_is_not_modified(
+    client: FlaskClient, write_image: MagicMock
+) -> None:
+    """Test that revalidation is answered without rendering or reading.
+
+    Args:
+        client: Flask test client.
+        write_image: Rendering mock.
+    """
+    filename = request_plot(client)
+    etag = filename.removesuffix(".png")
+
+    for if_none_match in (f'"{etag}"', f'W/"{etag}"', f'"other", "{etag}"'):
+        response = client.get(
+            f"/plot/{filename}", headers={"If-None-Match": if_none_match}
+        )
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.cache_control.immutable
+    write_image.assert_not_called()
+
+    response = client.get(f"/plot/{filename}", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert write_image.call_count == 1
+
+
+def test_range_requests(client: FlaskClient, write_image: MagicMock) -> None:
+    """Test that byte ranges of an image are served.
+
+    Args:
+        client: Flask test client.
+        write_image: Rendering mock.
+    """
+    filename = request_plot(client)
+
+    response = client.get(f"/download/{filename}", headers={"Range": "bytes=0-3"})
+    assert response.status_code == 206
+    assert response.data == FAKE_PNG[:4]
+    assert response.headers["Content-Range"] == f"bytes 0-3/{len(FAKE_PNG)}"
+
+    response = client.get(f"/download/{filename}", headers={"Range": "bytes=999-"})
+    assert response.status_code == 416
+
+
+@pytest.mark.parametrize(
+    "filename", ["plot_" + "0" * 32 + ".png", "other.png", "plot_abc.png"]
+)
+def test_unknown_images_are_not_cached(client: FlaskClient, filename: str) -> None:
+    """Test that missing images return an uncached 404.
+
+    Args:
+        client: Flask test client.
+        filename: Unknown or malformed plot filename.
+    """
+    response = client.get(f"/plot/{filename}")
+
+    assert response.status_code == 404
+    assert "Cache-Control" not in response.headers
+    assert "ETag" not in response.headers
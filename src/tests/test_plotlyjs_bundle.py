@@ -0,0 +1,162 @@
+"""Test the self-hosted Plotly.js bundle."""
+
+import gzip
+import os
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from flask.testing import FlaskClient
+
+from mathviber.app import create_app
+from mathviber.assets import STATIC_DIR, asset_path, plotlyjs_version
+
+BUILD_SCRIPT = os.path.join(
+    os.path.dirname(__file__), "..", "..", "scripts", "build_plotlyjs.py"
+)
+
+
+@pytest.fixture
+def client() -> FlaskClient:
+    """Create a test client for the Flask app.
+
+    Returns:
+        FlaskClient: Test client for making requests.
+    """
+    return create_app().test_client()
+
+
+@pytest.fixture
+def static_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Serve static assets from a temporary copy of the static directory.
+
+    Args:
+        tmp_path: Temporary directory.
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        The static directory.
+    """
+    for name in ("mathviber.css", "mathviber.js"):
+        shutil.copy(os.path.join(STATIC_DIR, name), tmp_path)
+    monkeypatch.setattr("mathviber.assets.STATIC_DIR", str(tmp_path))
+    return tmp_path
+
+
+def bundle_url(page: bytes) -> str:
+    """Extract the Plotly.js URL from a page.
+
+    Args:
+        page: HTML of the page.
+
+    Returns:
+        The bundle's URL.
+    """
+    match = re.search(rb'src="(/assets/[0-9a-f]{16}/plotly\.min\.js)"', page)
+    assert match is not None
+    return match.group(1).decode()
+
+
+def test_page_loads_self_hosted_bundle(client: FlaskClient) -> None:
+    """Test that the page loads Plotly.js from the app, not a CDN.
+
+    Args:
+        client: Flask test client.
+    """
+    page = client.get("/").data
+    assert b"cdn.plot.ly" not in page
+
+    response = client.get(bundle_url(page), headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/javascript"
+    assert response.cache_control.immutable
+    with open(asset_path("plotly.min.js"), "rb") as f:
+        assert gzip.decompress(response.data) == f.read()
+
+
+def test_html_fragments_do_not_reference_cdn(client: FlaskClient) -> None:
+    """Test that plot fragments point embedders at the served bundle.
+
+    Args:
+        client: Flask test client.
+    """
+    data = client.post(
+        "/api/update_plot", json={"expression": "x", "format": "html"}
+    ).get_json()
+
+    assert "cdn.plot.ly" not in data["plot_html"]
+    assert data["plotlyjs_url"] == bundle_url(client.get("/").data)
+
+
+def test_built_bundle_overrides_package_bundle(
+    client: FlaskClient, static_dir: Path
+) -> None:
+    """Test that a bundle in the static directory is served instead.
+
+    Args:
+        client: Flask test client.
+        static_dir: Temporary static directory.
+    """
+    bundle = b"/**\n* plotly.js v2.20.0\n*/\n" + b"var Plotly = {};\n" * 100
+    (static_dir / "plotly.min.js").write_bytes(bundle)
+
+    assert plotlyjs_version() == "2.20.0"
+    page = client.get("/").data
+    # Plotly.js 2.20 cannot decode typed arrays
+    assert b'data-array-encoding="text"' in page
+    fragment = client.post("/api/update_plot", json={"expression": "x"}).get_json()
+    assert "bdata" not in fragment["plot_html"]
+    assert client.get(bundle_url(page)).data == bundle
+
+
+def test_precompressed_copy_is_served(client: FlaskClient, static_dir: Path) -> None:
+    """Test that a valid precompressed copy is used as it is.
+
+    Args:
+        client: Flask test client.
+        static_dir: Temporary static directory.
+    """
+    bundle = b"/**\n* plotly.js v3.0.0\n*/\n" + os.urandom(4096)
+    precompressed = gzip.compress(bundle, compresslevel=1)
+    (static_dir / "plotly.min.js").write_bytes(bundle)
+    (static_dir / "plotly.min.js.gz").write_bytes(precompressed)
+
+    url = bundle_url(client.get("/").data)
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.data == precompressed
+
+    # A copy that does not match the bundle is ignored
+    (static_dir / "plotly.min.js").write_bytes(bundle + b"\n")
+    url = bundle_url(client.get("/").data)
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert gzip.decompress(response.data) == bundle + b"\n"
+
+
+def test_build_script(tmp_path: Path) -> None:
+    """Test that the build script installs a given bundle and its copies.
+
+    Args:
+        tmp_path: Temporary directory.
+    """
+    source = tmp_path / "plotly-scatter.min.js"
+    source.write_bytes(b"/**\n* plotly.js v3.1.0\n*/\nvar Plotly = {};\n")
+    output_dir = tmp_path / "static"
+
+    def build(*args: str) -> str:
+        return subprocess.run(
+            [sys.executable, BUILD_SCRIPT, "--output-dir", str(output_dir), *args],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    assert "Plotly.js 3.1.0" in build("--source", str(source))
+    assert (output_dir / "plotly.min.js").read_bytes() == source.read_bytes()
+    gzipped = (output_dir / "plotly.min.js.gz").read_bytes()
+    assert gzip.decompress(gzipped) == source.read_bytes()
+
+    build("--clean")
+    assert list(output_dir.iterdir()) == []
@@ -0,0 +1,142 @@
+"""Test the static image render pool."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from mathviber.app import create_app
+from mathviber.render import RenderPool, RenderQueueFull, RenderTimeout
+
+
+@pytest.fixture
+def pool():
+    """Create a small render pool and shut it down after the test.
+
+    Yields:
+        RenderPool: Pool with one worker and a single queue slot.
+    """
+    render_pool = RenderPool(workers=1, queue_size=1, timeout=5.0)
+    yield render_pool
+    render_pool.shutdown()
+
+
+def test_run_returns_result(pool: RenderPool) -> None:
+    """Test that jobs run on a worker and return their result.
+
+    Args:
+        pool: Render pool fixture.
+    """
+    assert pool.run(lambda: threading.current_thread().name) == "mathviber-render-0"
+
+    stats = pool.stats()
+    assert stats["submitted"] == 1
+    assert stats["completed"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_run_propagates_errors(pool: RenderPool) -> None:
+    """Test that job exceptions are raised in the caller.
+
+    Args:
+        pool: Render pool fixture.
+    """
+
+    def fail() -> None:
+        raise ValueError("bad plot")
+
+    with pytest.raises(ValueError, match="bad plot"):
+        pool.run(fail)
+    assert pool.stats()["failed"] == 1
+
+
+def test_full_queue_rejects_jobs(pool: RenderPool) -> None:
+    """Test backpressure when the worker is busy and the queue is full.
+
+    Args:
+        pool: Render pool fixture.
+    """
+    started = threading.Event()
+    release = threading.Event()
+
+    def block() -> None:
+        started.set()
+        release.wait()
+
+    running = pool.submit(block)
+    started.wait()
+    queued = pool.submit(lambda: None)
+    assert pool.stats()["queue_depth"] == 1
+
+    with pytest.raises(RenderQueueFull):
+        pool.submit(lambda: None)
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    running.result()
+    queued.result()
+
+
+def test_timeout_cancels_queued_job(pool: RenderPool) -> None:
+    """Test that a job still queued when its timeout expires is cancelled.
+
+    Args:
+        pool: Render pool fixture.
+    """
+    started = threading.Event()
+    release = threading.Event()
+    ran = threading.Event()
+
+    def block() -> None:
+        started.set()
+        release.wait()
+
+    running = pool.submit(block)
+    started.wait()
+
+    with pytest.raises(RenderTimeout):
+        pool.run(ran.set, timeout=0.05)
+    assert pool.stats()["timed_out"] == 1
+
+    release.set()
+    running.result()
+    pool.shutdown()
+    assert not ran.is_set()
+
+
+def test_shutdown_rejects_new_jobs(pool: RenderPool) -> None:
+    """Test that a shut down pool no longer accepts jobs.
+
+    Args:
+        pool: Render pool fixture.
+    """
+    pool.run(lambda: None)
+    pool.shutdown()
+
+    with pytest.raises(RuntimeError):
+        pool.submit(lambda: None)
+
+
+def test_busy_renderer_returns_503() -> None:
+    """Test that a full render queue is reported with Retry-After."""
+    app = create_app({"RENDER_RETRY_AFTER": 7})
+    client = app.test_client()
+    render_pool = app.extensions["mathviber_render_pool"]
+
+    data = client.post("/api/update_plot", json={"expression": "x"}).get_json()
+    with patch.object(render_pool, "run", side_effect=RenderQueueFull()):
+        response = client.get(f"/plot/{data['plot_filename']}")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_stats_endpoint() -> None:
+    """Test that render pool counters are exposed over the API."""
+    client = create_app({"RENDER_WORKERS": 3}).test_client()
+
+    response = client.get("/api/stats")
+    assert response.status_code == 200
+    stats = response.get_json()["render_pool"]
+    assert stats["workers"] == 3
+    assert stats["queue_depth"] == 0
@@ -0,0 +1,121 @@
+"""Test the /api/update_plot response cache."""
+
+from unittest.mock import patch
+
+from mathviber.app import create_app
+from mathviber.cache import CacheBackend, MemoryCache, request_cache_key
+
+
+class DictBackend(CacheBackend):
+    """Minimal shared-cache stand-in backed by a dictionary."""
+
+    def __init__(self) -> None:
+        """Initialize the backend."""
+        self.entries: dict[str, bytes] = {}
+
+    def get(self, key: str) -> bytes | None:
+        """Return the stored value."""
+        return self.entries.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store a value."""
+        self.entries[key] = value
+
+
+def test_cache_key_is_canonical() -> None:
+    """Test that key order does not change the cache key."""
+    assert request_cache_key({"a": 1, "b": [1.5, None]}) == request_cache_key(
+        {"b": [1.5, None], "a": 1}
+    )
+    assert request_cache_key({"a": 1}) != request_cache_key({"a": 2})
+
+
+def test_memory_cache_evicts_least_recently_used() -> None:
+    """Test the size bound of the in-process cache."""
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+    assert cache.stats()["size"] == 2
+
+
+def test_memory_cache_expires_entries() -> None:
+    """Test the time-to-live bound of the in-process cache."""
+    cache = MemoryCache(ttl=10)
+
+    with patch("mathviber.cache.time.monotonic", return_value=100.0):
+        cache.set("a", b"1")
+    with patch("mathviber.cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") == b"1"
+    with patch("mathviber.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_identical_requests_hit_the_cache() -> None:
+    """Test that a repeated request is served without evaluation."""
+    app = create_app()
+    client = app.test_client()
+    body = {"expression": "sin(x)", "x_min": -5, "x_max": 5, "y_log": False}
+
+    first = client.post("/api/update_plot", json=body)
+    assert first.headers["X-Cache"] == "MISS"
+
+    second = client.post(
+        "/api/update_plot", json={**body, "x_min": "-5", "expression": " sin(x) "}
+    )
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.data == first.data
+
+    stats = client.get("/api/stats").get_json()
+    assert stats["result_cache"]["hits"] == 1
+    assert stats["expression_cache"]["misses"] == 1
+    assert stats["expression_cache"]["hits"] == 0
+
+
+def test_different_parameters_miss_the_cache() -> None:
+    """Test that any plot parameter is part of the cache key."""
+    client = create_app().test_client()
+
+    client.post("/api/update_plot", json={"expression": "x"})
+    response = client.post(
+        "/api/update_plot", json={"expression": "x", "graph_title": "Line"}
+    )
+    assert response.headers["X-Cache"] == "MISS"
+
+
+def test_errors_are_not_cached() -> None:
+    """Test that failed evaluations are not stored."""
+    client = create_app().test_client()
+
+    for _ in range(2):
+        response = client.post("/api/update_plot", json={"expression": "y"})
+        assert "error" in response.get_json()
+
+    assert client.get("/api/stats").get_json()["result_cache"]["size"] == 0
+
+
+def test_pluggable_backend_is_shared() -> None:
+    """Test that apps sharing a backend reuse each other's responses."""
+    backend = DictBackend()
+    first = create_app({"RESULT_CACHE_BACKEND": backend}).test_client()
+    second = create_app({"RESULT_CACHE_BACKEND": backend}).test_client()
+
+    filename = first.post("/api/update_plot", json={"expression": "x"}).get_json()[
+        "plot_filename"
+    ]
+    response = second.post("/api/update_plot", json={"expression": "x"})
+    assert response.headers["X-Cache"] == "HIT"
+
+    # The second app can still render the download it never planned itself
+    with patch(
+        "plotly.graph_objects.Figure.write_image",
+        autospec=True,
+        side_effect=lambda fig, path, **kwargs: open(path, "wb").close(),
+    ):
+        assert second.get(f"/plot/{filename}").status_code == 200
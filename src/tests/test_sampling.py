@@ -0,0 +1,167 @@
+"""Test uniform and adaptive sampling."""
+
+import numpy as np
+import pytest
+
+from mathviber.app import create_app
+from mathviber.expressions import compile_expression
+from mathviber.sampling import adaptive_sample, uniform_sample, uniform_sample_into
+
+
+class CountingKernel:
+    """Kernel wrapper counting the number of evaluated points."""
+
+    def __init__(self, expression: str) -> None:
+        """Compile the expression.
+
+        Args:
+            expression: The mathematical expression.
+        """
+        self.kernel = compile_expression(expression)
+        self.evaluations = 0
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """Evaluate the expression and count the points."""
+        self.evaluations += x.size
+        with np.errstate(all="ignore"):
+            return self.kernel(x)
+
+
+def test_uniform_sample_broadcasts_constants() -> None:
+    """Test that constant expressions yield one value per x."""
+    x, y = uniform_sample(compile_expression("2"), 0, 1, 5)
+
+    np.testing.assert_array_equal(x, np.linspace(0, 1, 5))
+    np.testing.assert_array_equal(y, np.full(5, 2.0))
+
+
+@pytest.mark.parametrize(
+    ("expression", "x_min", "x_max", "num_points"),
+    [
+        ("sin(x)", -10, 10, 1000),
+        ("x**2", 0.1, 0.7, 100_003),
+        ("2", -1, 1, 7),
+        ("x", 0, 5e-324, 5),
+    ],
+)
+def test_uniform_sample_into_matches_uniform_sample(
+    expression: str, x_min: float, x_max: float, num_points: int
+) -> None:
+    """Test that sampling into given arrays gives identical values.
+
+    Args:
+        expression: Expression to sample.
+        x_min: Minimum x value.
+        x_max: Maximum x value.
+        num_points: Number of points.
+    """
+    kernel = compile_expression(expression)
+    x, y = np.empty(num_points), np.empty(num_points)
+    uniform_sample_into(kernel, x_min, x_max, x, y, block_size=4096)
+
+    expected_x, expected_y = uniform_sample(kernel, x_min, x_max, num_points)
+    np.testing.assert_array_equal(x, expected_x)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_straight_line_needs_no_refinement() -> None:
+    """Test that a line is drawn from the initial coarse grid only."""
+    kernel = CountingKernel("2*x + 1")
+    x, y = adaptive_sample(kernel, -10, 10, budget=1000)
+
+    assert kernel.evaluations == x.size == 126
+    np.testing.assert_allclose(y, 2 * x + 1)
+
+
+def test_budget_is_respected() -> None:
+    """Test that refinement never evaluates more points than the budget."""
+    kernel = CountingKernel("sin(1/x)")
+    adaptive_sample(kernel, -1, 1, budget=300)
+
+    assert kernel.evaluations <= 300
+
+
+def test_refines_where_curve_bends() -> None:
+    """Test that samples concentrate where the curve oscillates fastest."""
+    kernel = CountingKernel("sin(1/x)")
+    x, _ = adaptive_sample(kernel, 0.01, 1, budget=1000)
+
+    near_zero = np.count_nonzero(x < 0.1)
+    assert near_zero > 0.5 * x.size
+
+
+def test_more_accurate_than_uniform_at_same_cost() -> None:
+    """Test that adaptive sampling beats uniform sampling of equal size."""
+    kernel = CountingKernel("sin(1/x)")
+    x, y = adaptive_sample(kernel, 0.02, 1, budget=400)
+
+    uniform_x, uniform_y = uniform_sample(kernel, 0.02, 1, kernel.evaluations)
+    dense_x = np.linspace(0.02, 1, 200_001)
+    dense_y = np.sin(1 / dense_x)
+
+    def max_error(xs: np.ndarray, ys: np.ndarray) -> float:
+        return float(np.max(np.abs(np.interp(dense_x, xs, ys) - dense_y)))
+
+    assert max_error(x, y) < max_error(uniform_x, uniform_y)
+
+
+def test_asymptotes_are_broken() -> None:
+    """Test that tan(x) is not drawn across its asymptotes."""
+    x, y = adaptive_sample(compile_expression("tan(x)"), -5, 5, budget=1000)
+
+    breaks = x[np.isnan(y)]
+    np.testing.assert_allclose(
+        np.sort(breaks),
+        [-3 * np.pi / 2, -np.pi / 2, np.pi / 2, 3 * np.pi / 2],
+        atol=1e-3,
+    )
+
+
+def test_jump_is_broken() -> None:
+    """Test that a step discontinuity is detected."""
+    with np.errstate(all="ignore"):
+        x, y = adaptive_sample(compile_expression("abs(x)/x"), -1, 1, budget=200)
+
+    assert np.isnan(y).any()
+    assert np.all(np.abs(x[np.isnan(y)]) < 1e-3)
+
+
+def test_smooth_curve_has_no_breaks() -> None:
+    """Test that steep but continuous curves are not broken."""
+    _, y = adaptive_sample(compile_expression("exp(x)"), -10, 10)
+    assert not np.isnan(y).any()
+
+
+def test_log_axis_samples_geometrically() -> None:
+    """Test that log axes are sampled and measured in log space."""
+    x, _ = adaptive_sample(
+        compile_expression("x"), 1, 1000, budget=16, x_log=True, y_log=True
+    )
+
+    np.testing.assert_allclose(np.diff(np.log10(x)), np.full(2, 1.5))
+
+
+def test_small_budget_is_rejected() -> None:
+    """Test that budgets below three points raise ValueError."""
+    with pytest.raises(ValueError):
+        adaptive_sample(compile_expression("x"), 0, 1, budget=2)
+
+
+def test_update_api_sampling_modes() -> None:
+    """Test that the API honours the requested sampling mode."""
+    client = create_app().test_client()
+
+    def point_count(sampling: str) -> int:
+        response = client.post(
+            "/api/update_plot",
+            json={"expression": "x", "format": "json", "sampling": sampling},
+        )
+        return len(response.get_json()["figure"]["data"][0]["x"])
+
+    assert point_count("uniform") == 1000
+    assert point_count("adaptive") < 1000
+
+    response = client.post(
+        "/api/update_plot", json={"expression": "x", "sampling": "random"}
+    )
+    assert response.get_json() == {"error": "Unknown sampling mode: random"}
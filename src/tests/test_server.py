@@ -0,0 +1,142 @@
+"""Test the production server entry point."""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from unittest.mock import patch
+
+import pytest
+
+from mathviber.app import create_app
+from mathviber.cli import main
+from mathviber.server import run_server, server_options, warm_up
+
+
+def test_server_options() -> None:
+    """Test that CLI settings map to Gunicorn settings."""
+    options = server_options("0.0.0.0", 8080, workers=3, threads=8, timeout=30)
+
+    assert options["bind"] == "0.0.0.0:8080"
+    assert options["workers"] == 3
+    assert options["worker_class"] == "gthread"
+    assert options["keepalive"] == 5
+    assert options["timeout"] == options["graceful_timeout"] == 30
+    assert options["preload_app"] is False
+
+    assert server_options(threads=1)["worker_class"] == "sync"
+    assert server_options()["workers"] >= 1
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"workers": 0}, {"threads": 0}, {"timeout": 0}, {"keepalive": -1}]
+)
+def test_server_options_reject_invalid_values(kwargs: dict[str, int]) -> None:
+    """Test that out-of-range settings are rejected.
+
+    Args:
+        kwargs: Invalid setting.
+    """
+    with pytest.raises(ValueError):
+        server_options(**kwargs)
+
+
+def test_warm_up_prepares_app() -> None:
+    """Test that warm-up compiles the template and a plot expression."""
+    app = create_app()
+    warm_up(app)
+
+    assert app.extensions["mathviber_expression_cache"].stats()["size"] == 1
+    assert any("index.html" in str(key) for key in app.jinja_env.cache)
+
+
+@patch("mathviber.server.run_server")
+def test_cli_server_mode(mock_run_server, capsys) -> None:
+    """Test that --server passes its options to the production server."""
+    result = main(["--server", "--port", "8080", "--workers", "2", "--threads", "1"])
+
+    assert result == 0
+    options = mock_run_server.call_args.args[0]
+    assert options["bind"] == "127.0.0.1:8080"
+    assert options["workers"] == 2
+    assert options["worker_class"] == "sync"
+    assert "with 2 workers x 1 threads" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "argv", [["--server", "--debug"], ["--server", "--workers", "0"]]
+)
+def test_cli_server_mode_rejects_invalid_options(argv: list[str]) -> None:
+    """Test that invalid server options exit with a usage error.
+
+    Args:
+        argv: Command-line arguments.
+    """
+    with pytest.raises(SystemExit) as exc_info:
+        main(argv)
+    assert exc_info.value.code == 2
+
+
+def test_missing_gunicorn_is_reported(capsys) -> None:
+    """Test that a missing Gunicorn install gives a helpful error."""
+    with patch.dict(sys.modules, {"gunicorn.app.base": None}):
+        with pytest.raises(RuntimeError, match="mathviber\\[server\\]"):
+            run_server(server_options())
+        with pytest.raises(SystemExit) as exc_info:
+            main(["--server"])
+
+    assert exc_info.value.code == 1
+    assert "requires gunicorn" in capsys.readouterr().err
+
+
+def wait_for_stats(port: int, deadline: float) -> dict:
+    """Poll the stats endpoint until the server answers.
+
+    Args:
+        port: Server port.
+        deadline: ``time.monotonic`` value after which to give up.
+
+    Returns:
+        The decoded stats response.
+    """
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/stats") as r:
+                return json.loads(r.read())
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def test_server_serves_and_reloads_on_sighup() -> None:
+    """Test that workers are warmed up and replaced gracefully on SIGHUP."""
+    pytest.importorskip("gunicorn")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "mathviber.cli", "--server"]
+        + ["--port", str(port), "--workers", "1", "--threads", "2"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        stats = wait_for_stats(port, time.monotonic() + 30)
+        # The warm-up request went through the worker's app
+        assert stats["expression_cache"]["size"] == 1
+
+        process.send_signal(signal.SIGHUP)
+        time.sleep(1)
+        assert process.poll() is None
+        assert wait_for_stats(port, time.monotonic() + 30)["render_pool"]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
@@ -0,0 +1,116 @@
+"""Test the shared memory array transport."""
+
+import gc
+import os
+
+import numpy as np
+import pytest
+
+from mathviber import shm
+
+needs_dev_shm = pytest.mark.skipif(
+    not os.path.isdir("/dev/shm"), reason="POSIX shared memory is not listable"
+)
+
+
+def segment_exists(name: str) -> bool:
+    """Check whether a segment name is still present.
+
+    Args:
+        name: Segment name.
+
+    Returns:
+        True if the segment can be found in /dev/shm.
+    """
+    return os.path.exists(os.path.join("/dev/shm", name))
+
+
+def test_round_trip_preserves_arrays() -> None:
+    """Test that imported arrays equal the exported ones."""
+    x = np.linspace(0, 1, 1001)
+    y = np.sin(x)
+    y[3] = np.nan
+
+    handle = shm.export_arrays([x, y, np.empty(0)])
+    imported_x, imported_y, empty = shm.import_arrays(handle)
+
+    np.testing.assert_array_equal(imported_x, x)
+    np.testing.assert_array_equal(imported_y, y)
+    assert empty.shape == (0,)
+    assert imported_x.dtype == np.float64
+    assert imported_y.ctypes.data % 64 == 0
+
+
+def test_round_trip_of_no_arrays() -> None:
+    """Test that an empty list of arrays can be exported."""
+    assert shm.import_arrays(shm.export_arrays([])) == []
+
+
+def test_writer_fills_segment_in_place() -> None:
+    """Test that producers can compute straight into the segment."""
+    writer = shm.SharedArrayWriter([(4,), (2, 2)], dtype=np.float32)
+    np.multiply(np.arange(4), 2, out=writer.arrays[0])
+    writer.arrays[1][:] = [[1, 2], [3, 4]]
+
+    first, second = shm.import_arrays(writer.finish())
+
+    assert first.dtype == np.float32
+    np.testing.assert_array_equal(first, [0, 2, 4, 6])
+    np.testing.assert_array_equal(second, [[1, 2], [3, 4]])
+
+
+@needs_dev_shm
+def test_mapping_lives_as_long_as_its_views() -> None:
+    """Test that the segment is unlinked on import and unmapped after use."""
+    handle = shm.export_arrays([np.arange(10.0)])
+    assert segment_exists(handle.name)
+
+    gc.collect()
+    live = shm.stats()["live_mappings"]
+    (x,) = shm.import_arrays(handle)
+    assert not segment_exists(handle.name)
+    assert shm.stats()["live_mappings"] == live + 1
+
+    # A derived view keeps the mapping alive after the original is gone
+    tail = x[5:]
+    del x
+    gc.collect()
+    np.testing.assert_array_equal(tail, [5, 6, 7, 8, 9])
+    assert shm.stats()["live_mappings"] == live + 1
+
+    del tail
+    gc.collect()
+    assert shm.stats()["live_mappings"] == live
+
+
+@needs_dev_shm
+def test_discard_removes_unused_segments() -> None:
+    """Test that segments can be dropped without being imported."""
+    writer = shm.SharedArrayWriter([(3,)])
+    name = writer.name
+    writer.discard()
+    assert not segment_exists(name)
+
+    handle = shm.export_arrays([np.zeros(3)])
+    shm.discard_handle(handle)
+    assert not segment_exists(handle.name)
+
+
+@needs_dev_shm
+def test_sweeps_remove_segments_of_crashed_processes() -> None:
+    """Test cleanup of segments whose producer or owner died."""
+    dead_pid = next(
+        pid for pid in range(4_000_000, 4_100_000) if not os.path.exists(f"/proc/{pid}")
+    )
+    stale = shm.export_arrays([np.zeros(3)], prefix=shm.segment_prefix(dead_pid))
+    orphan = shm.export_arrays([np.zeros(3)], prefix="mathviber_test_")
+    alive = shm.export_arrays([np.zeros(3)])
+
+    assert shm.sweep_stale_segments() >= 1
+    assert not segment_exists(stale.name)
+    assert segment_exists(alive.name)
+
+    assert shm.sweep_segments("mathviber_test_") == 1
+    assert not segment_exists(orphan.name)
+
+    shm.discard_handle(alive)
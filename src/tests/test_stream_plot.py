@@ -0,0 +1,173 @@
+"""Test the progressive NDJSON plot endpoint."""
+
+import base64
+import json
+from typing import Any
+
+import numpy as np
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from mathviber.app import create_app
+from mathviber.chunked import iter_display_chunks
+from mathviber.decimate import decimate
+from mathviber.expressions import compile_expression
+
+
+@pytest.fixture
+def app() -> Flask:
+    """Create a Flask app instance with small stream blocks.
+
+    Returns:
+        Flask: Test Flask application.
+    """
+    return create_app({"STREAM_CHUNK_SIZE": 5000})
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """Create a test client for the Flask app.
+
+    Args:
+        app: Flask application fixture.
+
+    Returns:
+        FlaskClient: Test client for making requests.
+    """
+    return app.test_client()
+
+
+def decode(spec: dict[str, str]) -> np.ndarray:
+    """Decode a typed array specification the way Plotly.js does.
+
+    Args:
+        spec: Dictionary with ``dtype`` and ``bdata``.
+
+    Returns:
+        The decoded array.
+    """
+    return np.frombuffer(base64.b64decode(spec["bdata"]), dtype="<" + spec["dtype"])
+
+
+def stream(client: FlaskClient, **data: Any) -> list[dict[str, Any]]:
+    """Post a stream request and parse its messages.
+
+    Args:
+        client: Flask test client.
+        **data: Request parameters.
+
+    Returns:
+        The decoded messages in order.
+    """
+    response = client.post("/api/stream_plot", json=data)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.data.endswith(b"\n")
+    return [json.loads(line) for line in response.data.splitlines()]
+
+
+def test_stream_sends_preview_then_chunks(client: FlaskClient) -> None:
+    """Test that a preview is followed by ordered chunks and a done message.
+
+    Args:
+        client: Flask test client.
+    """
+    messages = stream(
+        client,
+        expression="sin(x)",
+        x_min=0,
+        x_max=10,
+        num_points=20000,
+        sampling="uniform",
+        width=100,
+    )
+
+    assert [m["type"] for m in messages] == ["preview"] + ["chunk"] * 4 + ["done"]
+
+    main, preview = messages[0]["figure"]["data"]
+    assert main["x"] == [] and main["y"] == []
+    assert len(preview["x"]) == 200
+    np.testing.assert_allclose(preview["y"], np.sin(preview["x"]))
+    assert messages[0]["config"]["displaylogo"] is False
+
+    x = np.concatenate([m["x"] for m in messages[1:-1]])
+    y = np.concatenate([m["y"] for m in messages[1:-1]])
+    assert np.all(np.diff(x) > 0)
+    assert x[0] == 0 and x[-1] == 10
+    np.testing.assert_allclose(y, np.sin(x))
+    assert messages[-1]["points"] == x.size
+    assert messages[-1]["plot_filename"].endswith(".png")
+
+
+def test_stream_chunks_draw_the_full_trace() -> None:
+    """Test that reduced blocks keep every point of the full M4 selection."""
+    kernel = compile_expression("sin(40 * x) * exp(-x)")
+    chunks = list(iter_display_chunks(kernel, 0, 5, 100000, 200, chunk_size=7000))
+
+    x = np.concatenate([x for x, _ in chunks])
+    full_x = np.linspace(0, 5, 100000)
+    expected_x, expected_y = decimate(full_x, kernel(full_x), 200)
+
+    assert len(chunks) == 15
+    assert x.size <= 5 * 200 + 4 * len(chunks)
+    assert set(expected_x) <= set(x)
+    assert np.max(np.concatenate([y for _, y in chunks])) == np.max(expected_y)
+
+
+def test_stream_adaptive_sends_single_chunk(client: FlaskClient) -> None:
+    """Test that adaptive sampling sends the refined trace in one chunk.
+
+    Args:
+        client: Flask test client.
+    """
+    messages = stream(
+        client, expression="x**2", sampling="adaptive", encoding="float64"
+    )
+
+    assert [m["type"] for m in messages] == ["preview", "chunk", "done"]
+    x = decode(messages[1]["x"])
+    y = decode(messages[1]["y"])
+    np.testing.assert_allclose(y, x**2)
+    assert x[0] == -10 and x[-1] == 10
+
+
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        ({"expression": ""}, "No expression provided"),
+        ({"expression": "import os"}, None),
+        ({"expression": "x", "x_min": 5, "x_max": 1}, "X minimum must be less"),
+        ({"expression": "x", "num_points": 2}, "Number of points must be"),
+        ({"expression": "x", "encoding": "utf8"}, "Unknown encoding: utf8"),
+        ({"expression": "x", "x_min": "abc"}, "Invalid numeric input"),
+    ],
+)
+def test_stream_invalid_requests(
+    client: FlaskClient, data: dict[str, Any], error: str | None
+) -> None:
+    """Test that invalid requests answer with a single error message.
+
+    Args:
+        client: Flask test client.
+        data: Request parameters.
+        error: Expected start of the error message, if specific.
+    """
+    messages = stream(client, **data)
+
+    assert len(messages) == 1
+    assert messages[0]["type"] == "error"
+    if error is not None:
+        assert messages[0]["error"].startswith(error)
+
+
+def test_stream_reports_evaluation_errors(client: FlaskClient) -> None:
+    """Test that a failure after the preview ends the stream with an error.
+
+    Args:
+        client: Flask test client.
+    """
+    messages = stream(client, expression="x", sampling="random")
+
+    assert [m["type"] for m in messages] == ["preview", "error"]
+    assert messages[1]["error"] == "Unknown sampling mode: random"
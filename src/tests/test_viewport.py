@@ -0,0 +1,113 @@
+"""Test the zoom-aware viewport endpoint."""
+
+import numpy as np
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from mathviber.app import create_app
+
+
+@pytest.fixture
+def app() -> Flask:
+    """Create a Flask app instance for testing.
+
+    Returns:
+        Flask: Test Flask application.
+    """
+    return create_app()
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """Create a test client for the Flask app.
+
+    Args:
+        app: Flask application fixture.
+
+    Returns:
+        FlaskClient: Test client for making requests.
+    """
+    return app.test_client()
+
+
+def test_viewport_samples_visible_window(client: FlaskClient) -> None:
+    """Test that a zoomed window is sampled afresh at screen resolution.
+
+    Args:
+        client: Flask test client.
+    """
+    response = client.post(
+        "/api/viewport",
+        json={
+            "expression": "sin(1/x)",
+            "x_min": 0.001,
+            "x_max": 0.002,
+            "width": 300,
+            "sampling": "uniform",
+        },
+    )
+    data = response.get_json()
+
+    assert data["success"] is True
+    x = np.array(data["x"])
+    assert x.min() == pytest.approx(0.001) and x.max() == pytest.approx(0.002)
+    assert 300 <= x.size <= 4 * 300
+    np.testing.assert_allclose(data["y"], np.sin(1 / x))
+
+
+def test_viewport_reuses_caches(client: FlaskClient) -> None:
+    """Test that repeated viewports hit the result and expression caches.
+
+    Args:
+        client: Flask test client.
+    """
+    body = {"expression": "x**3", "x_min": 1, "x_max": 2, "width": 200}
+
+    client.post("/api/update_plot", json={"expression": "x**3"})
+    first = client.post("/api/viewport", json=body)
+    second = client.post("/api/viewport", json=body)
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    stats = client.get("/api/stats").get_json()
+    assert stats["expression_cache"]["hits"] == 1
+    assert stats["expression_cache"]["misses"] == 1
+
+
+def test_viewport_binary_encoding(client: FlaskClient) -> None:
+    """Test that viewport arrays can be sent as typed arrays.
+
+    Args:
+        client: Flask test client.
+    """
+    data = client.post(
+        "/api/viewport",
+        json={"expression": "x", "x_min": 0, "x_max": 1, "encoding": "float32"},
+    ).get_json()
+
+    assert data["x"]["dtype"] == "f4"
+    assert data["y"]["dtype"] == "f4"
+
+
+@pytest.mark.parametrize(
+    ("body", "error"),
+    [
+        ({"expression": ""}, "No expression provided"),
+        ({"expression": "x", "x_min": 1, "x_max": 1}, "X minimum must be less"),
+        ({"expression": "x", "width": 20000}, "Width must be between"),
+        ({"expression": "x", "encoding": "hex"}, "Unknown encoding"),
+        ({"expression": "q"}, "Unknown name 'q'"),
+        ({"expression": "x", "x_min": "left"}, "Invalid numeric input"),
+    ],
+)
+def test_viewport_errors(client: FlaskClient, body: dict, error: str) -> None:
+    """Test that invalid viewport requests report an error.
+
+    Args:
+        client: Flask test client.
+        body: Request body.
+        error: Expected start of the error message.
+    """
+    data = client.post("/api/viewport", json=body).get_json()
+    assert data["error"].startswith(error)